@@ -1,66 +1,26 @@
 # maximal Bipartite matching
+import numpy as np
+
+from MRAG.assignment import hopcroft_karp
+
 
 class MaxMatching:
     def __init__(self, bp):
         """inputs
         bipartite graph: attackers and defenders, if attacker_i is defended by defender_j, then graph[i][j]=1
+        a list of lists or a (num_attackers, num_defenders) NumPy matrix
         """
-        self.graph = bp
-        self.num_attackers = len(bp)  # the number of attackers
-        self.num_defenders = len(bp[0])  # the number of defenders
-
-    def match(self, attacker, matched, checked):
-        # A DFS based recursive function is implemented
-        # Return true if the attacker and defender match successfully
-        for defender in range(self.num_defenders):
-            # If the edge between attacker and defender exists + this defender has not been checked before
-            if self.graph[attacker][defender] and checked[defender] == False:
-                # This defender has already been checked by this attacker
-                checked[defender] = True
-                # If this defender has not matched another attacker,
-                # or this defender has matched another attacker but the attacker could match other defender
-                if matched[defender] == -1 or self.match(matched[defender], matched, checked):
-                    matched[defender] = attacker
-                    return True
-        return False
+        self.graph = np.asarray(bp, dtype=bool).reshape(len(bp), -1)
+        self.num_attackers = self.graph.shape[0]  # the number of attackers
+        self.num_defenders = self.graph.shape[1]  # the number of defenders
 
     def maximum_match(self):
-        # matched[i] is the attacker defended by defender i, the value -1 indicates this attacker wins
-        # in matched, the value is the number of attacker, index is the number of defender
-        matched = [-1] * self.num_defenders
-        # Count of the number of matched pairs
-        result = 0
-        for i in range(self.num_attackers):
-            checked = [False] * self.num_defenders
-            if self.match(i, matched, checked):
-                # print(f"The checked list is {checked}")
-                result += 1
+        # Hopcroft-Karp on the adjacency lists of the attackers, without recursion
+        adjacency = [np.flatnonzero(row).tolist() for row in self.graph]
+        result, _, matched = hopcroft_karp(adjacency, self.num_defenders)
+        # matched[j] is the attacker defended by defender j, the value -1 indicates this attacker wins
         selected = [[] for _ in range(self.num_defenders)] # [[a1], [a2], ...]
         for j in range(self.num_defenders):
             if matched[j] != -1:
                 selected[j].append(matched[j])
         return result, selected
-
-
-# test
-bpGraph = [[1, 1], 
-           [0, 0], 
-           [0, 0], 
-           [1, 0]]
-
-
-# bpGraph = np.array([[1, 1, 1], 
-#                     [0, 1, 0], 
-#                     [0, 1, 0],
-#                     [1, 0, 0]])
-
-# bpGraph = [[1, 1, 0, 1],
-#            [1, 0, 0, 1],
-#            [0, 1, 0, 0],
-#            [1, 0, 0, 0]]
-
-
-mm = MaxMatching(bpGraph)
-number, selected = mm.maximum_match()
-print(number)
-print(selected)
\ No newline at end of file
@@ -0,0 +1,231 @@
+'''Combinatorial solvers for the defender assignment of the reach-avoid game.
+
+'''
+from collections import deque
+import numpy as np
+
+
+def hopcroft_karp(adjacency, num_right):
+    """ Maximum matching of a bipartite graph with the Hopcroft-Karp algorithm, without recursion.
+
+    Args:
+        adjacency (a list of lists): adjacency[u] is the list of right vertices connected to the left vertex u
+        num_right (int): the number of right vertices
+
+    Returns:
+        size (int): the number of matched pairs
+        match_left (list): match_left[u] is the right vertex matched to u, -1 if u is not matched
+        match_right (list): match_right[v] is the left vertex matched to v, -1 if v is not matched
+    """
+    num_left = len(adjacency)
+    match_left, match_right = [-1] * num_left, [-1] * num_right
+    size = 0
+    while True:
+        # BFS from the free left vertices, layers of alternating paths
+        dist = [-1] * num_left
+        queue = deque(u for u in range(num_left) if match_left[u] == -1)
+        for u in queue:
+            dist[u] = 0
+        found = False
+        while queue:
+            u = queue.popleft()
+            for v in adjacency[u]:
+                w = match_right[v]
+                if w == -1:
+                    found = True
+                elif dist[w] == -1:
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+        if not found:
+            return size, match_left, match_right
+
+        # DFS along the layers, a stack of (left vertex, next neighbour position) replaces the recursion
+        position = [0] * num_left
+        for root in range(num_left):
+            if match_left[root] != -1:
+                continue
+            stack = [root]
+            while stack:
+                u = stack[-1]
+                if position[u] == len(adjacency[u]):
+                    dist[u] = -1  # dead end, not visited again in this phase
+                    stack.pop()
+                    continue
+                v = adjacency[u][position[u]]
+                position[u] += 1
+                w = match_right[v]
+                if w == -1:
+                    # augmenting path found, flip it from the end back to the root
+                    for u_path in reversed(stack):
+                        v_next = adjacency[u_path][position[u_path] - 1]
+                        match_left[u_path], match_right[v_next] = v_next, u_path
+                    size += 1
+                    break
+                if dist[w] == dist[u] + 1:
+                    stack.append(w)
+
+
+def _relaxed_matching(allowed, defender_capacity, attacker_capacity):
+    # Maximum b-matching without the pair constraints, each defender and attacker is split in one vertex per unit of capacity
+    slots = [a for a in range(len(attacker_capacity)) for _ in range(attacker_capacity[a])]
+    left = [j for j in defender_capacity for _ in range(defender_capacity[j])]
+    adjacency = [[s for s, a in enumerate(slots) if allowed[a][j]] for j in left]
+    size, match_left, _ = hopcroft_karp(adjacency, len(slots))
+    assignments = {j: [] for j in defender_capacity}
+    for u, s in enumerate(match_left):
+        if s != -1:
+            assignments[left[u]].append(slots[s])
+    return size, assignments
+
+
+def _relaxed_bound(allowed, allowed_lists, forbidden_pairs, defenders, attacker_capacity, defender_capacity):
+    # Upper bound of the attackers the defenders could still take. A defender without any compatible pair of
+    # available attackers takes at most one of them.
+    capacities = {}
+    for j in defenders:
+        free = [i for i in allowed_lists[j] if attacker_capacity[i] > 0]
+        if len(free) >= 2 and defender_capacity >= 2 and \
+                any((i, k) not in forbidden_pairs[j] for n, i in enumerate(free) for k in free[n+1:]):
+            capacities[j] = 2
+        elif free:
+            capacities[j] = 1
+    if sum(capacities.values()) == 0:
+        return 0
+    return _relaxed_matching(allowed, capacities, attacker_capacity)[0]
+
+
+def max_assignment(allowed, forbidden_pairs, attacker_capacity=1, defender_capacity=2, max_nodes=100000):
+    """ Exact maximum assignment of attackers to defenders with pair conflicts.
+    Each defender takes at most defender_capacity (1 or 2) attackers, each attacker at most attacker_capacity defenders,
+    only the allowed edges are used and a defender never takes both attackers of one of its forbidden pairs.
+    The search goes through the choices of each defender, pruned with the Hopcroft-Karp bound of the problem
+    without the pair constraints, and stops as soon as that bound is reached.
+
+    Args:
+        allowed (np.ndarray, (num_attackers, num_defenders)): allowed[i][j] is True if defender j could take attacker i
+        forbidden_pairs (a list of sets): forbidden_pairs[j] contains the pairs (i, k), i < k, defender j could not take together
+        attacker_capacity (int): the number of defenders an attacker could be assigned to
+        defender_capacity (int): the number of attackers a defender could take
+        max_nodes (int): the search gives up after this number of nodes
+
+    Returns:
+        assignments (a list of lists): the attackers assigned to each defender, None if the search gave up
+    """
+    allowed = np.asarray(allowed, dtype=bool)
+    num_attackers, num_defenders = allowed.shape
+    allowed_lists = [np.flatnonzero(allowed[:, j]).tolist() for j in range(num_defenders)]
+    capacity = [attacker_capacity] * num_attackers
+    _, relaxed = _relaxed_matching(allowed, dict.fromkeys(range(num_defenders), defender_capacity), capacity)
+    # Most of the time the relaxed matching already respects the pair constraints, then it is optimal
+    if all(len(set(chosen)) == len(chosen) and tuple(sorted(chosen)) not in forbidden_pairs[j]
+           for j, chosen in relaxed.items() if len(chosen) == 2):
+        return [sorted(relaxed[j]) for j in range(num_defenders)]
+    bound = _relaxed_bound(allowed, allowed_lists, forbidden_pairs, range(num_defenders), capacity, defender_capacity)
+    best = {"size": -1, "assignments": None, "nodes": 0}
+    current = [[] for _ in range(num_defenders)]
+
+    def options(j):
+        # pairs first, then single attackers, then nothing
+        free = [i for i in allowed_lists[j] if capacity[i] > 0]
+        choices = []
+        if defender_capacity >= 2:
+            choices += [(i, k) for n, i in enumerate(free) for k in free[n+1:] if (i, k) not in forbidden_pairs[j]]
+        return choices + [(i,) for i in free] + [()]
+
+    def search(j, size):
+        # returns True when the search is over, either optimal or out of nodes
+        if j == num_defenders:
+            if size > best["size"]:
+                best["size"], best["assignments"] = size, [sorted(chosen) for chosen in current]
+            return best["size"] == bound
+        for choice in options(j):
+            best["nodes"] += 1
+            if best["nodes"] > max_nodes:
+                return True
+            for i in choice:
+                capacity[i] -= 1
+            current[j] = list(choice)
+            remaining = size + len(choice)
+            if remaining + _relaxed_bound(allowed, allowed_lists, forbidden_pairs, range(j + 1, num_defenders), capacity, defender_capacity) > best["size"]:
+                done = search(j + 1, remaining)
+            else:
+                done = False
+            for i in choice:
+                capacity[i] += 1
+            current[j] = []
+            if done:
+                return True
+        return False
+
+    search(0, 0)
+    if best["nodes"] > max_nodes:
+        return None
+    return best["assignments"]
+
+
+def _problem(num_defenders, current_attackers_status, EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2=None):
+    # allowed edges and forbidden pairs of mip_solver (extend_mip_solver if EscapedAttackers1vs2 is given)
+    current_attackers_status = np.asarray(current_attackers_status)
+    allowed = np.repeat((current_attackers_status == 0)[:, None], num_defenders, axis=1)
+    for j in range(num_defenders):
+        for attacker in EscapedAttacker1vs1[j]:
+            if EscapedAttackers1vs2 is None or attacker in EscapedAttackers1vs2[j]:
+                allowed[attacker, j] = False
+    forbidden_pairs = [{(min(i, k), max(i, k)) for i, k in EscapedPairs2vs1[j]} for j in range(num_defenders)]
+    return allowed, forbidden_pairs
+
+
+def combinatorial_solver(num_defenders, current_attackers_status, EscapedAttacker1vs1, EscapedPairs2vs1):
+    """ Returns the same assignment problem as mip_solver, solved exactly without an external solver.
+    Falls back to mip_solver (CBC) if the search runs out of nodes.
+
+    Args:
+        num_defenders (int): the number of defenders
+        current_attackers_status (np.ndarray, (num_attackers, )): the current moment attackers' status, 0 stands for free, -1 stands for captured, 1 stands for arrived
+        EscapedAttacker1vs1 (list): the attacker that could escape from the defender in a 1 vs 1 game
+        EscapedPairs2vs1 (list): the pair of attackers that could escape from the defender in a 2 vs 1 game
+
+    Returns:
+        assignments (a list of lists): the list of attackers that the defender assigned to capture
+    """
+    allowed, forbidden_pairs = _problem(num_defenders, current_attackers_status, EscapedAttacker1vs1, EscapedPairs2vs1)
+    assignments = max_assignment(allowed, forbidden_pairs, attacker_capacity=1)
+    if assignments is None:
+        from MRAG.solvers import mip_solver
+        return mip_solver(num_defenders, np.asarray(current_attackers_status), EscapedAttacker1vs1, EscapedPairs2vs1)
+
+    return assignments
+
+
+def extend_combinatorial_solver(num_defenders, current_attackers_status,
+                                EscapedAttacker1vs1, EscapedPairs2vs1,
+                                EscapedAttackers1vs2, EscapedTri1vs2):
+    """ Returns the same outputs as extend_mip_solver, solved exactly without an external solver.
+    Each attacker could be assigned to 2 defenders, only the edges escaping both the 1 vs. 1 and the 1 vs. 2 games are removed.
+    Falls back to extend_mip_solver (CBC) if the search runs out of nodes.
+
+    Returns:
+        assignments (a list of lists): the list of attackers that the defender assigned to capture
+        weights (np.ndarray, (num_free_attackers, num_defenders)): the weights for each assignment
+        attacker_views (a list of lists): the list of defenders that could capture the attacker
+    """
+    current_attackers_status = np.asarray(current_attackers_status)
+    allowed, forbidden_pairs = _problem(num_defenders, current_attackers_status, EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2)
+    assignments = max_assignment(allowed, forbidden_pairs, attacker_capacity=2)
+    if assignments is None:
+        from MRAG.solvers import extend_mip_solver
+        return extend_mip_solver(num_defenders, current_attackers_status, EscapedAttacker1vs1, EscapedPairs2vs1,
+                                 EscapedAttackers1vs2, EscapedTri1vs2)
+
+    free_attackers_positions = np.where(current_attackers_status == 0)[0]
+    weights = np.ones((len(free_attackers_positions), num_defenders))
+    for j in range(num_defenders):
+        for attacker in EscapedAttacker1vs1[j]:
+            if attacker not in EscapedAttackers1vs2[j]:
+                weights[np.where(free_attackers_positions == attacker)[0][0]][j] = 0.5
+    attacker_views = [[] for _ in range(len(current_attackers_status))]
+    for j in range(num_defenders):
+        for attacker in assignments[j]:
+            attacker_views[attacker].append(j)
+
+    return assignments, weights, attacker_views
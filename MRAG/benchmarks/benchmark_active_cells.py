@@ -0,0 +1,52 @@
+import sys
+import time
+import numpy as np
+
+from odp.solver import HJSolver
+from MRAG.benchmarks.benchmark_numpy_backend import problem_1vs1, tau, po, compMethods
+
+""" Wall-clock benchmark of the narrow band and of the frozen cells against a full-grid solve
+- 1. Build the 1vs1 (4D) reach-avoid problem of benchmark_numpy_backend
+- 2. Solve it on the full grid and with narrow_band=k for a few band widths
+- 3. Solve it until convergence on the full grid and with freeze_steps=N for a few N
+- 4. Report the wall-clock time, including the band rebuilds, and the fraction of cells whose sign differs from the
+     full-grid solve, the only part of the value the games use
+Run from the repository root: python -m MRAG.benchmarks.benchmark_active_cells [heterocl|numpy] [grid size]
+"""
+
+band_widths = [3, 6]
+freeze_steps = [3, 10]
+# Long enough for the 1vs1 value to converge
+converge_tau = np.arange(start=0, stop=4.0 + 1e-5, step=0.025)
+
+
+def solve(grid_size, backend, times=tau, **options):
+    agents, grids, multiple_value = problem_1vs1(grid_size)
+    start_time = time.time()
+    value = HJSolver(agents, grids, multiple_value, times, compMethods, po, accuracy="medium", backend=backend,
+                     **options)
+    return np.asarray(value), time.time() - start_time
+
+
+def compare(title, solves):
+    # solves: (name, (value, wall-clock)) pairs, the first one is the full-grid reference
+    value_full, t_full = solves[0][1]
+    print(title)
+    print(f"{'solve':<16}{'wall-clock (s)':>16}{'speedup':>9}{'sign mismatch':>15}")
+    for name, (value, elapsed) in solves:
+        mismatch = np.mean((value > 0) != (value_full > 0))
+        print(f"{name:<16}{elapsed:>16.3f}{t_full / elapsed:>9.2f}{mismatch:>15.3%}")
+
+
+def benchmark(backend, grid_size):
+    compare(f"1vs1, {grid_size}^4 grid, {backend} backend, t in [0, {tau[-1]:g}]",
+            [("full grid", solve(grid_size, backend))] +
+            [(f"narrow_band={width}", solve(grid_size, backend, narrow_band=width)) for width in band_widths])
+    compare(f"1vs1, {grid_size}^4 grid, {backend} backend, until convergence",
+            [("full grid", solve(grid_size, backend, converge_tau, untilConvergent=True))] +
+            [(f"freeze_steps={steps}", solve(grid_size, backend, converge_tau, untilConvergent=True,
+                                             freeze_steps=steps)) for steps in freeze_steps])
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else "heterocl", int(sys.argv[2]) if len(sys.argv) > 2 else 30)
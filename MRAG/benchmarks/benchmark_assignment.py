@@ -0,0 +1,83 @@
+import time
+import numpy as np
+
+from MRAG.solvers import mip_solver, extend_mip_solver, AssignmentEngine
+
+""" Latency of the persistent AssignmentEngine against mip_solver and extend_mip_solver
+- 1. Generate random sequences of game steps with 8 attackers and 4 defenders: at each step one defender's escape
+     results change with probability change_rate, and an attacker is captured from time to time
+- 2. Solve every step with mip_solver / extend_mip_solver (a new model each time) and with an AssignmentEngine
+- 3. Check that both find assignments of the same size and report the latency statistics of both
+Run from the repository root: python -m MRAG.benchmarks.benchmark_assignment
+"""
+
+num_attackers, num_defenders = 8, 4
+steps = 200
+change_rates = [1.0, 0.2]
+
+
+def random_escapes(rng, status, j):
+    # Escape results of defender j against the free attackers
+    free = np.flatnonzero(status == 0).tolist()
+    escaped1vs1 = [i for i in free if rng.random() < 0.3]
+    pairs2vs1 = [[i, k] for i in free for k in free if i < k and rng.random() < 0.2]
+    escaped1vs2 = [i for i in escaped1vs1 if rng.random() < 0.5]
+    return escaped1vs1, pairs2vs1, escaped1vs2
+
+
+def random_steps(rng, change_rate):
+    status = np.zeros(num_attackers, dtype=int)
+    escapes = [random_escapes(rng, status, j) for j in range(num_defenders)]
+    for step in range(steps):
+        if step % 40 == 39 and np.any(status == 0):
+            status = status.copy()
+            status[rng.choice(np.flatnonzero(status == 0))] = -1
+            escapes = [random_escapes(rng, status, j) for j in range(num_defenders)]
+        elif rng.random() < change_rate:
+            j = rng.integers(num_defenders)
+            escapes = escapes[:j] + [random_escapes(rng, status, j)] + escapes[j + 1:]
+        EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2 = (list(lists) for lists in zip(*escapes))
+        EscapedTri1vs2 = [[] for _ in range(num_defenders)]
+        yield status, EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2
+
+
+def size(assignments):
+    return sum(len(assigned) for assigned in assignments)
+
+
+def latency_row(name, solves, latencies_ms):
+    print(f"{name:<30}{solves:>8}{np.mean(latencies_ms):>11.2f}{np.percentile(latencies_ms, 50):>10.2f}"
+          f"{np.percentile(latencies_ms, 95):>10.2f}{np.max(latencies_ms):>10.2f}")
+
+
+def benchmark(extended, change_rate):
+    rng = np.random.default_rng(0)
+    engine = AssignmentEngine(num_attackers, num_defenders, extended=extended)
+    latencies, mismatches = [], 0
+    for step in random_steps(rng, change_rate):
+        status, EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2 = step
+        start_time = time.perf_counter()
+        if extended:
+            reference = extend_mip_solver(num_defenders, status, EscapedAttacker1vs1, EscapedPairs2vs1,
+                                          EscapedAttackers1vs2, EscapedTri1vs2)[0]
+        else:
+            reference = mip_solver(num_defenders, status, EscapedAttacker1vs1, EscapedPairs2vs1)
+        latencies.append(time.perf_counter() - start_time)
+        assignments = engine(status, EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2)
+        mismatches += size(reference) != size(assignments[0] if extended else assignments)
+    return latencies, engine, mismatches
+
+
+if __name__ == "__main__":
+    results = []
+    for extended in [False, True]:
+        for change_rate in change_rates:
+            results.append((extended, change_rate) + benchmark(extended, change_rate))
+
+    print(f"{num_attackers} attackers, {num_defenders} defenders, {steps} steps per sequence")
+    print(f"{'solver':<30}{'solves':>8}{'mean (ms)':>11}{'p50 (ms)':>10}{'p95 (ms)':>10}{'max (ms)':>10}")
+    for extended, change_rate, latencies, engine, mismatches in results:
+        name = "extend_mip_solver" if extended else "mip_solver"
+        latency_row(f"{name}, change {change_rate:g}", len(latencies), np.array(latencies) * 1000)
+        latency_row(f"  engine, change {change_rate:g}", engine.num_solves, np.array(engine.latencies) * 1000)
+        print(f"  assignment size mismatches: {mismatches}")
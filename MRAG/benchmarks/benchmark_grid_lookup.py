@@ -0,0 +1,46 @@
+import time
+import numpy as np
+
+from odp.Grid import Grid
+
+""" Benchmark of the value function lookups of odp.Grid
+- 1. Build random 4D (g30) and 6D (g12) value functions on the grids used by the 1vs1 and 1vs2 games
+- 2. Look up batches of random states with get_value (one call per state), get_values (nearest grid point),
+     interpolate_value and interpolate_gradient (multilinear)
+- 3. Report the number of lookups per second for each batch size
+Run from the repository root: python -m MRAG.benchmarks.benchmark_grid_lookup
+"""
+
+batch_sizes = [1, 10, 100, 1000, 10000]
+min_duration = 0.5  # seconds spent on each measurement
+
+
+def lookups_per_second(lookup, states):
+    count = 0
+    start_time = time.time()
+    while time.time() - start_time < min_duration:
+        lookup(states)
+        count += len(states)
+    return count / (time.time() - start_time)
+
+
+results = []
+for name, dims, grid_size in [("1vs1", 4, 30), ("1vs2", 6, 12)]:
+    grids = Grid(np.array([-1.0] * dims), np.array([1.0] * dims), dims, np.array([grid_size] * dims))
+    rng = np.random.default_rng(0)
+    V = rng.standard_normal(tuple(grids.pts_each_dim)).astype(np.float32)
+
+    lookups = {
+        "get_value": lambda states: [grids.get_value(V, state) for state in states],
+        "get_values": lambda states: grids.get_values(V, states),
+        "interpolate_value": lambda states: grids.interpolate_value(V, states),
+        "interpolate_gradient": lambda states: grids.interpolate_gradient(V, states),
+    }
+    for batch_size in batch_sizes:
+        states = rng.uniform(-1.0, 1.0, size=(batch_size, dims))
+        for method, lookup in lookups.items():
+            results.append((name, grid_size, method, batch_size, lookups_per_second(lookup, states)))
+
+print(f"{'game':<6}{'grid':>6}{'method':>22}{'batch':>8}{'lookups/s':>14}")
+for name, grid_size, method, batch_size, rate in results:
+    print(f"{name:<6}{grid_size:>6}{method:>22}{batch_size:>8}{rate:>14.0f}")
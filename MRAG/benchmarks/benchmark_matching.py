@@ -0,0 +1,26 @@
+import time
+import numpy as np
+
+from MRAG.MaximumMatching import MaxMatching
+
+""" Benchmark of the maximum bipartite matching of MRAG.MaximumMatching
+- 1. Build random attacker-defender graphs of 100 x 100 and 1000 x 1000 agents with different edge densities
+- 2. Run MaxMatching(graph).maximum_match() (Hopcroft-Karp) several times
+- 3. Report the matching size and the mean time of one matching
+Run from the repository root: python -m MRAG.benchmarks.benchmark_matching
+"""
+
+sizes = [100, 1000]
+densities = [0.01, 0.05, 0.2]
+repeats = 5
+
+print(f"{'attackers':>10}{'defenders':>10}{'density':>9}{'matched':>9}{'time (ms)':>11}")
+rng = np.random.default_rng(0)
+for size in sizes:
+    for density in densities:
+        graph = rng.random((size, size)) < density
+        start_time = time.time()
+        for _ in range(repeats):
+            result, selected = MaxMatching(graph).maximum_match()
+        elapsed = (time.time() - start_time) / repeats
+        print(f"{size:>10}{size:>10}{density:>9.2f}{result:>9}{elapsed * 1000:>11.2f}")
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import numpy as np
+
+from odp.Grid import Grid
+from odp.Shapes import *
+from MRAG.envs.AttackerDefender import AttackerDefender1vs0, AttackerDefender1vs1
+from odp.Plots import PlotOptions
+from odp.solver import HJSolver
+
+try:
+    import heterocl
+except ImportError:
+    heterocl = None
+
+""" Benchmark and accuracy check of the HJSolver backends
+- 1. Build the 1vs0 (2D) and 1vs1 (4D) reach-avoid problems of MRAG/values_calculation
+- 2. Solve each of them with backend="heterocl" and backend="numpy"
+- 3. Report the wall-clock time and the max absolute difference between the two value functions, and fail
+     (exit code 1) when it is above HETEROCL_TOLERANCE
+Run from the repository root: python -m MRAG.benchmarks.benchmark_numpy_backend
+
+The HeteroCL results can be stored once on a machine with the toolchain, the numpy backend is then checked
+against them anywhere:
+    python -m MRAG.benchmarks.benchmark_numpy_backend --record   # writes MRAG/benchmarks/references/*.npy
+    python -m MRAG.benchmarks.benchmark_numpy_backend --check    # numpy backend only, fails above the tolerance
+"""
+
+# Largest max |V_numpy - V_heterocl| accepted, the values are distances on [-1, 1]^n grids
+HETEROCL_TOLERANCE = 1e-3
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "references")
+
+lookback_length = 1.0
+t_step = 0.025
+small_number = 1e-5
+tau = np.arange(start=0, stop=lookback_length + small_number, step=t_step)
+po = PlotOptions(do_plot=False, plot_type="set", plotDims=[0, 1], slicesCut=[])
+compMethods = {"TargetSetMode": "minVWithVTarget", "ObstacleSetMode": "maxVWithObstacle"}
+
+
+def problem_1vs0(grid_size):
+    grids = Grid(np.array([-1.0, -1.0]), np.array([1.0, 1.0]), 2, np.array([grid_size, grid_size]))
+    agents_1v0 = AttackerDefender1vs0(uMode="min", dMode="max")
+    obs1 = ShapeRectangle(grids, [-0.1, -1.0], [0.1, -0.3])
+    obs2 = ShapeRectangle(grids, [-0.1, 0.30], [0.1, 0.60])
+    avoid_set = np.minimum(obs1, obs2)
+    reach_set = ShapeRectangle(grids, [0.6, 0.1], [0.8, 0.3])
+    return agents_1v0, grids, [reach_set, avoid_set]
+
+
+def problem_1vs1(grid_size):
+    grids = Grid(np.array([-1.0, -1.0, -1.0, -1.0]), np.array([1.0, 1.0, 1.0, 1.0]), 4, np.array([grid_size] * 4))
+    agents_1v1 = AttackerDefender1vs1(uMode="min", dMode="max")
+    obs1_attack = ShapeRectangle(grids, [-0.1, -1.0, -1000, -1000], [0.1, -0.3, 1000, 1000])
+    obs2_attack = ShapeRectangle(grids, [-0.1, 0.30, -1000, -1000], [0.1, 0.60, 1000, 1000])
+    obs3_capture = agents_1v1.capture_set(grids, 0.1, "capture")
+    avoid_set = np.minimum(obs3_capture, np.minimum(obs1_attack, obs2_attack))
+    goal1_destination = ShapeRectangle(grids, [0.6, 0.1, -1000, -1000], [0.8, 0.3, 1000, 1000])
+    goal2_escape = agents_1v1.capture_set(grids, 0.1, "escape")
+    obs1_defend = ShapeRectangle(grids, [-1000, -1000, -0.1, -1000], [1000, 1000, 0.1, -0.3])
+    obs2_defend = ShapeRectangle(grids, [-1000, -1000, -0.1, 0.30], [1000, 1000, 0.1, 0.60])
+    reach_set = np.minimum(np.maximum(goal1_destination, goal2_escape), np.minimum(obs1_defend, obs2_defend))
+    return agents_1v1, grids, [reach_set, avoid_set]
+
+
+cases = [(name, problem, grid_size, accuracy)
+         for name, problem, grid_size in [("1vs0", problem_1vs0, 100), ("1vs1", problem_1vs1, 20)]
+         for accuracy in ["low", "medium"]]
+
+
+def reference_path(name, grid_size, accuracy):
+    return os.path.join(REFERENCE_DIR, f"heterocl_{name}_g{grid_size}_{accuracy}.npy")
+
+
+def solve(problem, grid_size, accuracy, backend):
+    agents, grids, multiple_value = problem(grid_size)
+    start_time = time.time()
+    value = HJSolver(agents, grids, multiple_value, tau, compMethods, po, accuracy=accuracy, backend=backend)
+    return np.asarray(value), time.time() - start_time
+
+
+def record():
+    os.makedirs(REFERENCE_DIR, exist_ok=True)
+    for name, problem, grid_size, accuracy in cases:
+        value, _ = solve(problem, grid_size, accuracy, "heterocl")
+        np.save(reference_path(name, grid_size, accuracy), value.astype(np.float32))
+        print("Saved", reference_path(name, grid_size, accuracy))
+
+
+def check():
+    failed = False
+    print(f"{'game':<6}{'grid':>6}{'accuracy':>10}{'numpy (s)':>12}{'max |diff|':>13}")
+    for name, problem, grid_size, accuracy in cases:
+        path = reference_path(name, grid_size, accuracy)
+        if not os.path.exists(path):
+            print(f"{name:<6}{grid_size:>6}{accuracy:>10}  no HeteroCL reference {path}, run --record with HeteroCL")
+            failed = True
+            continue
+        value, elapsed = solve(problem, grid_size, accuracy, "numpy")
+        max_diff = np.max(np.abs(value - np.load(path)))
+        failed |= max_diff > HETEROCL_TOLERANCE
+        print(f"{name:<6}{grid_size:>6}{accuracy:>10}{elapsed:>12.3f}{max_diff:>13.2e}")
+    return failed
+
+
+def benchmark():
+    failed = False
+    print(f"{'game':<6}{'grid':>6}{'accuracy':>10}{'heterocl (s)':>15}{'numpy (s)':>12}{'max |diff|':>13}")
+    for name, problem, grid_size, accuracy in cases:
+        if heterocl is None:
+            # Nothing to compare against, still time the numpy backend
+            _, t_np = solve(problem, grid_size, accuracy, "numpy")
+            print(f"{name:<6}{grid_size:>6}{accuracy:>10}{'n/a':>15}{t_np:>12.3f}{'n/a':>13}")
+            failed = True
+            continue
+        value_hcl, t_hcl = solve(problem, grid_size, accuracy, "heterocl")
+        value_np, t_np = solve(problem, grid_size, accuracy, "numpy")
+        max_diff = np.max(np.abs(value_hcl - value_np))
+        failed |= max_diff > HETEROCL_TOLERANCE
+        print(f"{name:<6}{grid_size:>6}{accuracy:>10}{t_hcl:>15.3f}{t_np:>12.3f}{max_diff:>13.2e}")
+    return failed
+
+
+if __name__ == "__main__":
+    if "--record" in sys.argv:
+        record()
+        sys.exit(0)
+    failed = check() if "--check" in sys.argv else benchmark()
+    if heterocl is None and "--check" not in sys.argv:
+        print("HeteroCL is not installed, the numpy backend was only timed, use --check with recorded references")
+        sys.exit(1)
+    if failed:
+        print(f"FAILED: the numpy backend does not match HeteroCL within {HETEROCL_TOLERANCE:g}")
+        sys.exit(1)
+    print(f"OK: the numpy backend matches HeteroCL within {HETEROCL_TOLERANCE:g}")
@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+from odp.Grid import Grid
+from odp.Shapes import *
+from MRAG.envs.AttackerDefender import AttackerDefender1vs1, AttackerDefender1vs2
+from odp.Plots import PlotOptions
+from odp.schedule import ScheduleOptions
+from odp.solver import HJSolver
+
+""" Benchmark of the HeteroCL loop schedules
+- 1. Build the 1vs1 (4D) and 1vs2 (6D) reach-avoid problems of MRAG/values_calculation
+- 2. Solve them with the default schedule (outermost axis parallel) and with the two leading axes fused
+- 3. Repeat for an increasing number of threads and report the kernel time and the speedup over 1 thread
+Every measurement runs in its own process because the thread pool size is fixed by the first kernel call.
+Run from the repository root: python -m MRAG.benchmarks.benchmark_schedule
+"""
+
+lookback_length = 0.1
+t_step = 0.025
+small_number = 1e-5
+tau = np.arange(start=0, stop=lookback_length + small_number, step=t_step)
+po = PlotOptions(do_plot=False, plot_type="set", plotDims=[0, 1], slicesCut=[])
+compMethods = {"TargetSetMode": "minVWithVTarget", "ObstacleSetMode": "maxVWithObstacle"}
+
+grid_sizes = {"1vs1": 30, "1vs2": 12}
+schedules = {"outer": dict(fuse_axes=1), "fuse2": dict(fuse_axes=2), "fuse2_split4": dict(fuse_axes=2, split_factor=4)}
+
+
+def problem_1vs1(grid_size):
+    grids = Grid(np.array([-1.0] * 4), np.array([1.0] * 4), 4, np.array([grid_size] * 4))
+    agents_1v1 = AttackerDefender1vs1(uMode="min", dMode="max")
+    obs1_attack = ShapeRectangle(grids, [-0.1, -1.0, -1000, -1000], [0.1, -0.3, 1000, 1000])
+    obs2_attack = ShapeRectangle(grids, [-0.1, 0.30, -1000, -1000], [0.1, 0.60, 1000, 1000])
+    obs3_capture = agents_1v1.capture_set(grids, 0.1, "capture")
+    avoid_set = np.minimum(obs3_capture, np.minimum(obs1_attack, obs2_attack))
+    goal1_destination = ShapeRectangle(grids, [0.6, 0.1, -1000, -1000], [0.8, 0.3, 1000, 1000])
+    goal2_escape = agents_1v1.capture_set(grids, 0.1, "escape")
+    obs1_defend = ShapeRectangle(grids, [-1000, -1000, -0.1, -1000], [1000, 1000, 0.1, -0.3])
+    obs2_defend = ShapeRectangle(grids, [-1000, -1000, -0.1, 0.30], [1000, 1000, 0.1, 0.60])
+    reach_set = np.minimum(np.maximum(goal1_destination, goal2_escape), np.minimum(obs1_defend, obs2_defend))
+    return agents_1v1, grids, [reach_set, avoid_set]
+
+
+def problem_1vs2(grid_size):
+    grids = Grid(np.array([-1.0] * 6), np.array([1.0] * 6), 6, np.array([grid_size] * 6))
+    agents_1v2 = AttackerDefender1vs2(uMode="max", dMode="min")
+    avoid1 = ShapeRectangle(grids, [0.6, 0.1, -1000, -1000, -1000, -1000], [0.8, 0.3, 1000, 1000, 1000, 1000])
+    avoid2 = np.maximum(agents_1v2.capture_set1(grids, 0.1, "escape"), agents_1v2.capture_set2(grids, 0.1, "escape"))
+    avoid3_obsD1 = np.minimum(ShapeRectangle(grids, [-1000, -1000, -0.1, -1.0, -1000, -1000], [1000, 1000, 0.1, -0.3, 1000, 1000]),
+                              ShapeRectangle(grids, [-1000, -1000, -0.1, 0.30, -1000, -1000], [1000, 1000, 0.1, 0.60, 1000, 1000]))
+    avoid4_obsD2 = np.minimum(ShapeRectangle(grids, [-1000, -1000, -1000, -1000, -0.1, -1.0], [1000, 1000, 1000, 1000, 0.1, -0.3]),
+                              ShapeRectangle(grids, [-1000, -1000, -1000, -1000, -0.1, 0.30], [1000, 1000, 1000, 1000, 0.1, 0.60]))
+    avoid_set = np.minimum(np.maximum(avoid1, avoid2), np.minimum(avoid3_obsD1, avoid4_obsD2))
+    reach1 = - avoid1
+    reach2 = np.minimum(np.maximum(reach1, agents_1v2.capture_set1(grids, 0.1, "capture")),
+                        np.maximum(reach1, agents_1v2.capture_set2(grids, 0.1, "capture")))
+    reach3_obsA = np.minimum(ShapeRectangle(grids, [-0.1, -1.0, -1000, -1000, -1000, -1000], [0.1, -0.3, 1000, 1000, 1000, 1000]),
+                             ShapeRectangle(grids, [-0.1, 0.30, -1000, -1000, -1000, -1000], [0.1, 0.60, 1000, 1000, 1000, 1000]))
+    reach_set = np.minimum(reach2, reach3_obsA)
+    return agents_1v2, grids, [reach_set, avoid_set]
+
+
+problems = {"1vs1": problem_1vs1, "1vs2": problem_1vs2}
+
+
+def run_worker(name, schedule_name, num_threads):
+    # One measurement, the executable comes from the on-disk cache after the first build
+    agents, grids, multiple_value = problems[name](grid_sizes[name])
+    schedule = ScheduleOptions(num_threads=num_threads, **schedules[schedule_name])
+    HJSolver(agents, grids, multiple_value, tau[:2], compMethods, po, schedule=schedule)
+    start_time = time.time()
+    HJSolver(agents, grids, multiple_value, tau, compMethods, po, schedule=schedule)
+    print("RESULT {:.6f}".format(time.time() - start_time))
+
+
+def measure(name, schedule_name, num_threads):
+    output = subprocess.run([sys.executable, "-m", "MRAG.benchmarks.benchmark_schedule", "--worker",
+                             name, schedule_name, str(num_threads)], capture_output=True, text=True).stdout
+    return float([line for line in output.splitlines() if line.startswith("RESULT")][-1].split()[1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--worker":
+        run_worker(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit(0)
+
+    thread_counts = [1]
+    while thread_counts[-1] * 2 <= os.cpu_count():
+        thread_counts.append(thread_counts[-1] * 2)
+
+    print(f"{'game':<6}{'grid':>6}{'schedule':>14}{'threads':>9}{'time (s)':>11}{'speedup':>9}")
+    for name in problems:
+        for schedule_name in schedules:
+            single_thread = None
+            for num_threads in thread_counts:
+                elapsed = measure(name, schedule_name, num_threads)
+                single_thread = single_thread or elapsed
+                print(f"{name:<6}{grid_sizes[name]:>6}{schedule_name:>14}{num_threads:>9}{elapsed:>11.3f}"
+                      f"{single_thread / elapsed:>9.2f}")
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from odp.checkpoint import load_checkpoint
+from odp.solver import HJSolver
+from MRAG.benchmarks.benchmark_numpy_backend import problem_1vs0, po, compMethods
+
+""" Check that an untilConvergent solve stops at convergence, with and without frozen cells
+- 1. Solve the 1vs0 (2D) reach-avoid problem of benchmark_numpy_backend with the numpy backend until convergence,
+     over a horizon much longer than it needs, on the full grid and with freeze_steps=N for a few N
+- 2. Read the step count and the time reached from the checkpoint HJSolver writes when it converges
+- 3. Report the max absolute difference and the sign mismatch with the full-grid value, two converged solves can
+     differ by about epsilon, and fail (exit code 1) when a solve runs to the end of the horizon
+Run from the repository root: python -m MRAG.benchmarks.check_freeze_convergence [grid size]
+"""
+
+freeze_steps = [3, 10]
+converge_tau = np.arange(start=0, stop=10.0 + 1e-5, step=0.025)
+
+
+def solve(grid_size, **options):
+    agents, grids, multiple_value = problem_1vs0(grid_size)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Only written when the solve converges, checkpoint_interval is longer than any run
+        checkpoint_path = os.path.join(tmp_dir, "converged.npz")
+        start_time = time.time()
+        value = HJSolver(agents, grids, multiple_value, converge_tau, compMethods, po, accuracy="medium",
+                         backend="numpy", untilConvergent=True, checkpoint_path=checkpoint_path,
+                         checkpoint_interval=np.inf, **options)
+        elapsed = time.time() - start_time
+        checkpoint = load_checkpoint(checkpoint_path, grids, converge_tau) if os.path.exists(checkpoint_path) else None
+    return np.asarray(value), elapsed, checkpoint
+
+
+def check(grid_size):
+    failed = False
+    solves = [("full grid", solve(grid_size))] + \
+             [(f"freeze_steps={steps}", solve(grid_size, freeze_steps=steps)) for steps in freeze_steps]
+    value_full = solves[0][1][0]
+    print(f"1vs0, {grid_size}^2 grid, numpy backend, horizon t in [0, {converge_tau[-1]:g}]")
+    print(f"{'solve':<16}{'wall-clock (s)':>16}{'converged':>11}{'steps':>7}{'t reached':>11}{'max |diff|':>13}"
+          f"{'sign mismatch':>15}")
+    for name, (value, elapsed, checkpoint) in solves:
+        max_diff = np.max(np.abs(value - value_full))
+        mismatch = np.mean((value > 0) != (value_full > 0))
+        if checkpoint is None:
+            failed = True
+            print(f"{name:<16}{elapsed:>16.3f}{'no':>11}{'-':>7}{converge_tau[-1]:>11.3f}{max_diff:>13.2e}"
+                  f"{mismatch:>15.3%}")
+            continue
+        print(f"{name:<16}{elapsed:>16.3f}{'yes':>11}{checkpoint['iteration']:>7}{checkpoint['tNow']:>11.3f}"
+              f"{max_diff:>13.2e}{mismatch:>15.3%}")
+    return failed
+
+
+if __name__ == "__main__":
+    if check(int(sys.argv[1]) if len(sys.argv) > 1 else 100):
+        print("FAILED: a solve ran to the end of the horizon without converging")
+        sys.exit(1)
+    print("OK: every solve stopped at convergence")
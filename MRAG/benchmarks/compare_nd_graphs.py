@@ -0,0 +1,100 @@
+import sys
+import time
+import numpy as np
+
+from odp.Grid import Grid
+from odp.Shapes import *
+from MRAG.envs.AttackerDefender import AttackerDefender2vs1
+from MRAG.benchmarks.benchmark_numpy_backend import problem_1vs1, tau, po, compMethods, HETEROCL_TOLERANCE
+from odp.solver import HJSolver, TTRSolver
+
+try:
+    import heterocl
+    from odp.computeGraphs import graph_4D, graph_6D, graph_ND
+    from odp.computeGraphs.MRAG_6D import graph_6D as MRAG_graph_6D
+    from odp.TimeToReach import TTR_4D, TTR_ND
+except ImportError:
+    heterocl = None
+
+""" Check of the dimension-generic graph_ND and TTR_ND executables against the per-dimension ones
+- 1. Solve the 1vs1 (4D) reach-avoid game with graph_4D and graph_ND
+- 2. Solve a 2vs1 (6D) reach-avoid game with graph_6D and graph_ND, and with MRAG_6D and graph_ND with the
+     constant MRAG_6D dissipation
+- 3. Compute the 1vs1 time-to-reach function with TTR_4D (8 sweeps) and TTR_ND (2^4 sweeps)
+- 4. Report the wall-clock time of each executable (build included) and the max absolute difference, and fail
+     (exit code 1) when it is above HETEROCL_TOLERANCE
+HJSolver and TTRSolver keep the per-dimension executables as the default until this check passes.
+Run from the repository root: python -m MRAG.benchmarks.compare_nd_graphs
+"""
+
+grid_size_4D = 20
+grid_size_6D = 8
+ttr_epsilon = 1e-3
+
+
+def problem_2vs1(grid_size):
+    grids = Grid(np.array([-1.0] * 6), np.array([1.0] * 6), 6, np.array([grid_size] * 6))
+    agents_2v1 = AttackerDefender2vs1(uMode="min", dMode="max")
+    obs1_a1 = ShapeRectangle(grids, [-0.1, -1.0, -1000, -1000, -1000, -1000], [0.1, -0.3, 1000, 1000, 1000, 1000])
+    obs2_a1 = ShapeRectangle(grids, [-0.1, 0.30, -1000, -1000, -1000, -1000], [0.1, 0.60, 1000, 1000, 1000, 1000])
+    capture_a1 = agents_2v1.capture_set1(grids, 0.1, "capture")
+    avoid_set = np.minimum(capture_a1, np.minimum(obs1_a1, obs2_a1))
+    reach_set = ShapeRectangle(grids, [0.6, 0.1, -1000, -1000, -1000, -1000], [0.8, 0.3, 1000, 1000, 1000, 1000])
+    return agents_2v1, grids, [reach_set, avoid_set]
+
+
+def solve_hj(problem, grid_size, **options):
+    agents, grids, multiple_value = problem(grid_size)
+    start_time = time.time()
+    value = HJSolver(agents, grids, multiple_value, tau, compMethods, po, accuracy="medium", **options)
+    return np.asarray(value), time.time() - start_time
+
+
+def solve_ttr(problem, grid_size, **options):
+    agents, grids, multiple_value = problem(grid_size)
+    start_time = time.time()
+    value = TTRSolver(agents, grids, np.array(multiple_value[0], dtype=np.float32), ttr_epsilon, po, **options)
+    return np.asarray(value), time.time() - start_time
+
+
+def comparisons():
+    # (name, per-dimension solve, graph_ND / TTR_ND solve)
+    # Dissipation of MRAG_6D: the attacker speed in dims 0-1 and the defender speed in dims 2-5
+    agents_2v1 = problem_2vs1(2)[0]
+    mrag_alpha = [agents_2v1.attackers.speed] * 2 + [agents_2v1.defenders.speed] * 4
+    return [
+        ("HJ 1vs1 graph_4D", lambda: solve_hj(problem_1vs1, grid_size_4D, graph=graph_4D),
+         lambda: solve_hj(problem_1vs1, grid_size_4D, graph=graph_ND)),
+        ("HJ 2vs1 graph_6D", lambda: solve_hj(problem_2vs1, grid_size_6D, graph=graph_6D),
+         lambda: solve_hj(problem_2vs1, grid_size_6D, graph=graph_ND)),
+        ("HJ 2vs1 MRAG_6D", lambda: solve_hj(problem_2vs1, grid_size_6D, graph=MRAG_graph_6D),
+         lambda: solve_hj(problem_2vs1, grid_size_6D, graph=graph_ND, constant_alpha=mrag_alpha)),
+        ("TTR 1vs1 TTR_4D", lambda: solve_ttr(problem_1vs1, grid_size_4D, graph=TTR_4D),
+         lambda: solve_ttr(problem_1vs1, grid_size_4D, graph=TTR_ND)),
+    ]
+
+
+def compare():
+    failed = False
+    results = []
+    for name, solve_per_dim, solve_nd in comparisons():
+        value_per_dim, t_per_dim = solve_per_dim()
+        value_nd, t_nd = solve_nd()
+        max_diff = np.max(np.abs(value_per_dim - value_nd))
+        failed |= max_diff > HETEROCL_TOLERANCE
+        results.append((name, t_per_dim, t_nd, max_diff))
+
+    print(f"{'executable':<20}{'per-dim (s)':>13}{'ND (s)':>10}{'max |diff|':>13}")
+    for name, t_per_dim, t_nd, max_diff in results:
+        print(f"{name:<20}{t_per_dim:>13.3f}{t_nd:>10.3f}{max_diff:>13.2e}")
+    return failed
+
+
+if __name__ == "__main__":
+    if heterocl is None:
+        print("HeteroCL is not installed, graph_ND and TTR_ND can only be compared with the toolchain")
+        sys.exit(1)
+    if compare():
+        print(f"FAILED: graph_ND / TTR_ND do not match the per-dimension executables within {HETEROCL_TOLERANCE:g}")
+        sys.exit(1)
+    print(f"OK: graph_ND and TTR_ND match the per-dimension executables within {HETEROCL_TOLERANCE:g}")
@@ -0,0 +1,24 @@
+import argparse
+import os
+import time
+
+from MRAG.escape_maps import ESCAPE_THRESHOLDS, build_escape_map
+from MRAG.utilities import VALUE_FILES_SIG
+
+""" Build tool of the bit-packed escape maps of the judges
+- 1. Read the 1 vs 1, 2 vs 1 and 1 vs 2 value functions of hj_preparations_sig memory-mapped
+- 2. Compare them with the escape thresholds of the judges (0, 0 and epsilon=0.035) and pack the results with np.packbits
+- 3. Store them next to the value functions as <name>_escape<threshold>.npz, loaded by load_escape_maps
+Run from the repository root: python -m MRAG.build_escape_maps [--epsilon 0.035]
+"""
+
+parser = argparse.ArgumentParser(description="Precompute the bit-packed escape maps of the judges")
+parser.add_argument("--epsilon", type=float, default=ESCAPE_THRESHOLDS["1vs2"], help="threshold of the 1 vs 2 game")
+args = parser.parse_args()
+
+thresholds = dict(ESCAPE_THRESHOLDS, **{"1vs2": args.epsilon})
+for name, threshold in thresholds.items():
+    start = time.time()
+    path = build_escape_map(VALUE_FILES_SIG[name], threshold)
+    ratio = os.path.getsize(path) / os.path.getsize(VALUE_FILES_SIG[name])
+    print(f"============= {path} built ({time.time() - start:.1f} seconds, {ratio:.1%} of the value function) =============")
@@ -0,0 +1,33 @@
+import argparse
+import time
+import numpy as np
+
+from MRAG.gradient_fields import build_gradient_field
+from MRAG.utilities import VALUE_FILES_SIG, VALUE_FILES_DUB, hj_preparations_sig, hj_preparations_dub
+
+""" Build tool of the precomputed gradient fields
+- 1. Load the value functions and grids of hj_preparations_sig and hj_preparations_dub
+- 2. Compute the gradient of each value function with MRAG.gradient_fields, periodic dimensions from the grid
+- 3. Store it next to the value function as <name>_grad.npy, opened by hj_preparations_sig(gradients=True)
+Run from the repository root: python -m MRAG.build_gradients [--dtype float16] [--dynamics sig dub]
+"""
+
+parser = argparse.ArgumentParser(description="Precompute the gradient fields of the HJ value functions")
+parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+parser.add_argument("--dynamics", nargs="+", choices=["sig", "dub"], default=["sig", "dub"])
+args = parser.parse_args()
+
+for dynamics in args.dynamics:
+    if dynamics == "sig":
+        value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1, grid1vs2 = hj_preparations_sig()
+        del value1vs0, value1vs1, value2vs1, value1vs2  # the build reads the files memory-mapped
+        files = [(VALUE_FILES_SIG[name], grid) for name, grid in [("1vs0", grid1vs0), ("1vs1", grid1vs1), ("2vs1", grid2vs1), ("1vs2", grid1vs2)]]
+    else:
+        value1vs0_dub, grid1vs0_dub, value1vs1_dub, grid1vs1_dub = hj_preparations_dub()
+        del value1vs0_dub, value1vs1_dub
+        files = [(VALUE_FILES_DUB["1vs0"], grid1vs0_dub), (VALUE_FILES_DUB["1vs1"], grid1vs1_dub)]
+
+    for value_path, grid in files:
+        start = time.time()
+        path = build_gradient_field(value_path, grid, list(grid.pDim), dtype=np.dtype(args.dtype))
+        print(f"============= {path} built ({time.time() - start:.1f} seconds) =============")
@@ -0,0 +1,35 @@
+import argparse
+import os
+import time
+import numpy as np
+
+from MRAG.policy_tables import build_policy_table
+from MRAG.utilities import VALUE_FILES_SIG, VALUE_FILES_DUB, hj_preparations_sig, hj_preparations_dub
+
+""" Build tool of the quantized optimal-control tables
+- 1. Load the value functions and grids of hj_preparations_sig and hj_preparations_dub
+- 2. Quantize the optimal heading (sig) or the sign of the optimal turn (dub) at every grid point with MRAG.policy_tables
+- 3. Store it next to the value function as <name>_policy.npy, opened by load_policy_tables
+Run from the repository root: python -m MRAG.build_policies [--dtype uint16] [--dynamics sig dub]
+"""
+
+parser = argparse.ArgumentParser(description="Precompute the quantized optimal-control tables of the HJ value functions")
+parser.add_argument("--dtype", choices=["uint8", "uint16"], default="uint8")
+parser.add_argument("--dynamics", nargs="+", choices=["sig", "dub"], default=["sig", "dub"])
+args = parser.parse_args()
+
+for dynamics in args.dynamics:
+    if dynamics == "sig":
+        value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1, grid1vs2 = hj_preparations_sig()
+        del value1vs0, value1vs1, value2vs1, value1vs2  # the build reads the files memory-mapped
+        files = [(name, VALUE_FILES_SIG[name], grid) for name, grid in [("1vs0", grid1vs0), ("1vs1", grid1vs1), ("2vs1", grid2vs1), ("1vs2", grid1vs2)]]
+    else:
+        value1vs0_dub, grid1vs0_dub, value1vs1_dub, grid1vs1_dub = hj_preparations_dub()
+        del value1vs0_dub, value1vs1_dub
+        files = [("1vs0_dub", VALUE_FILES_DUB["1vs0"], grid1vs0_dub), ("1vs1_dub", VALUE_FILES_DUB["1vs1"], grid1vs1_dub)]
+
+    for name, value_path, grid in files:
+        start = time.time()
+        path = build_policy_table(value_path, grid, name, list(grid.pDim), dtype=np.dtype(args.dtype))
+        ratio = os.path.getsize(path) / os.path.getsize(value_path)
+        print(f"============= {path} built ({time.time() - start:.1f} seconds, {ratio:.1%} of the value function) =============")
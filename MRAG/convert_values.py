@@ -0,0 +1,28 @@
+import argparse
+import time
+
+from odp.value_storage import save_value_artifact
+from MRAG.value_registry import VALUE_FILES, ValueRegistry, artifact_path
+
+""" Conversion of the bare .npy value functions to value artifacts
+- 1. Open each value function of MRAG.value_registry.VALUE_FILES with its grid
+- 2. Write it as a value artifact <name>.value (odp.value_storage) with the grid and the game in the header
+- 3. The registry (hj_preparations_sig, hj_preparations_dub) then reads the artifact instead of the .npy file
+Run from the repository root: python -m MRAG.convert_values [--dynamics sig dub] [--verify]
+"""
+
+parser = argparse.ArgumentParser(description="Convert the value functions to self-describing value artifacts")
+parser.add_argument("--dynamics", nargs="+", choices=["sig", "dub"], default=["sig", "dub"])
+parser.add_argument("--verify", action="store_true", help="check the content hash of the written artifacts")
+args = parser.parse_args()
+
+registry = ValueRegistry(verbose=False)
+for dynamics in args.dynamics:
+    for name, value_path in VALUE_FILES[dynamics].items():
+        start = time.time()
+        value, grid = registry.game(dynamics, name)
+        artifact = save_value_artifact(artifact_path(value_path), value, grid,
+                                       metadata={"dynamics": dynamics, "game": name, "source": value_path})
+        print(f"============= {artifact.path} written (Time: {time.time() - start:.1f} seconds) =============")
+        if args.verify:
+            assert artifact.verify(), f"{artifact.path} does not match its content hash"
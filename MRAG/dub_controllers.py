@@ -5,6 +5,9 @@ import numpy as np
 
 from MRAG.plots_dub import po2slice1vs0_dub, plot_value_1vs0_dub
 from odp.solver import HJSolver, computeSpatDerivArray
+from MRAG.gradient_fields import gradient_at
+from MRAG.policy_tables import policy_deriv
+from odp.reach_maps import reach_neg2pos
 
 
 def spa_deriv(slice_index, value_function, grid, periodic_dims=[]):
@@ -86,7 +89,7 @@ def find_sign_change1vs0_dub(grid1vs0, value1vs0, attacker):
     return np.where(checklist==1)[0], np.where(checklist==-1)[0]
 
 
-def attacker_control_1vs0_dub(game, grid1vs0, value1vs0, attacker, neg2pos):
+def attacker_control_1vs0_dub(game, grid1vs0, value1vs0, attacker, neg2pos, gradient=None, policy=None):
     """Return a list of 1-dimensional control inputs of one defender based on the value function
     
     Args:
@@ -95,7 +98,15 @@ def attacker_control_1vs0_dub(game, grid1vs0, value1vs0, attacker, neg2pos):
     value1vs0 (ndarray): 1vs1 HJ reachability value function with only final slice
     attacker (ndarray, (dim,)): the current state of one attacker
     neg2pos (list): the positions of the value function that change from negative to positive
+    gradient (ndarray): the precomputed gradient of value1vs0 with all time slices from MRAG.gradient_fields, optional
+    policy (ndarray): the policy table of value1vs0 with all time slices from MRAG.policy_tables, optional, used before gradient
     """
+    if policy is not None:  # quantized with MRAG.build_policies
+        spat_deriv_vector = policy_deriv(policy, "1vs0_dub", tuple(grid1vs0.get_index(attacker)) + (neg2pos[0],), 3)
+        return (game.optCtrl_1vs0(spat_deriv_vector))
+    if gradient is not None:  # precomputed with MRAG.build_gradients, the shift below only changes the signs at the border
+        spat_deriv_vector = gradient_at(gradient, tuple(grid1vs0.get_index(attacker)) + (neg2pos[0],))
+        return (game.optCtrl_1vs0(spat_deriv_vector))
     current_value = grid1vs0.get_value(value1vs0[..., 0], list(attacker))
     if current_value > 0:
         value1vs0 = value1vs0 - current_value
@@ -113,7 +124,8 @@ def attacker_control_1vs0_dub(game, grid1vs0, value1vs0, attacker, neg2pos):
     return (opt_u)
 
 
-def hj_contoller_attackers_dub(game, value1vs0_dub, grid1vs0_dub):
+def hj_contoller_attackers_dub(game, value1vs0_dub, grid1vs0_dub, gradient1vs0_dub=None, policy1vs0_dub=None,
+                               reach_map1vs0_dub=None):
     """This function computes the control for the attackers based on the control_attackers. 
        Assume dynamics are single integrator.
 
@@ -121,6 +133,9 @@ def hj_contoller_attackers_dub(game, value1vs0_dub, grid1vs0_dub):
         game (class): the corresponding ReachAvoidGameEnv instance
         value1vs0 (np.ndarray): the value function for 1 vs 0 game with all time slices
         grid1vs0 (Grid): the grid for 1 vs 0 game
+        gradient1vs0_dub (np.ndarray): the precomputed gradient of value1vs0_dub from hj_preparations_dub(gradients=True), optional
+        policy1vs0_dub (np.ndarray): the policy table of value1vs0_dub from load_policy_tables(VALUE_FILES_DUB, "_dub"), optional
+        reach_map1vs0_dub (np.ndarray): earliest_reach_map(value1vs0_dub) from odp.reach_maps, replaces find_sign_change1vs0_dub (first neg-to-pos slice only), optional
     
     Returns:
         control_attackers (ndarray): the control of attackers
@@ -131,9 +146,12 @@ def hj_contoller_attackers_dub(game, value1vs0_dub, grid1vs0_dub):
     control_attackers = np.zeros((num_attackers, 1))
     for i in range(num_attackers):
         if not current_attackers_status[i]:  # the attacker is free
-            neg2pos, pos2neg = find_sign_change1vs0_dub(grid1vs0_dub, value1vs0_dub, attackers[i])
+            if reach_map1vs0_dub is not None:
+                neg2pos = reach_neg2pos(reach_map1vs0_dub, grid1vs0_dub.get_index(attackers[i]))
+            else:
+                neg2pos, pos2neg = find_sign_change1vs0_dub(grid1vs0_dub, value1vs0_dub, attackers[i])
             if len(neg2pos):
-                control_attackers[i] = attacker_control_1vs0_dub(game, grid1vs0_dub, value1vs0_dub, attackers[i], neg2pos)
+                control_attackers[i] = attacker_control_1vs0_dub(game, grid1vs0_dub, value1vs0_dub, attackers[i], neg2pos, gradient1vs0_dub, policy1vs0_dub)
             else:
                 control_attackers[i] = (0.0)
         else:  # the attacker is captured or arrived
@@ -142,7 +160,7 @@ def hj_contoller_attackers_dub(game, value1vs0_dub, grid1vs0_dub):
     return control_attackers
 
 
-def hj_contoller_defenders_dub_1vs1(game, value1vs1_dub, grid1vs1_dub):
+def hj_contoller_defenders_dub_1vs1(game, value1vs1_dub, grid1vs1_dub, gradient1vs1_dub=None, policy1vs1_dub=None):
     """Return a tuple of 1-dimensional control inputs of one defender based on the value function
     
     Args:
@@ -150,6 +168,8 @@ def hj_contoller_defenders_dub_1vs1(game, value1vs1_dub, grid1vs1_dub):
         grid1v1 (class): the corresponding Grid instance
         value1v1 (ndarray): 1vs1 HJ reachability value function with only final slice
         agents_1v1 (class): the corresponding AttackerDefender instance
+        gradient1vs1_dub (np.ndarray): the precomputed gradient of value1vs1_dub from hj_preparations_dub(gradients=True), optional
+        policy1vs1_dub (np.ndarray): the policy table of value1vs1_dub from load_policy_tables(VALUE_FILES_DUB, "_dub"), optional
     
     Returns:
         opt_d (tuple): the optimal control of the defender
@@ -164,13 +184,13 @@ def hj_contoller_defenders_dub_1vs1(game, value1vs1_dub, grid1vs1_dub):
     d1x, d1y, d1o = defenders[0]
     jointstate_1vs1 = (a1x, a1y, a1o, d1x, d1y, d1o)
 
-    opt_d = defender_control_1vs1_dub(game, grid1vs1_dub, value1vs1_dub, jointstate_1vs1)
+    opt_d = defender_control_1vs1_dub(game, grid1vs1_dub, value1vs1_dub, jointstate_1vs1, gradient1vs1_dub, policy1vs1_dub)
     control_defenders[0] = (opt_d)
 
     return control_defenders
 
 
-def defender_control_1vs1_dub(game, grid1vs1_dub, value1vs1_dub, jointstate_1vs1):
+def defender_control_1vs1_dub(game, grid1vs1_dub, value1vs1_dub, jointstate_1vs1, gradient=None, policy=None):
     """Return a tuple of 2-dimensional control inputs of one defender based on the value function
     
     Args:
@@ -179,12 +199,19 @@ def defender_control_1vs1_dub(game, grid1vs1_dub, value1vs1_dub, jointstate_1vs1
         value1v1 (ndarray): 1vs1 HJ reachability value function with only final slice
         agents_1v1 (class): the corresponding AttackerDefender instance
         joint_states1v1 (tuple): the corresponding positions of (A1, D1)
+        gradient (ndarray): the precomputed gradient of the value function from MRAG.gradient_fields, optional
+        policy (ndarray): the policy table of the value function from MRAG.policy_tables, optional, used before gradient
     
     Returns:
         opt_d (tuple): the optimal control of the defender
     """
-    value1vs1s = value1vs1_dub[..., np.newaxis] 
-    spat_deriv_vector = spa_deriv(grid1vs1_dub.get_index(jointstate_1vs1), value1vs1s, grid1vs1_dub, [2,5])
+    if policy is not None:  # quantized with MRAG.build_policies
+        spat_deriv_vector = policy_deriv(policy, "1vs1_dub", grid1vs1_dub.get_index(jointstate_1vs1), 6)
+    elif gradient is not None:  # precomputed with MRAG.build_gradients
+        spat_deriv_vector = gradient_at(gradient, grid1vs1_dub.get_index(jointstate_1vs1))
+    else:
+        value1vs1s = value1vs1_dub[..., np.newaxis] 
+        spat_deriv_vector = spa_deriv(grid1vs1_dub.get_index(jointstate_1vs1), value1vs1s, grid1vs1_dub, [2,5])
     opt_d = game.optDistb_1vs1(spat_deriv_vector) 
 
     return (opt_d)
@@ -1,5 +1,4 @@
 import numpy as np
-import heterocl as hcl
 
 from MRAG.dynamics.BaseDynamics import BaseDynamics
 
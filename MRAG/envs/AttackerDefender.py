@@ -3,12 +3,33 @@
 '''
 
 import numpy as np
-import heterocl as hcl
+try:
+    import heterocl as hcl
+except ImportError:
+    # Only the HeteroCL graph methods need it, the *_numpy dynamics run without the toolchain
+    hcl = None
 
 from MRAG.envs.BaseGame import Dynamics
 from MRAG.envs.ReachAvoidGame import ReachAvoidGameEnv
 
 
+def unit_direction_numpy(deriv1, deriv2):
+    """Normalizes the planar gradient (deriv1, deriv2) elementwise, zero where the gradient vanishes.
+
+    Args:
+        deriv1 (np.ndarray or float): spatial derivative along the first axis
+        deriv2 (np.ndarray or float): spatial derivative along the second axis
+
+    Returns:
+        tuple: the normalized (deriv1, deriv2)
+    """
+    deriv1 = np.asarray(deriv1, dtype=float)
+    deriv2 = np.asarray(deriv2, dtype=float)
+    length = np.sqrt(deriv1 * deriv1 + deriv2 * deriv2)
+    safe_length = np.where(length == 0, 1.0, length)
+    return np.where(length == 0, 0.0, deriv1 / safe_length), np.where(length == 0, 0.0, deriv2 / safe_length)
+
+
 class AttackerDefender1vs0(ReachAvoidGameEnv):
     """1 vs. 0 reach-avoid game environment."""
 
@@ -108,6 +129,24 @@ class AttackerDefender1vs0(ReachAvoidGameEnv):
         return d1[0], d2[0]
 
 
+    def dynamics_numpy(self, t, state, uOpt, dOpt):
+        """Vectorized dynamics used by the numpy backend of HJSolver."""
+        return self.attackers.speed * uOpt[0], self.attackers.speed * uOpt[1]
+
+
+    def opt_ctrl_numpy(self, t, state, spat_deriv):
+        """Vectorized opt_ctrl used by the numpy backend of HJSolver."""
+        opt_a1, opt_a2 = unit_direction_numpy(spat_deriv[0], spat_deriv[1])
+        if self.uMode == "min":
+            return -opt_a1, -opt_a2
+        return opt_a1, opt_a2
+
+
+    def opt_dstb_numpy(self, t, state, spat_deriv):
+        """Vectorized opt_dstb used by the numpy backend of HJSolver."""
+        return 0.0, 0.0
+
+
     def optCtrl_1vs0(self, spat_deriv):
         """Computes the optimal control for the attacker in a 1 vs. 0 game.
         
@@ -276,6 +315,27 @@ class AttackerDefender1vs1(ReachAvoidGameEnv):
         return d1[0], d2[0], d3[0], d4[0]
 
 
+    def dynamics_numpy(self, t, state, uOpt, dOpt):
+        """Vectorized dynamics used by the numpy backend of HJSolver."""
+        return (self.attackers.speed * uOpt[0], self.attackers.speed * uOpt[1],
+                self.defenders.speed * dOpt[0], self.defenders.speed * dOpt[1])
+
+
+    def opt_ctrl_numpy(self, t, state, spat_deriv):
+        """Vectorized opt_ctrl used by the numpy backend of HJSolver."""
+        opt_a1, opt_a2 = unit_direction_numpy(spat_deriv[0], spat_deriv[1])
+        if self.uMode == "min":
+            return -opt_a1, -opt_a2, 0.0, 0.0
+        return opt_a1, opt_a2, 0.0, 0.0
+
+
+    def opt_dstb_numpy(self, t, state, spat_deriv):
+        """Vectorized opt_dstb used by the numpy backend of HJSolver."""
+        # Same for both dMode as in opt_dstb
+        d1, d2 = unit_direction_numpy(spat_deriv[2], spat_deriv[3])
+        return d1, d2, 0.0, 0.0
+
+
     def optCtrl_1vs1(self, spat_deriv):
         """
         :param spat_deriv: tuple of spatial derivative in all dimensions
@@ -487,6 +547,30 @@ class AttackerDefender2vs1(ReachAvoidGameEnv):
         return d1[0], d2[0], d3[0], d4[0]
 
 
+    def dynamics_numpy(self, t, state, uOpt, dOpt):
+        """Vectorized dynamics used by the numpy backend of HJSolver."""
+        return (self.attackers.speed * uOpt[0], self.attackers.speed * uOpt[1],
+                self.attackers.speed * uOpt[2], self.attackers.speed * uOpt[3],
+                self.defenders.speed * dOpt[0], self.defenders.speed * dOpt[1])
+
+
+    def opt_ctrl_numpy(self, t, state, spat_deriv):
+        """Vectorized opt_ctrl used by the numpy backend of HJSolver."""
+        opt_a1, opt_a2 = unit_direction_numpy(spat_deriv[0], spat_deriv[1])
+        opt_a3, opt_a4 = unit_direction_numpy(spat_deriv[2], spat_deriv[3])
+        if self.uMode == "min":
+            return -opt_a1, -opt_a2, -opt_a3, -opt_a4
+        return opt_a1, opt_a2, opt_a3, opt_a4
+
+
+    def opt_dstb_numpy(self, t, state, spat_deriv):
+        """Vectorized opt_dstb used by the numpy backend of HJSolver."""
+        d1, d2 = unit_direction_numpy(spat_deriv[4], spat_deriv[5])
+        if self.dMode == "max":
+            return d1, d2, 0.0, 0.0
+        return -d1, -d2, 0.0, 0.0
+
+
     def optCtrl_2vs1(self, spat_deriv):
         """
         :param spat_deriv: tuple of spatial derivative in all dimensions
@@ -723,6 +807,30 @@ class AttackerDefender1vs2(ReachAvoidGameEnv):
         return d1[0], d2[0], d3[0], d4[0]
 
 
+    def dynamics_numpy(self, t, state, uOpt, dOpt):
+        """Vectorized dynamics used by the numpy backend of HJSolver."""
+        return (self.attackers.speed * uOpt[0], self.attackers.speed * uOpt[1],
+                self.defenders.speed * dOpt[0], self.defenders.speed * dOpt[1],
+                self.defenders.speed * dOpt[2], self.defenders.speed * dOpt[3])
+
+
+    def opt_ctrl_numpy(self, t, state, spat_deriv):
+        """Vectorized opt_ctrl used by the numpy backend of HJSolver."""
+        opt_a1, opt_a2 = unit_direction_numpy(spat_deriv[0], spat_deriv[1])
+        if self.uMode == "min":
+            return -opt_a1, -opt_a2, 0.0, 0.0
+        return opt_a1, opt_a2, 0.0, 0.0
+
+
+    def opt_dstb_numpy(self, t, state, spat_deriv):
+        """Vectorized opt_dstb used by the numpy backend of HJSolver."""
+        d1, d2 = unit_direction_numpy(spat_deriv[2], spat_deriv[3])
+        d3, d4 = unit_direction_numpy(spat_deriv[4], spat_deriv[5])
+        if self.dMode == "max":
+            return d1, d2, d3, d4
+        return -d1, -d2, -d3, -d4
+
+
     def optCtrl_1vs2(self, spat_deriv):
         """
         :param spat_deriv: tuple of spatial derivative in all dimensions
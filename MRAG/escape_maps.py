@@ -0,0 +1,93 @@
+'''Bit-packed escape maps for the judges.
+
+The judges only compare the value of a joint state with a threshold: the attacker escapes if value <= 0 for the 1 vs 1
+and 2 vs 1 games and if value <= epsilon for the 1 vs 2 game (check_1vs1, check_2vs1, check_1vs2). build_escape_map
+stores that comparison for every grid point as one bit, packed 8 per byte along the last axis with np.packbits,
+next to the value function as <name>_escape<threshold>.npz with the shape of the value function. That is 32 times
+smaller than the float32 value function.
+An EscapeMap can be passed to judges, IncrementalJudges and escape_1vs1/escape_2vs1/escape_1vs2 in place of
+the value function, the full values stay on disk for the controllers.
+
+Build all of them with: python -m MRAG.build_escape_maps
+'''
+import os
+import numpy as np
+
+
+# Escape threshold of the judges of each game
+ESCAPE_THRESHOLDS = {"1vs1": 0.0, "2vs1": 0.0, "1vs2": 0.035}
+
+
+class EscapeMap:
+    """ Packed "attacker escapes" bits of a value function, value <= threshold.
+    shape is the shape of the value function, so that po2indices(states, escape_map.shape[0]) works as for the values.
+    """
+    def __init__(self, packed, size, threshold):
+        """
+        Args:
+            packed (np.ndarray): the bits packed along the last axis with bitorder="little"
+            size (int): the number of grid points of the last axis of the value function
+            threshold (float): the threshold the values were compared with
+        """
+        self.packed = packed
+        self.threshold = threshold
+        self.shape = packed.shape[:-1] + (size,)
+        self.nbytes = packed.nbytes
+
+    def escaped(self, *indices):
+        """ Whether the attacker escapes at the grid points of the (broadcast) integer index arrays, one per dimension """
+        last = np.asarray(indices[-1])
+        packed = self.packed[tuple(indices[:-1]) + (last >> 3,)]
+        return ((packed >> (last & 7)) & 1).astype(bool)
+
+
+def escape_map(value, threshold=0.0):
+    """ Computes the escape map of a value function, one slab along the first axis at a time.
+
+    Args:
+        value (np.ndarray): the value function, e.g. a memmap
+        threshold (float): the attacker escapes where value <= threshold
+
+    Returns:
+        escape_map (EscapeMap): the packed map
+    """
+    packed = np.empty(value.shape[:-1] + ((value.shape[-1] + 7) // 8,), dtype=np.uint8)
+    for start in range(value.shape[0]):
+        packed[start] = np.packbits(~(np.asarray(value[start]) > threshold), axis=-1, bitorder="little")
+    return EscapeMap(packed, value.shape[-1], threshold)
+
+
+def escape_map_path(value_path, threshold):
+    """ Path of the escape map stored next to the value function file """
+    return os.path.splitext(value_path)[0] + f"_escape{threshold:g}.npz"
+
+
+def build_escape_map(value_path, threshold=0.0):
+    """ Computes the escape map of the value function stored in value_path and writes it to escape_map_path.
+
+    Returns:
+        path (str): the path of the escape map
+    """
+    path = escape_map_path(value_path, threshold)
+    packed_map = escape_map(np.load(value_path, mmap_mode="r"), threshold)
+    # packbits pads the last axis to whole bytes, its size cannot be read back from the packed array
+    np.savez(path, packed=packed_map.packed, shape=np.array(packed_map.shape))
+    return path
+
+
+def load_escape_map(value_path, threshold=0.0):
+    """ Loads the escape map of the value function stored in value_path into memory, None if it has not been built. """
+    path = escape_map_path(value_path, threshold)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return EscapeMap(data["packed"], int(data["shape"][-1]), threshold)
+
+
+def load_escape_maps(value_files, thresholds=ESCAPE_THRESHOLDS):
+    """ Loads the escape maps of the judges (e.g. value_files=VALUE_FILES_SIG) into memory.
+
+    Returns:
+        escape_maps (dict): the EscapeMap of "1vs1", "2vs1" and "1vs2", None if it has not been built
+    """
+    return {name: load_escape_map(value_files[name], threshold) for name, threshold in thresholds.items()}
@@ -0,0 +1,136 @@
+'''Event-driven, multi-rate game loop for the reach-avoid game with sig dynamics.
+
+'''
+import time
+import numpy as np
+
+from MRAG.assignment import combinatorial_solver
+from MRAG.utilities import IncrementalJudges, po2indices
+from MRAG.sig_controllers import hj_controller_attackers_1vs0, hj_controller_defenders
+from odp.reach_maps import earliest_reach_map
+
+
+class GameRunner:
+    """ Runs a ReachAvoidGameEnv with the HJ controllers at its control frequency, the defender assignment is only
+    solved again when one of these events fires, and reused otherwise:
+        "initial": the first step
+        "status":  an attacker has been captured or has arrived
+        "escape":  the escape sets of the 1 vs. 1 or 2 vs. 1 games changed
+        "margin":  the value of an assigned pair or triple crossed value_margin
+        "rate":    1 / assign_freq seconds passed since the last solve
+    By default (assign_freq=None) the assignment is solved at every step, like the scripts in MRAG/games. The
+    multi-rate mode is opt-in: on coarse SIG values it lowered the defenders' win rate from 0.35 to 0.20 (6 vs 2) and
+    from 0.40 to 0.20 (8 vs 4) in MRAG/games/game_multirate_sig.py, and stays off until that is explained.
+
+    The judges still run at every step, the "escape" event needs their results. IncrementalJudges only gathers the
+    value functions again for the agents whose grid index changed, on most steps it only converts the positions to
+    grid indices. That still costs a few times more than solving with combinatorial_solver at every step, so
+    assign_freq mainly pays off with the slower MIP solvers. run reports the time spent in the judges and in the
+    assignment solver.
+
+    Usage:
+        game = ReachAvoidGameEnv(...)
+        runner = GameRunner(game, value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1)
+        log = runner.run(total_steps)
+        # multi-rate, opt-in
+        runner = GameRunner(game, value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1, assign_freq=10)
+    """
+    def __init__(self, game, value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1,
+                 assign_freq=None, value_margin=None, assignment_solver=combinatorial_solver, gradients=None,
+                 policies=None, escape_maps=None):
+        """
+        Args:
+            game (ReachAvoidGameEnv): the game to run
+            value1vs0, value1vs1, value2vs1, value1vs2 (np.ndarray): the value functions from hj_preparations_sig
+            grid1vs0, grid1vs1, grid2vs1 (Grid): the grids of the value functions
+            assign_freq (float): the frequency of the periodic solves in Hz, opt-in. Defaults to None, solve at every step
+            value_margin (float): the margin of the "margin" event, None to disable it
+            assignment_solver (function): solver with the arguments of mip_solver
+            gradients (dict): the precomputed gradients from hj_preparations_sig(gradients=True), optional
+            policies (dict): the policy tables from load_policy_tables(VALUE_FILES_SIG), optional
+            escape_maps (dict): the escape maps from load_escape_maps(VALUE_FILES_SIG) used by the judges, optional
+        """
+        self.game = game
+        self.value1vs0, self.value1vs1, self.value2vs1, self.value1vs2 = value1vs0, value1vs1, value2vs1, value1vs2
+        self.grid1vs0, self.grid1vs1, self.grid2vs1 = grid1vs0, grid1vs1, grid2vs1
+        self.period = 1 if assign_freq is None else max(1, int(round(game.CTRL_FREQ / assign_freq)))
+        self.value_margin = value_margin
+        self.assignment_solver = assignment_solver
+        self.gradients = gradients
+        self.reach_map = earliest_reach_map(value1vs0)  # the attackers' neg2pos lookups, computed once
+        self.policies = policies
+        escape_maps = escape_maps or {}
+        self.judge = IncrementalJudges(*[value if escape_maps.get(name) is None else escape_maps[name]
+                                         for name, value in [("1vs1", value1vs1), ("2vs1", value2vs1), ("1vs2", value1vs2)]])
+
+    def _assigned_values(self, assignments):
+        # values of the pairs and triples of the current assignment, the defender captures while they are > 0
+        attackers, defenders = self.game.attackers.state, self.game.defenders.state
+        a1, d1 = po2indices(attackers, self.value1vs1.shape[0]), po2indices(defenders, self.value1vs1.shape[0])
+        a2, d2 = po2indices(attackers, self.value2vs1.shape[0]), po2indices(defenders, self.value2vs1.shape[0])
+        values = []
+        for j, assigned in enumerate(assignments):
+            if len(assigned) == 1:
+                values.append(self.value1vs1[tuple(a1[assigned[0]]) + tuple(d1[j])])
+            elif len(assigned) == 2:
+                values.append(self.value2vs1[tuple(a2[assigned[0]]) + tuple(a2[assigned[1]]) + tuple(d2[j])])
+        return np.array(values)
+
+    def _margin_flags(self, assignments):
+        if self.value_margin is None:
+            return None
+        return tuple((self._assigned_values(assignments) <= self.value_margin).tolist())
+
+    def run(self, total_steps):
+        """ Runs the game until it terminates, is truncated, or total_steps steps.
+
+        Returns:
+            log (dict): the number of steps and of solves, the number of solves per event, the seconds spent in the
+                judges and in the assignment solver, and the final status
+        """
+        game = self.game
+        reasons = {"initial": 0, "status": 0, "escape": 0, "margin": 0, "rate": 0}
+        assignments, last_solve, last_status, last_escaped, last_flags = None, 0, None, None, None
+        judge_time, solve_time = 0.0, 0.0
+        step = 0
+        for step in range(total_steps):
+            status = np.array(game.attackers_status[-1])
+            start_time = time.perf_counter()
+            EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2 = self.judge(game.attackers.state, game.defenders.state, status)
+            judge_time += time.perf_counter() - start_time
+            escaped = (EscapedAttacker1vs1, EscapedPairs2vs1)
+
+            if assignments is None:
+                reason = "initial"
+            elif not np.array_equal(status, last_status):
+                reason = "status"
+            elif escaped != last_escaped:
+                reason = "escape"
+            elif self.value_margin is not None and self._margin_flags(assignments) != last_flags:
+                reason = "margin"
+            elif step - last_solve >= self.period:
+                reason = "rate"
+            else:
+                reason = None
+
+            if reason is not None:
+                reasons[reason] += 1
+                start_time = time.perf_counter()
+                assignments = self.assignment_solver(game.NUM_DEFENDERS, status, EscapedAttacker1vs1, EscapedPairs2vs1)
+                solve_time += time.perf_counter() - start_time
+                last_solve, last_status, last_escaped = step, status, escaped
+                last_flags = self._margin_flags(assignments)
+
+            control_defenders = hj_controller_defenders(game, assignments, self.value1vs1, self.value2vs1, self.grid1vs1, self.grid2vs1, self.gradients, self.policies)
+            control_attackers = hj_controller_attackers_1vs0(game, self.value1vs0, self.grid1vs0, self.gradients, self.policies,
+                                                             self.reach_map)
+            obs, reward, terminated, truncated, info = game.step(np.vstack((control_attackers, control_defenders)))
+            if terminated or truncated:
+                break
+
+        final_status = np.array(game.attackers_status[-1])
+        num_solves = sum(reasons.values())
+        return {"steps": step + 1, "solves": num_solves, "solve_rate": num_solves / (step + 1), "reasons": reasons,
+                "judge_seconds": judge_time, "solve_seconds": solve_time,
+                "arrived": int(np.sum(final_status == 1)), "captured": int(np.sum(final_status == -1)),
+                "defenders_win": bool(np.all(final_status != 1))}
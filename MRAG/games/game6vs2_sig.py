@@ -2,6 +2,7 @@ import numpy as np
 
 from MRAG.envs.ReachAvoidGame import ReachAvoidGameEnv
 from MRAG.solvers import mip_solver, extend_mip_solver
+from MRAG.assignment import combinatorial_solver
 from MRAG.utilities import *
 from MRAG.sig_controllers import hj_controller_attackers_1vs0, hj_controller_defenders
 from MRAG.plots import animation
@@ -28,7 +29,7 @@ game = ReachAvoidGameEnv(num_attackers=num_attackers, num_defenders=num_defender
 print(f"================ The game starts now. ================")
 for step in range(total_steps):
     EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2 = judges(game.attackers.state, game.defenders.state, game.attackers_status[-1], value1vs1, value2vs1, value1vs2)
-    assignments = mip_solver(num_defenders, game.attackers_status[-1],  EscapedAttacker1vs1, EscapedPairs2vs1)
+    assignments = combinatorial_solver(num_defenders, game.attackers_status[-1],  EscapedAttacker1vs1, EscapedPairs2vs1)
     control_defenders = hj_controller_defenders(game, assignments, value1vs1, value2vs1, grid1vs1, grid2vs1)
     control_attackers = hj_controller_attackers_1vs0(game, value1vs0, grid1vs0)
     obs, reward, terminated, truncated, info = game.step(np.vstack((control_attackers, control_defenders)))
@@ -0,0 +1,61 @@
+import numpy as np
+
+from MRAG.envs.ReachAvoidGame import ReachAvoidGameEnv
+from MRAG.game_runner import GameRunner
+from MRAG.utilities import *
+
+
+""" Multi-rate assignment against the every-step baseline
+- 1. Sample random initial positions for the 6 vs 2 and 8 vs 4 games
+- 2. Play each game twice: assignment solved at every step, and event-driven with a periodic solve at assign_freq
+- 3. Report how often the assignment was solved, the win rate of the defenders, and the milliseconds per step spent in
+     the judges and in the assignment solver in both cases
+"""
+
+#### Game Settings ####
+value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1, grid1vs2  = hj_preparations_sig()
+T = 10.0  # time for the game
+ctrl_freq = 200  # control frequency
+total_steps = int(T * ctrl_freq)
+assign_freq = 10  # frequency of the periodic solves in Hz
+value_margin = 0.05
+num_games = 20
+teams = [(6, 2), (8, 4)]
+
+
+def sample_positions(rng, num_agents):
+    # uniform in the map, outside of the destination [0.6, 0.8] x [0.1, 0.3]
+    positions = []
+    while len(positions) < num_agents:
+        x, y = rng.uniform(-0.9, 0.9, size=2)
+        if not (0.5 <= x <= 0.9 and 0.0 <= y <= 0.4):
+            positions.append((x, y))
+    return np.array(positions)
+
+
+rng = np.random.default_rng(0)
+print(f"{'team':<6}{'mode':>12}{'games':>7}{'steps':>9}{'solves':>9}{'solve rate':>12}{'defenders win':>15}"
+      f"{'judge (ms/step)':>17}{'solver (ms/step)':>18}")
+for num_attackers, num_defenders in teams:
+    initials = [(sample_positions(rng, num_attackers), sample_positions(rng, num_defenders)) for _ in range(num_games)]
+    for mode, freq in [("every step", None), ("multi-rate", assign_freq)]:
+        steps, solves, wins, judge_seconds, solve_seconds = 0, 0, 0, 0.0, 0.0
+        reasons = {}
+        for initial_attacker, initial_defender in initials:
+            game = ReachAvoidGameEnv(num_attackers=num_attackers, num_defenders=num_defenders,
+                                     initial_attacker=initial_attacker, initial_defender=initial_defender,
+                                     ctrl_freq=ctrl_freq)
+            runner = GameRunner(game, value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1,
+                                assign_freq=freq, value_margin=value_margin if freq else None)
+            log = runner.run(total_steps)
+            steps += log["steps"]
+            solves += log["solves"]
+            wins += log["defenders_win"]
+            judge_seconds += log["judge_seconds"]
+            solve_seconds += log["solve_seconds"]
+            for reason, count in log["reasons"].items():
+                reasons[reason] = reasons.get(reason, 0) + count
+        print(f"{num_attackers}vs{num_defenders:<3}{mode:>12}{num_games:>7}{steps:>9}{solves:>9}{solves / steps:>12.3f}"
+              f"{wins / num_games:>15.2f}{judge_seconds / steps * 1000:>17.3f}{solve_seconds / steps * 1000:>18.3f}")
+        if freq:
+            print(f"      solves per event: {reasons}")
@@ -0,0 +1,81 @@
+'''Precomputed spatial gradients of the HJ value functions for the controllers.
+
+The controllers only need the gradient of a value function at the grid point of the agents. build_gradient_field
+computes it once for every grid point, with the same finite differences as spa_deriv in sig_controllers and
+dub_controllers, and stores it next to the value function as <name>_grad.npy, shape value.shape + (grid.dims,).
+The file is opened memory-mapped, the gradient at an agent's index is then a single gather.
+
+Build all of them with: python -m MRAG.build_gradients
+'''
+import os
+import numpy as np
+
+
+def _derivative(V, dim, dx, periodic):
+    # average of the left and right differences along dim, the borders are extrapolated like spa_deriv
+    if periodic:
+        return (np.roll(V, -1, axis=dim) - np.roll(V, 1, axis=dim)) / (2 * dx)
+    first, second = np.take(V, [0], axis=dim), np.take(V, [1], axis=dim)
+    last, before_last = np.take(V, [-1], axis=dim), np.take(V, [-2], axis=dim)
+    left = np.concatenate((-np.abs(second - first) * np.sign(first), np.diff(V, axis=dim)), axis=dim) / dx
+    right = np.concatenate((np.diff(V, axis=dim), np.abs(last - before_last) * np.sign(last)), axis=dim) / dx
+    return (left + right) / 2
+
+
+def gradient_field(value, grid, periodic_dims=(), dtype=np.float32, out=None):
+    """ Spatial gradient of a value function at every grid point.
+
+    Args:
+        value (np.ndarray): value function on grid, extra trailing axes (time slices) are allowed
+        grid (Grid): the grid of the value function
+        periodic_dims (list): the periodic dimensions, as in spa_deriv
+        dtype (np.dtype): float32 or float16
+        out (np.ndarray): optional output of shape value.shape + (grid.dims,), e.g. a memmap
+
+    Returns:
+        gradient (np.ndarray): gradient[..., dim] is the derivative along dim
+    """
+    if out is None:
+        out = np.empty(value.shape + (grid.dims,), dtype=dtype)
+    for dim in range(grid.dims):
+        # one slab at a time along another axis, so that large value functions never sit in memory as float32 twice
+        axis = 1 if dim == 0 else 0
+        for start in range(value.shape[axis]):
+            slab = [slice(None)] * value.ndim
+            slab[axis] = slice(start, start + 1)
+            V = np.asarray(value[tuple(slab)], dtype=np.float32)
+            out[tuple(slab) + (dim,)] = _derivative(V, dim, grid.dx[dim], dim in periodic_dims)
+    return out
+
+
+def gradient_path(value_path):
+    """ Path of the gradient file stored next to the value function file """
+    return os.path.splitext(value_path)[0] + "_grad.npy"
+
+
+def build_gradient_field(value_path, grid, periodic_dims=(), dtype=np.float32):
+    """ Computes the gradient of the value function stored in value_path and writes it to gradient_path(value_path).
+
+    Returns:
+        path (str): the path of the gradient file
+    """
+    value = np.load(value_path, mmap_mode="r")
+    path = gradient_path(value_path)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=value.shape + (grid.dims,))
+    gradient_field(value, grid, periodic_dims, dtype, out=out)
+    out.flush()
+    del out
+    return path
+
+
+def load_gradient_field(value_path):
+    """ Opens the gradient of the value function stored in value_path memory-mapped, None if it has not been built """
+    path = gradient_path(value_path)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode="r")
+
+
+def gradient_at(gradient, index):
+    """ Returns the gradient at a grid index as a list with one float per dimension, like spa_deriv """
+    return gradient[tuple(index)].astype(np.float64).tolist()
@@ -0,0 +1,156 @@
+'''Quantized optimal-control tables for the controllers.
+
+The optimal controls of the sig games only depend on the direction of two components of the value gradient
+(optDistb_1vs1, optDistb_2vs1, optDistb_1vs2, optCtrl_1vs0), those of the DubinCar games only on the sign of one
+component (optDistb_1vs1, optCtrl_1vs0 of DubinCars). build_policy_table stores, for every grid point:
+    "heading": the angle of the gradient direction quantized to a uint8 (255 headings) or uint16 (65535 headings),
+               the largest code stands for a zero gradient (zero control), shape value.shape + (number of agents,)
+    "sign":    whether the component is > 0, packed 8 per byte along the last axis with np.packbits
+next to the value function as <name>_policy.npy. policy_deriv turns an entry back into a spatial derivative with
+the stored direction or sign, the optDistb_* and optCtrl_* of the game then apply the mode (min/max) and the speed.
+
+Build all of them with: python -m MRAG.build_policies
+'''
+import os
+import numpy as np
+
+from MRAG.gradient_fields import _derivative
+
+
+# Kind of table and gradient components of each game, see optDistb_* and optCtrl_* of the environments
+POLICY_SPECS = {"1vs0": ("heading", [(0, 1)]),  # attacker, with all time slices
+                "1vs1": ("heading", [(2, 3)]),  # defender
+                "2vs1": ("heading", [(4, 5)]),  # defender
+                "1vs2": ("heading", [(2, 3), (4, 5)]),  # both defenders
+                "1vs0_dub": ("sign", [2]),  # attacker, with all time slices
+                "1vs1_dub": ("sign", [5])}  # defender
+
+_directions = {}
+
+
+def _levels(dtype):
+    # number of headings, the next code is the zero gradient
+    return int(np.iinfo(dtype).max)
+
+
+def quantize_heading(deriv_x, deriv_y, dtype=np.uint8):
+    """ Quantizes the direction of (deriv_x, deriv_y), a zero vector gets the largest code """
+    levels = _levels(dtype)
+    angle = np.arctan2(deriv_y, deriv_x)
+    codes = np.round(angle / (2 * np.pi) * levels).astype(np.int64) % levels
+    codes[(deriv_x == 0) & (deriv_y == 0)] = levels
+    return codes.astype(dtype)
+
+
+def heading_directions(dtype=np.uint8):
+    """ Unit vector of every code of quantize_heading, (levels + 1, 2), the last one is (0, 0) """
+    dtype = np.dtype(dtype)
+    if dtype not in _directions:
+        levels = _levels(dtype)
+        angles = 2 * np.pi * np.arange(levels) / levels
+        directions = np.zeros((levels + 1, 2))
+        directions[:levels, 0], directions[:levels, 1] = np.cos(angles), np.sin(angles)
+        _directions[dtype] = directions
+    return _directions[dtype]
+
+
+def policy_table(value, grid, name, periodic_dims=(), dtype=np.uint8):
+    """ Computes the table of one game, see POLICY_SPECS.
+
+    Args:
+        value (np.ndarray): value function on grid, extra trailing axes (time slices) are allowed
+        grid (Grid): the grid of the value function, its periodic dimensions are used for the derivatives
+        name (str): the game, a key of POLICY_SPECS
+        periodic_dims (list): the periodic dimensions, as in spa_deriv
+        dtype (np.dtype): uint8 or uint16 for heading tables, ignored for sign tables
+
+    Returns:
+        table (np.ndarray): the heading codes or the packed signs
+    """
+    kind, components = POLICY_SPECS[name]
+    used = {dim for pair in components for dim in np.atleast_1d(pair)}
+    # one slab at a time along an axis that is not differentiated (and not packed)
+    axis = [a for a in range(value.ndim) if a not in used and (kind == "heading" or a != value.ndim - 1)][0]
+    if kind == "heading":
+        table = np.empty(value.shape + (len(components),), dtype=dtype)
+    else:
+        table = np.empty(value.shape[:-1] + ((value.shape[-1] + 7) // 8,), dtype=np.uint8)
+
+    for start in range(value.shape[axis]):
+        slab = [slice(None)] * value.ndim
+        slab[axis] = slice(start, start + 1)
+        V = np.asarray(value[tuple(slab)], dtype=np.float32)
+        deriv = {dim: _derivative(V, dim, grid.dx[dim], dim in periodic_dims) for dim in used}
+        if kind == "heading":
+            for n, (dim_x, dim_y) in enumerate(components):
+                table[tuple(slab) + (n,)] = quantize_heading(deriv[dim_x], deriv[dim_y], dtype)
+        else:
+            table[tuple(slab)] = np.packbits(deriv[components[0]] > 0, axis=-1, bitorder="little")
+    return table
+
+
+def policy_path(value_path):
+    """ Path of the policy table stored next to the value function file """
+    return os.path.splitext(value_path)[0] + "_policy.npy"
+
+
+def build_policy_table(value_path, grid, name, periodic_dims=(), dtype=np.uint8):
+    """ Computes the table of the value function stored in value_path and writes it to policy_path(value_path).
+
+    Returns:
+        path (str): the path of the policy table
+    """
+    value = np.load(value_path, mmap_mode="r")
+    path = policy_path(value_path)
+    np.save(path, policy_table(value, grid, name, periodic_dims, dtype))
+    return path
+
+
+def load_policy_tables(value_files, suffix=""):
+    """ Opens the tables of the value functions in value_files (e.g. VALUE_FILES_SIG) memory-mapped.
+
+    Args:
+        value_files (dict): the value function file of each game
+        suffix (str): appended to the names of value_files to get the keys of POLICY_SPECS, "_dub" for VALUE_FILES_DUB
+
+    Returns:
+        policies (dict): the table of each game, None if it has not been built
+    """
+    policies = {}
+    for name, value_path in value_files.items():
+        path = policy_path(value_path)
+        policies[name + suffix] = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+    return policies
+
+
+def lookup_headings(table, index):
+    """ Unit vectors of the gradient directions stored at a grid index, (number of agents, 2), zero for a zero gradient """
+    return heading_directions(table.dtype)[np.asarray(table[tuple(index)])]
+
+
+def lookup_sign(table, index):
+    """ True if the gradient component stored at a grid index is > 0 """
+    index = tuple(index)
+    return bool((table[index[:-1] + (index[-1] // 8,)] >> (index[-1] % 8)) & 1)
+
+
+def policy_deriv(table, name, index, dims):
+    """ Spatial derivative with the direction (or sign) stored at a grid index, for the optDistb_* and optCtrl_* of the game.
+
+    Args:
+        table (np.ndarray): the table of the game from load_policy_tables
+        name (str): the game, a key of POLICY_SPECS
+        index (tuple): the grid index, followed by the time slice for the 1vs0 tables
+        dims (int): the number of dimensions of the game
+
+    Returns:
+        spat_deriv_vector (list): unit vectors (or 1.0 / 0.0 for the signs) in the components of POLICY_SPECS, 0 elsewhere
+    """
+    kind, components = POLICY_SPECS[name]
+    spat_deriv_vector = [0.0] * dims
+    if kind == "heading":
+        for (dim_x, dim_y), direction in zip(components, lookup_headings(table, index)):
+            spat_deriv_vector[dim_x], spat_deriv_vector[dim_y] = float(direction[0]), float(direction[1])
+    else:
+        spat_deriv_vector[components[0]] = 1.0 if lookup_sign(table, index) else 0.0
+    return spat_deriv_vector
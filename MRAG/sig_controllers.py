@@ -3,6 +3,10 @@
 '''
 import numpy as np
 
+from MRAG.gradient_fields import gradient_at
+from MRAG.policy_tables import policy_deriv
+from odp.reach_maps import reach_neg2pos
+
 
 def spa_deriv(slice_index, value_function, grid, periodic_dims=[]):
     """
@@ -53,7 +57,7 @@ def spa_deriv(slice_index, value_function, grid, periodic_dims=[]):
                 )
                 right_boundary = value_function[right_periodic_boundary_index]
             else:
-                right_boundary = value_function[slice_index] + np.abs(value_function[slice_index] - value_function[prev_index]) * np.sign([value_function[slice_index]])
+                right_boundary = value_function[slice_index] + np.abs(value_function[slice_index] - value_function[prev_index]) * np.sign(value_function[slice_index])
             left_deriv = (value_function[slice_index] - value_function[prev_index]) / grid.dx[dim]
             right_deriv = (right_boundary - value_function[slice_index]) / grid.dx[dim]
         else:
@@ -65,7 +69,7 @@ def spa_deriv(slice_index, value_function, grid, periodic_dims=[]):
     return spa_derivatives
 
 
-def defender_control_2vs1(game, grid2vs1, value2vs1, jointstate_2vs1):
+def defender_control_2vs1(game, grid2vs1, value2vs1, jointstate_2vs1, gradient=None, policy=None):
     """Return a tuple of 2-dimensional control inputs of one defender based on the value function
     
     Args:
@@ -74,18 +78,25 @@ def defender_control_2vs1(game, grid2vs1, value2vs1, jointstate_2vs1):
         value2vs1 (ndarray, (grid_size*dim, 1)): 1v1 HJ reachability value function with only final slice
         game (class instance): the corresponding ReachAvoidGameEnv instance
         jointstate_2vs1 (tuple): the corresponding positions of (A1, A2, D1)
+        gradient (ndarray): the precomputed gradient of the value function from MRAG.gradient_fields, optional
+        policy (ndarray): the policy table of the value function from MRAG.policy_tables, optional, used before gradient
 
     Returns:
         opt_d1, opt_d2 (tuple): the optimal control of the defender
     """
-    value2vs1s = value2vs1[..., np.newaxis] 
-    spat_deriv_vector = spa_deriv(grid2vs1.get_index(jointstate_2vs1), value2vs1s, grid2vs1)
+    if policy is not None:  # quantized with MRAG.build_policies
+        spat_deriv_vector = policy_deriv(policy, "2vs1", grid2vs1.get_index(jointstate_2vs1), 6)
+    elif gradient is not None:  # precomputed with MRAG.build_gradients
+        spat_deriv_vector = gradient_at(gradient, grid2vs1.get_index(jointstate_2vs1))
+    else:
+        value2vs1s = value2vs1[..., np.newaxis] 
+        spat_deriv_vector = spa_deriv(grid2vs1.get_index(jointstate_2vs1), value2vs1s, grid2vs1)
     opt_d1, opt_d2 = game.optDistb_2vs1(spat_deriv_vector)
 
     return (opt_d1, opt_d2)
 
 
-def defender_control_1vs1(game, grid1vs1, value1vs1, jointstate_1vs1):
+def defender_control_1vs1(game, grid1vs1, value1vs1, jointstate_1vs1, gradient=None, policy=None):
     """Return a tuple of 2-dimensional control inputs of one defender based on the value function
     
     Args:
@@ -94,18 +105,25 @@ def defender_control_1vs1(game, grid1vs1, value1vs1, jointstate_1vs1):
         value1v1 (ndarray): 1vs1 HJ reachability value function with only final slice
         agents_1v1 (class): the corresponding AttackerDefender instance
         joint_states1v1 (tuple): the corresponding positions of (A1, D1)
+        gradient (ndarray): the precomputed gradient of the value function from MRAG.gradient_fields, optional
+        policy (ndarray): the policy table of the value function from MRAG.policy_tables, optional, used before gradient
     
     Returns:
         opt_d1, opt_d2 (tuple): the optimal control of the defender
     """
-    value1vs1s = value1vs1[..., np.newaxis] 
-    spat_deriv_vector = spa_deriv(grid1vs1.get_index(jointstate_1vs1), value1vs1s, grid1vs1)
+    if policy is not None:  # quantized with MRAG.build_policies
+        spat_deriv_vector = policy_deriv(policy, "1vs1", grid1vs1.get_index(jointstate_1vs1), 4)
+    elif gradient is not None:  # precomputed with MRAG.build_gradients
+        spat_deriv_vector = gradient_at(gradient, grid1vs1.get_index(jointstate_1vs1))
+    else:
+        value1vs1s = value1vs1[..., np.newaxis] 
+        spat_deriv_vector = spa_deriv(grid1vs1.get_index(jointstate_1vs1), value1vs1s, grid1vs1)
     opt_d1, opt_d2 = game.optDistb_1vs1(spat_deriv_vector)
 
     return (opt_d1, opt_d2)
 
 
-def defender_control_1vs2(game, grid1vs2, value1vs2, jointstate_1vs2):
+def defender_control_1vs2(game, grid1vs2, value1vs2, jointstate_1vs2, gradient=None, policy=None):
     """Return a tuple of 4-dimensional control inputs of one defender based on the value function
     
     Args:
@@ -114,18 +132,25 @@ def defender_control_1vs2(game, grid1vs2, value1vs2, jointstate_1vs2):
         value1vs2 (ndarray, (grid_size*dim, 1)): 1vs2 HJ reachability value function with only final slice
         game (class instance): the corresponding ReachAvoidGameEnv instance
         jointstate_1vs2 (tuple): the corresponding positions of (A1, D1, D2)
+        gradient (ndarray): the precomputed gradient of the value function from MRAG.gradient_fields, optional
+        policy (ndarray): the policy table of the value function from MRAG.policy_tables, optional, used before gradient
 
     Returns:
         opt_d1, opt_d2 (tuple): the optimal control of the defender
     """
-    value1vs2s = value1vs2[..., np.newaxis] 
-    spat_deriv_vector = spa_deriv(grid1vs2.get_index(jointstate_1vs2), value1vs2s, grid1vs2)
+    if policy is not None:  # quantized with MRAG.build_policies
+        spat_deriv_vector = policy_deriv(policy, "1vs2", grid1vs2.get_index(jointstate_1vs2), 6)
+    elif gradient is not None:  # precomputed with MRAG.build_gradients
+        spat_deriv_vector = gradient_at(gradient, grid1vs2.get_index(jointstate_1vs2))
+    else:
+        value1vs2s = value1vs2[..., np.newaxis] 
+        spat_deriv_vector = spa_deriv(grid1vs2.get_index(jointstate_1vs2), value1vs2s, grid1vs2)
     opt_d1, opt_d2, opt_d3, opt_d4 = game.optDistb_1vs2(spat_deriv_vector)
 
     return (opt_d1, opt_d2, opt_d3, opt_d4)
 
 
-def attacker_control_1vs0(game, grid1vs0, value1vs0, attacker, neg2pos):
+def attacker_control_1vs0(game, grid1vs0, value1vs0, attacker, neg2pos, gradient=None, policy=None):
     """Return a list of 2-dimensional control inputs of one defender based on the value function
     
     Args:
@@ -134,7 +159,17 @@ def attacker_control_1vs0(game, grid1vs0, value1vs0, attacker, neg2pos):
     value1vs0 (ndarray): 1v1 HJ reachability value function with only final slice
     attacker (ndarray, (dim,)): the current state of one attacker
     neg2pos (list): the positions of the value function that change from negative to positive
+    gradient (ndarray): the precomputed gradient of value1vs0 with all time slices from MRAG.gradient_fields, optional
+    policy (ndarray): the policy table of value1vs0 with all time slices from MRAG.policy_tables, optional, used before gradient
     """
+    if policy is not None:  # quantized with MRAG.build_policies
+        spat_deriv_vector = policy_deriv(policy, "1vs0", tuple(grid1vs0.get_index(attacker)) + (neg2pos[0],), 2)
+        opt_a1, opt_a2 = game.optCtrl_1vs0(spat_deriv_vector)
+        return (opt_a1, opt_a2)
+    if gradient is not None:  # precomputed with MRAG.build_gradients, the shift below only changes the signs at the border
+        spat_deriv_vector = gradient_at(gradient, tuple(grid1vs0.get_index(attacker)) + (neg2pos[0],))
+        opt_a1, opt_a2 = game.optCtrl_1vs0(spat_deriv_vector)
+        return (opt_a1, opt_a2)
     current_value = grid1vs0.get_value(value1vs0[..., 0], list(attacker))
     if current_value > 0:
         value1vs0 = value1vs0 - current_value
@@ -200,7 +235,7 @@ def find_sign_change1vs1(grid1vs1, value1vs1, current_state):
 
 def hj_controller_defenders(game, assignments, 
                             value1vs1, value2vs1, 
-                            grid1vs1, grid2vs1): 
+                            grid1vs1, grid2vs1, gradients=None, policies=None): 
     """This fuction computes the control for the defenders based on the assignments. 
        Assume dynamics are single integrator.
 
@@ -213,6 +248,8 @@ def hj_controller_defenders(game, assignments,
         grid1vs1 (Grid): the grid for 1 vs 1 game
         grid2vs1 (Grid): the grid for 2 vs 1 game
         grid1vs2 (Grid): the grid for 1 vs 2 game
+        gradients (dict): the precomputed gradients from hj_preparations_sig(gradients=True), optional
+        policies (dict): the policy tables from load_policy_tables(VALUE_FILES_SIG), optional
     
     Returns:
         control_defenders ((ndarray): the control of defenders
@@ -221,6 +258,8 @@ def hj_controller_defenders(game, assignments,
     defenders = game.defenders.state.copy()
     num_defenders = game.NUM_DEFENDERS 
     control_defenders = np.zeros((num_defenders, 2))
+    gradients = gradients or {}
+    policies = policies or {}
 
     for j in range(num_defenders):
         d1x, d1y = defenders[j]
@@ -228,11 +267,11 @@ def hj_controller_defenders(game, assignments,
             a1x, a1y = attackers[assignments[j][0]]
             a2x, a2y = attackers[assignments[j][1]]
             jointstate_2vs1 = (a1x, a1y, a2x, a2y, d1x, d1y)
-            control_defenders[j] = defender_control_2vs1(game, grid2vs1, value2vs1, jointstate_2vs1)
+            control_defenders[j] = defender_control_2vs1(game, grid2vs1, value2vs1, jointstate_2vs1, gradients.get("2vs1"), policies.get("2vs1"))
         elif len(assignments[j]) == 1:
             a1x, a1y = attackers[assignments[j][0]]
             jointstate_1vs1 = (a1x, a1y, d1x, d1y)
-            control_defenders[j] = defender_control_1vs1(game, grid1vs1, value1vs1, jointstate_1vs1)
+            control_defenders[j] = defender_control_1vs1(game, grid1vs1, value1vs1, jointstate_1vs1, gradients.get("1vs1"), policies.get("1vs1"))
         elif len(assignments[j]) == 0: # defender j could not capture any of attackers
             control_defenders[j] = (0.0, 0.0)
         else:
@@ -244,7 +283,7 @@ def hj_controller_defenders(game, assignments,
 def extend_hj_controller_defenders(game, 
                                    assignments, weights, attacker_views,
                                    value1vs1, value2vs1, value1vs2, 
-                                   grid1vs1, grid2vs1, grid1vs2):
+                                   grid1vs1, grid2vs1, grid1vs2, gradients=None, policies=None):
     """This fuction computes the control for the defenders based on the assignments.
        Assume dynamics are single integrator.
 
@@ -259,6 +298,8 @@ def extend_hj_controller_defenders(game,
         grid1vs1 (Grid): the grid for 1 vs 1 game
         grid2vs1 (Grid): the grid for 2 vs 1 game
         grid1vs2 (Grid): the grid for 1 vs 2 game
+        gradients (dict): the precomputed gradients from hj_preparations_sig(gradients=True), optional
+        policies (dict): the policy tables from load_policy_tables(VALUE_FILES_SIG), optional
 
     Returns:
         control_defenders ((ndarray): the control of defenders
@@ -267,6 +308,8 @@ def extend_hj_controller_defenders(game,
     defenders = game.defenders.state.copy()
     num_defenders = game.NUM_DEFENDERS 
     control_defenders = np.zeros((num_defenders, 2))
+    gradients = gradients or {}
+    policies = policies or {}
     calculated_defenders = []  # store the calculated defenders which should not calculate the control again
     flag_1vs2 = False
 
@@ -280,7 +323,7 @@ def extend_hj_controller_defenders(game,
             a1x, a1y = attackers[assignments[j][0]]
             a2x, a2y = attackers[assignments[j][1]]
             jointstate_2vs1 = (a1x, a1y, a2x, a2y, d1x, d1y)
-            control_defenders[j] = defender_control_2vs1(game, grid2vs1, value2vs1, jointstate_2vs1)
+            control_defenders[j] = defender_control_2vs1(game, grid2vs1, value2vs1, jointstate_2vs1, gradients.get("2vs1"), policies.get("2vs1"))
         elif len(assignments[j]) == 1:
             a1x, a1y = attackers[assignments[j][0]]
 
@@ -288,14 +331,14 @@ def extend_hj_controller_defenders(game,
                 collaborate_defender = attacker_views[assignments[j][0]][-1]
                 d2x, d2y = defenders[collaborate_defender]
                 jointstate_1vs2 = (a1x, a1y, d1x, d1y, d2x, d2y)
-                opt_d1, opt_d2, opt_d3, opt_d4 = defender_control_1vs2(game, grid1vs2, value1vs2, jointstate_1vs2)
+                opt_d1, opt_d2, opt_d3, opt_d4 = defender_control_1vs2(game, grid1vs2, value1vs2, jointstate_1vs2, gradients.get("1vs2"), policies.get("1vs2"))
                 control_defenders[j] = (opt_d1, opt_d2)
                 control_defenders[collaborate_defender] = (opt_d3, opt_d4)
                 calculated_defenders.append(collaborate_defender)
                 flag_1vs2 = True
             else:  # use 1 vs. 1 game based control
                 jointstate_1vs1 = (a1x, a1y, d1x, d1y)
-                control_defenders[j] = defender_control_1vs1(game, grid1vs1, value1vs1, jointstate_1vs1)
+                control_defenders[j] = defender_control_1vs1(game, grid1vs1, value1vs1, jointstate_1vs1, gradients.get("1vs1"), policies.get("1vs1"))
 
         elif len(assignments[j]) == 0: # defender j could not capture any of attackers
             control_defenders[j] = (0.0, 0.0)
@@ -325,7 +368,7 @@ def single_1vs2_controller_defender(game, value1vs2, grid1vs2):
     return control_defenders
 
 
-def hj_controller_attackers_1vs0(game, value1vs0, grid1vs0):
+def hj_controller_attackers_1vs0(game, value1vs0, grid1vs0, gradients=None, policies=None, reach_map=None):
     """This function computes the control for the attackers based on the control_attackers. 
        Assume dynamics are single integrator.
 
@@ -333,6 +376,9 @@ def hj_controller_attackers_1vs0(game, value1vs0, grid1vs0):
         game (class): the corresponding ReachAvoidGameEnv instance
         value1vs0 (np.ndarray): the value function for 1 vs 0 game with all time slices
         grid1vs0 (Grid): the grid for 1 vs 0 game
+        gradients (dict): the precomputed gradients from hj_preparations_sig(gradients=True), optional
+        policies (dict): the policy tables from load_policy_tables(VALUE_FILES_SIG), optional
+        reach_map (np.ndarray): earliest_reach_map(value1vs0) from odp.reach_maps, replaces find_sign_change1vs0 (first neg-to-pos slice only), optional
     
     Returns:
         control_attackers (ndarray): the control of attackers
@@ -341,11 +387,16 @@ def hj_controller_attackers_1vs0(game, value1vs0, grid1vs0):
     num_attackers = game.NUM_ATTACKERS
     current_attackers_status = game.attackers_status[-1]
     control_attackers = np.zeros((num_attackers, 2))
+    gradient = (gradients or {}).get("1vs0")
+    policy = (policies or {}).get("1vs0")
     for i in range(num_attackers):
         if not current_attackers_status[i]:  # the attacker is free
-            neg2pos, pos2neg = find_sign_change1vs0(grid1vs0, value1vs0, attackers[i])
+            if reach_map is not None:
+                neg2pos = reach_neg2pos(reach_map, grid1vs0.get_index(attackers[i]))
+            else:
+                neg2pos, pos2neg = find_sign_change1vs0(grid1vs0, value1vs0, attackers[i])
             if len(neg2pos):
-                control_attackers[i] = attacker_control_1vs0(game, grid1vs0, value1vs0, attackers[i], neg2pos)
+                control_attackers[i] = attacker_control_1vs0(game, grid1vs0, value1vs0, attackers[i], neg2pos, gradient, policy)
             else:
                 control_attackers[i] = (0.0, 0.0)
         else:  # the attacker is captured or arrived
@@ -355,7 +406,7 @@ def hj_controller_attackers_1vs0(game, value1vs0, grid1vs0):
 
 
 
-def hj_contoller_attackers_1vs1(game, value1vs1, grid1vs1):
+def hj_contoller_attackers_1vs1(game, value1vs1, grid1vs1, reach_map=None):
     """This function computes the control for the attackers based on the control_attackers. 
        Assume dynamics are single integrator.
 
@@ -363,6 +414,7 @@ def hj_contoller_attackers_1vs1(game, value1vs1, grid1vs1):
         game (class): the corresponding ReachAvoidGameEnv instance
         value1vs0 (np.ndarray): the value function for 1 vs 0 game with all time slices
         grid1vs0 (Grid): the grid for 1 vs 0 game
+        reach_map (np.ndarray): earliest_reach_map(value1vs1) from odp.reach_maps, replaces find_sign_change1vs1 (first neg-to-pos slice only), optional
     
     Returns:
         control_attackers (ndarray): the control of attackers
@@ -374,7 +426,10 @@ def hj_contoller_attackers_1vs1(game, value1vs1, grid1vs1):
     control_attackers = np.zeros((num_attackers, 2))
     for i in range(num_attackers):
         if not current_attackers_status[i]:  # the attacker is free
-            neg2pos, pos2neg = find_sign_change1vs1(grid1vs1, value1vs1, current_state)
+            if reach_map is not None:
+                neg2pos = reach_neg2pos(reach_map, grid1vs1.get_index(current_state))
+            else:
+                neg2pos, pos2neg = find_sign_change1vs1(grid1vs1, value1vs1, current_state)
             if len(neg2pos):
                 control_attackers[i] = attacker_control_1vs1(game, grid1vs1, value1vs1, current_state, neg2pos)
             else:
@@ -462,7 +517,7 @@ def optCtrl_1vs0(spat_deriv, uMax, uMode, a_speed):
     return (opt_a1, opt_a2)
 
 
-def hj_controller_1vs0(uMode, uMax, a_speed, value1vs0, grid1vs0, attackers, current_status):
+def hj_controller_1vs0(uMode, uMax, a_speed, value1vs0, grid1vs0, attackers, current_status, reach_map=None):
     """This function computes the control for the attackers based on the control_attackers. 
        Assume dynamics are single integrator.   
 
@@ -474,6 +529,7 @@ def hj_controller_1vs0(uMode, uMax, a_speed, value1vs0, grid1vs0, attackers, cur
         grid1vs0 (Grid): the grid for 1 vs 0 game
         attackers (np.ndarray, (num_players, 2)): the current states of attackers
         current_status (np.ndarray): the current status of attackers
+        reach_map (np.ndarray): earliest_reach_map(value1vs0) from odp.reach_maps, replaces find_sign_change1vs0 (first neg-to-pos slice only), optional
     """
     attackers = attackers.copy()    
     num_attackers = attackers.shape[0]
@@ -481,7 +537,10 @@ def hj_controller_1vs0(uMode, uMax, a_speed, value1vs0, grid1vs0, attackers, cur
     control_attackers = np.zeros((num_attackers, 2))
     for i in range(num_attackers):
         if not current_attackers_status[i]:  # the attacker is free
-            neg2pos, pos2neg = find_sign_change1vs0(grid1vs0, value1vs0, attackers[i])
+            if reach_map is not None:
+                neg2pos = reach_neg2pos(reach_map, grid1vs0.get_index(attackers[i]))
+            else:
+                neg2pos, pos2neg = find_sign_change1vs0(grid1vs0, value1vs0, attackers[i])
             if len(neg2pos):
                 current_value = grid1vs0.get_value(value1vs0[..., 0], list(attackers[i]))
                 if current_value > 0:
@@ -1,6 +1,7 @@
 '''Solvers for the reach-avoid game.
 
 '''
+import time
 import numpy as np
 
 from mip import Model, xsum, maximize, BINARY, CBC, OptimizationStatus
@@ -135,4 +136,165 @@ def extend_mip_solver(num_defenders, current_attackers_status,
                     assignments[j].append(free_attackers_positions[i])
                     attacker_views[free_attackers_positions[i]].append(j)
 
-    return assignments, weights, attacker_views
\ No newline at end of file
+    return assignments, weights, attacker_views
+
+
+class AssignmentEngine:
+    """ Persistent version of mip_solver (extended=False) and extend_mip_solver (extended=True) for the game loop.
+    The model with one binary variable per (attacker, defender) is built once per team configuration. At each call
+    the captured/arrived attackers and the 1 vs. 1 escape results only toggle variable upper bounds, the pair
+    constraints of a defender are only rebuilt when its 2 vs. 1 escape results changed, the previous assignment is
+    used as the warm start, and the model is not solved again when nothing changed since the last call.
+    The escaped pairs of defender j are aggregated per attacker i into
+        2 * e[i][j] + sum(e[k][j] for the attackers k > i that escape together with i) <= 2
+    which, since a defender is assigned at most 2 attackers, forbids the same assignments as one e[i][j] + e[k][j] <= 1
+    per pair with at most num_attackers constraints per defender.
+
+    Usage:
+        engine = AssignmentEngine(num_attackers, num_defenders)
+        for step in range(total_steps):
+            assignments = engine(game.attackers_status[-1], EscapedAttacker1vs1, EscapedPairs2vs1)
+        print(engine.latency_stats())
+    """
+    def __init__(self, num_attackers, num_defenders, extended=False, solver_name=CBC, max_gap=0.05, max_seconds=300, verbose=False):
+        """
+        Args:
+            num_attackers (int): the number of attackers
+            num_defenders (int): the number of defenders
+            extended (bool): solve the problem of extend_mip_solver instead of mip_solver
+            solver_name (str): the python-mip solver, CBC or GRB
+            max_gap (float): the relative gap at which the search stops
+            max_seconds (float): the time limit of each solve
+            verbose (bool): print the solver status after each solve like mip_solver
+        """
+        self.extended = extended
+        self.solver_name = solver_name
+        self.max_gap = max_gap
+        self.max_seconds = max_seconds
+        self.verbose = verbose
+        self.latencies = []  # seconds spent in each call
+        self.num_solves = 0
+        self.num_skips = 0
+        self._build(num_attackers, num_defenders)
+
+    def _build(self, num_attackers, num_defenders):
+        self.num_attackers, self.num_defenders = num_attackers, num_defenders
+        model = Model(solver_name=self.solver_name)
+        model.verbose = int(self.verbose)
+        model.max_gap = self.max_gap
+        e = [[model.add_var(var_type=BINARY) for j in range(num_defenders)] for i in range(num_attackers)]  # e[attacker index][defender index]
+        # constraint 1: upper bound for attackers to be captured based on the 2 vs. 1 game
+        for j in range(num_defenders):
+            model += xsum(e[i][j] for i in range(num_attackers)) <= 2
+        # constraint 2: upper bound for defenders to be assigned based on the 1 vs. 1 (1 vs. 2) game
+        for i in range(num_attackers):
+            model += xsum(e[i][j] for j in range(num_defenders)) <= (2 if self.extended else 1)
+        # constraint 4 is added per defender by _update_constraints
+        self.pair_constrs = [[] for _ in range(num_defenders)]
+        self.escaped_pairs = [frozenset() for _ in range(num_defenders)]
+        model.objective = maximize(xsum(e[i][j] for j in range(num_defenders) for i in range(num_attackers)))
+        self.model, self.e = model, e
+        self.upper_bounds = np.ones((num_attackers, num_defenders))
+        self.key = None
+        self.solution = np.zeros((num_attackers, num_defenders), dtype=bool)
+        self.outputs = None
+
+    def __call__(self, current_attackers_status, EscapedAttacker1vs1, EscapedPairs2vs1,
+                 EscapedAttackers1vs2=None, EscapedTri1vs2=None):
+        """ Returns the same outputs as mip_solver, or as extend_mip_solver if the engine is extended.
+
+        Args:
+            current_attackers_status (np.ndarray, (num_attackers, )): the current moment attackers' status, 0 stands for free, -1 stands for captured, 1 stands for arrived
+            EscapedAttacker1vs1 (list): the attacker that could escape from the defender in a 1 vs 1 game
+            EscapedPairs2vs1 (list): the pair of attackers that could escape from the defender in a 2 vs 1 game
+            EscapedAttackers1vs2 (list): the attacker that could escape from the defender in a 1 vs 2 game, extended only
+            EscapedTri1vs2 (list): the triad of attackers that could escape from the defender in a 1 vs 2 game, extended only
+        """
+        start_time = time.perf_counter()
+        current_attackers_status = np.asarray(current_attackers_status)
+        num_attackers, num_defenders = len(current_attackers_status), len(EscapedAttacker1vs1)
+        if (num_attackers, num_defenders) != (self.num_attackers, self.num_defenders):
+            self._build(num_attackers, num_defenders)
+
+        key = (tuple(current_attackers_status.tolist()),
+               tuple(tuple(escaped) for escaped in EscapedAttacker1vs1),
+               tuple(tuple(map(tuple, pairs)) for pairs in EscapedPairs2vs1),
+               tuple(tuple(escaped) for escaped in EscapedAttackers1vs2) if self.extended else None)
+        if key == self.key:
+            self.num_skips += 1
+        else:
+            self.key = key
+            self._update_constraints(current_attackers_status, EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2)
+            self._solve()
+            self.outputs = self._outputs(current_attackers_status, EscapedAttacker1vs1, EscapedAttackers1vs2)
+        self.latencies.append(time.perf_counter() - start_time)
+
+        return self.outputs
+
+    def _update_constraints(self, current_attackers_status, EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2):
+        # constraint 3 and the attackers that are not free become upper bounds of 0
+        upper_bounds = np.ones((self.num_attackers, self.num_defenders))
+        upper_bounds[current_attackers_status != 0, :] = 0
+        for j in range(self.num_defenders):
+            for attacker in EscapedAttacker1vs1[j]:
+                if not self.extended or attacker in EscapedAttackers1vs2[j]:
+                    upper_bounds[attacker, j] = 0
+        for i, j in np.argwhere(upper_bounds != self.upper_bounds):
+            self.e[i][j].ub = upper_bounds[i, j]
+        self.upper_bounds = upper_bounds
+
+        # constraint 4: rebuild the aggregated constraints of the defenders whose escaped pairs changed
+        for j in range(self.num_defenders):
+            escaped_pairs = frozenset((min(i, k), max(i, k)) for i, k in EscapedPairs2vs1[j])
+            if escaped_pairs == self.escaped_pairs[j]:
+                continue
+            if self.pair_constrs[j]:
+                self.model.remove(self.pair_constrs[j])
+            partners = {}
+            for i, k in escaped_pairs:
+                partners.setdefault(i, []).append(k)
+            self.pair_constrs[j] = [self.model.add_constr(2 * self.e[i][j] + xsum(self.e[k][j] for k in ks) <= 2)
+                                    for i, ks in sorted(partners.items())]
+            self.escaped_pairs[j] = escaped_pairs
+
+    def _solve(self):
+        # warm start from the previous assignment, restricted to the edges that are still allowed
+        start = [(self.e[i][j], 1.0) for i, j in np.argwhere(self.solution & (self.upper_bounds > 0))]
+        self.model.start = start
+        status = self.model.optimize(max_seconds=self.max_seconds)
+        self.num_solves += 1
+        if self.verbose:
+            if status == OptimizationStatus.OPTIMAL:
+                print('optimal solution cost {} found'.format(self.model.objective_value))
+            elif status == OptimizationStatus.FEASIBLE:
+                print('sol.cost {} found, best possible: {} '.format(self.model.objective_value, self.model.objective_bound))
+            elif status == OptimizationStatus.NO_SOLUTION_FOUND:
+                print('no feasible solution found, lower bound is: {} '.format(self.model.objective_bound))
+        if status == OptimizationStatus.OPTIMAL or status == OptimizationStatus.FEASIBLE:
+            self.solution = np.array([[self.e[i][j].x >= 0.9 for j in range(self.num_defenders)]
+                                      for i in range(self.num_attackers)], dtype=bool).reshape(self.num_attackers, self.num_defenders)
+        else:
+            self.solution = np.zeros((self.num_attackers, self.num_defenders), dtype=bool)
+
+    def _outputs(self, current_attackers_status, EscapedAttacker1vs1, EscapedAttackers1vs2):
+        assignments = [np.flatnonzero(self.solution[:, j]).tolist() for j in range(self.num_defenders)]
+        if not self.extended:
+            return assignments
+
+        free_attackers_positions = np.where(current_attackers_status == 0)[0]
+        weights = np.ones((len(free_attackers_positions), self.num_defenders))
+        for j in range(self.num_defenders):
+            for attacker in EscapedAttacker1vs1[j]:
+                if attacker not in EscapedAttackers1vs2[j]:
+                    weights[np.where(free_attackers_positions == attacker)[0][0]][j] = 0.5
+        attacker_views = [np.flatnonzero(self.solution[i]).tolist() for i in range(self.num_attackers)]
+        return assignments, weights, attacker_views
+
+    def latency_stats(self):
+        """ Returns the number of calls, solves and skipped solves, and the mean, median, 95th percentile and maximum latency in milliseconds """
+        latencies = np.array(self.latencies) * 1000
+        stats = {"calls": len(latencies), "solves": self.num_solves, "skips": self.num_skips}
+        if len(latencies):
+            stats.update(mean_ms=float(np.mean(latencies)), p50_ms=float(np.percentile(latencies, 50)),
+                         p95_ms=float(np.percentile(latencies, 95)), max_ms=float(np.max(latencies)))
+        return stats
@@ -7,6 +7,9 @@ import time
 import numpy as np
 
 from odp.Grid import Grid
+from MRAG.gradient_fields import load_gradient_field
+from MRAG.value_registry import VALUE_FILES, get_value_registry
+from MRAG.escape_maps import EscapeMap
 from MRAG.dynamics.SingleIntegrator import SingleIntegrator
 from MRAG.dynamics.DubinCar3D import DubinsCar
 
@@ -32,9 +35,18 @@ def make_agents(physics_info, numbers, initials, freqency):
         raise ValueError("Invalid physics info while generating agents.")
 
 
-def hj_preparations_sig():
+# The value functions loaded by hj_preparations_sig and hj_preparations_dub
+VALUE_FILES_SIG = VALUE_FILES["sig"]
+VALUE_FILES_DUB = VALUE_FILES["dub"]
+
+
+def hj_preparations_sig(gradients=False):
     """ Loads all calculated HJ value functions for the single integrator agents.
-    This function needs to be called before any game starts.
+    This function needs to be called before any game starts. The value functions are the read-only float32 memory maps
+    of the process-wide ValueRegistry, the pages are only read from disk when a game looks them up.
+
+    Args:
+        gradients (bool): also open the gradient fields built with python -m MRAG.build_gradients
     
     Returns:
         value1vs0 (np.ndarray): the value function for 1 vs 0 game with all time slices
@@ -45,50 +57,51 @@ def hj_preparations_sig():
         grid1vs1 (Grid): the grid for 1 vs 1 game
         grid2vs1 (Grid): the grid for 2 vs 1 game
         grid1vs2 (Grid): the grid for 1 vs 2 game
+        gradients (dict): only if gradients, the memory-mapped gradient of each value function ("1vs0", "1vs1", "2vs1", "1vs2"), None if not built
     """
+    registry = get_value_registry()
     start = time.time()
-    value1vs0 = np.load('MRAG/values/1vs0_SIG_g100_medium_speed1.0.npy')
-    value1vs1 = np.load('MRAG/values/1vs1_SIG_g45_medium_dspeed1.5.npy')
-    value2vs1 = np.load('MRAG/values/2vs1AttackDefend_g30_speed1.5.npy')
-    value1vs2 = np.load('MRAG/values/1vs2_SIG_g32_medium_dspeed1.5.npy')
+    value1vs0, grid1vs0 = registry.game("sig", "1vs0")
+    value1vs1, grid1vs1 = registry.game("sig", "1vs1")
+    value2vs1, grid2vs1 = registry.game("sig", "2vs1")
+    value1vs2, grid1vs2 = registry.game("sig", "1vs2")
     end = time.time()
-    print(f"============= HJ value functions loaded Successfully! (Time: {end-start :.4f} seconds) =============")
-    grid1vs0 = Grid(np.array([-1.0, -1.0]), np.array([1.0, 1.0]), 2, np.array([100, 100])) 
-    grid1vs1 = Grid(np.array([-1.0, -1.0, -1.0, -1.0]), np.array([1.0, 1.0, 1.0, 1.0]), 4, np.array([45, 45, 45, 45]))
-    grid2vs1 = Grid(np.array([-1.0, -1.0, -1.0, -1.0, -1.0, -1.0]), np.array([1.0, 1.0, 1.0, 1.0, 1.0, 1.0]), 6, np.array([30, 30, 30, 30, 30, 30]))
-    # grid1vs2 = Grid(np.array([-1.0, -1.0, -1.0, -1.0, -1.0, -1.0]), np.array([1.0, 1.0, 1.0, 1.0, 1.0, 1.0]), 6, np.array([35, 35, 35, 35, 35, 35]))
-    grid1vs2 = Grid(np.array([-1.0, -1.0, -1.0, -1.0, -1.0, -1.0]), np.array([1.0, 1.0, 1.0, 1.0, 1.0, 1.0]), 6, np.array([32, 32, 32, 32, 32, 32]))
-    print(f"============= Grids created Successfully! =============")
+    print(f"============= HJ value functions and grids ready! (Time: {end-start :.4f} seconds) =============")
+
+    if gradients:
+        gradient_fields = {name: load_gradient_field(path) for name, path in VALUE_FILES_SIG.items()}
+        print(f"============= Gradient fields opened: {[name for name, field in gradient_fields.items() if field is not None]} =============")
+        return value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1, grid1vs2, gradient_fields
 
     return value1vs0, value1vs1, value2vs1, value1vs2, grid1vs0, grid1vs1, grid2vs1, grid1vs2
 
 
-def hj_preparations_dub():
+def hj_preparations_dub(gradients=False):
     """ Loads all calculated HJ value functions for the DubinCar agents.
-    This function needs to be called before any game starts.
+    This function needs to be called before any game starts. The value functions are the read-only float32 memory maps
+    of the process-wide ValueRegistry, the pages are only read from disk when a game looks them up.
+
+    Args:
+        gradients (bool): also open the gradient fields built with python -m MRAG.build_gradients
     
     Returns:
         value1vs0 (np.ndarray): the value function for 1 vs 0 game with all time slices
         value1vs1 (np.ndarray): the value function for 1 vs 1 game
         grid1vs0 (Grid): the grid for 1 vs 0 game
         grid1vs1 (Grid): the grid for 1 vs 1 game
+        gradients (dict): only if gradients, the memory-mapped gradient of each value function ("1vs0", "1vs1"), None if not built
     """
+    registry = get_value_registry()
     start = time.time()
-    # value1vs0_dub = np.load('MRAG/values/DubinCar1vs0_grid100_medium.npy')
-    value1vs0_dub = np.load("MRAG/values/DubinCar1vs0_grid100_medium_1.0angularv.npy")
-    value1vs1_dub = np.load('MRAG/values/DubinCar1vs1_grid28_medium_1.0angularv.npy')
-    # value1vs1_dub = np.load('MRAG/values/DubinCar1vs1_grid28_medium_1.0angularv_defenderview.npy')
+    value1vs0_dub, grid1vs0_dub = registry.game("dub", "1vs0")
+    value1vs1_dub, grid1vs1_dub = registry.game("dub", "1vs1")
     end = time.time()
-    print(f"============= HJ value functions loaded Successfully! (Time: {end-start :.4f} seconds) =============")
-    grid_size_1vs0_0 = value1vs0_dub.shape[0]
-    grid_size_1vs0_2 = value1vs0_dub.shape[2]
-    grid_size_1vs1 = value1vs1_dub.shape[0]
-    grid1vs0_dub = Grid(np.array([-1.0, -1.0, -math.pi]), np.array([1.0, 1.0, math.pi]), 3, 
-                        np.array([grid_size_1vs0_0, grid_size_1vs0_0, grid_size_1vs0_2]), [2])
-    grid1vs1_dub = Grid(np.array([-1.0, -1.0, -math.pi, -1.0, -1.0, -math.pi]), 
-                    np.array([1.0, 1.0, math.pi, 1.0, 1.0, math.pi]), 6, 
-                    np.array([grid_size_1vs1, grid_size_1vs1, grid_size_1vs1, grid_size_1vs1, grid_size_1vs1, grid_size_1vs1]), [2, 5])
-    print(f"============= Grids created Successfully! =============")
+    print(f"============= HJ value functions and grids ready! (Time: {end-start :.4f} seconds) =============")
+
+    if gradients:
+        gradient_fields = {name: load_gradient_field(path) for name, path in VALUE_FILES_DUB.items()}
+        print(f"============= Gradient fields opened: {[name for name, field in gradient_fields.items() if field is not None]} =============")
+        return value1vs0_dub, grid1vs0_dub, value1vs1_dub, grid1vs1_dub, gradient_fields
 
     return value1vs0_dub, grid1vs0_dub, value1vs1_dub, grid1vs1_dub
 
@@ -151,6 +164,27 @@ def po2slice2vs1(attacker_i, attacker_k, defender, grid_size):
     return tuple(joint_slice)
 
 
+def po2indices(states, grid_size):
+    """ Convert the positions of a team of agents to their grid indices, same rounding as po2slice1vs1.
+
+    Args:
+        states (np.ndarray): the agents' states, one row per agent
+        grid_size (int): the size of the grid
+
+    Returns:
+        indices (np.ndarray): the (x, y) grid indices of every agent, shape (num_agents, 2)
+
+    """
+    positions = np.asarray(states, dtype=float)[:, :2]
+    grid_points = np.linspace(-1, +1, num=grid_size)
+    idx = np.searchsorted(grid_points, positions)
+    lower = np.maximum(idx - 1, 0)
+    upper = np.minimum(idx, grid_size - 1)
+    closer_lower = (idx > 0) & ((idx == grid_size) | (np.abs(positions - grid_points[lower]) < np.abs(positions - grid_points[upper])))
+
+    return np.where(closer_lower, idx - 1, idx)
+
+
 def check_1vs1(attacker, defender, value1vs1):
     """ Check if the attacker could escape from the defender in a 1 vs 1 game.
 
@@ -203,6 +237,83 @@ def check_1vs2(attacker, defender_j, defender_k, value1vs2, epsilon=0.035):
     return value1vs2[joint_slice] > epsilon
 
 
+def escape_1vs1(value1vs1, attacker_indices, defender_indices):
+    """ Gather the 1 vs 1 results of every (defender, attacker) pair at once.
+
+    Args:
+        value1vs1 (np.ndarray or EscapeMap): the value function for 1 vs 1 game, or its escape map
+        attacker_indices (np.ndarray): the attackers' grid indices from po2indices
+        defender_indices (np.ndarray): the defenders' grid indices from po2indices
+
+    Returns:
+        escaped (np.ndarray): escaped[j, i] is True if attacker i could escape from defender j
+    """
+    a, d = attacker_indices, defender_indices
+    if isinstance(value1vs1, EscapeMap):
+        return value1vs1.escaped(a[None, :, 0], a[None, :, 1], d[:, None, 0], d[:, None, 1])
+    values = value1vs1[a[None, :, 0], a[None, :, 1], d[:, None, 0], d[:, None, 1]]
+
+    return ~(values > 0)
+
+
+def escape_2vs1(value2vs1, attacker_i_indices, attacker_k_indices, defender_indices):
+    """ Gather the 2 vs 1 results of every (defender, attacker_i, attacker_k) triple at once.
+    value2vs1 may also be its EscapeMap.
+
+    Returns:
+        escaped (np.ndarray): escaped[j, i, k] is True if attackers i and k could escape from defender j
+    """
+    ai, ak, d = attacker_i_indices, attacker_k_indices, defender_indices
+    indices = (ai[None, :, None, 0], ai[None, :, None, 1], ak[None, None, :, 0], ak[None, None, :, 1],
+               d[:, None, None, 0], d[:, None, None, 1])
+    if isinstance(value2vs1, EscapeMap):
+        return value2vs1.escaped(*indices)
+
+    return ~(value2vs1[indices] > 0)
+
+
+def escape_1vs2(value1vs2, attacker_indices, defender_j_indices, defender_k_indices, epsilon=0.035):
+    """ Gather the 1 vs 2 results of every (defender_j, defender_k, attacker) triple at once, same epsilon as check_1vs2.
+    value1vs2 may also be its EscapeMap, which was built with its own threshold instead of epsilon.
+
+    Returns:
+        escaped (np.ndarray): escaped[j, k, i] is True if attacker i could escape from defenders j and k
+    """
+    a, dj, dk = attacker_indices, defender_j_indices, defender_k_indices
+    indices = (a[None, None, :, 0], a[None, None, :, 1], dj[:, None, None, 0], dj[:, None, None, 1],
+               dk[None, :, None, 0], dk[None, :, None, 1])
+    if isinstance(value1vs2, EscapeMap):
+        return value1vs2.escaped(*indices)
+
+    return ~(value1vs2[indices] > epsilon)
+
+
+def escaped_lists(escaped1vs1, escaped2vs1, escaped1vs2, current_attackers_status):
+    """ Convert the gathered results of escape_1vs1, escape_2vs1 and escape_1vs2 to the outputs of judges.
+    Only the free attackers, the pairs i < k and the defender pairs j < k are kept, in the order of the nested loops.
+    """
+    num_defenders, num_attackers = escaped1vs1.shape
+    free = np.asarray(current_attackers_status) == 0
+    EscapedAttacker1vs1 = [[] for _ in range(num_defenders)]
+    EscapedPairs2vs1 = [[] for _ in range(num_defenders)]
+    EscapedAttackers1vs2 = [[] for _ in range(num_defenders)]
+    EscapedTri1vs2 = [[] for _ in range(num_defenders)]
+
+    for j, i in np.argwhere(escaped1vs1 & free[None, :]).tolist():
+        EscapedAttacker1vs1[j].append(i)
+    attacker_pairs = np.triu(free[:, None] & free[None, :], k=1)
+    for j, i, k in np.argwhere(escaped2vs1 & attacker_pairs[None, :, :]).tolist():
+        EscapedPairs2vs1[j].append([i, k])
+    defender_pairs = np.triu(np.ones((num_defenders, num_defenders), dtype=bool), k=1)
+    for j, k, i in np.argwhere(escaped1vs2 & defender_pairs[:, :, None] & free[None, None, :]).tolist():
+        EscapedAttackers1vs2[j].append(i)
+        EscapedAttackers1vs2[k].append(i)
+        EscapedTri1vs2[j].append([i, j, k])
+        EscapedTri1vs2[k].append([i, j, k])
+
+    return EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2
+
+
 def judge_1vs1(attackers, defenders, current_attackers_status, value1vs1):
     """ Check the result of the 1 vs 1 game for those free attackers.
 
@@ -217,12 +328,14 @@ def judge_1vs1(attackers, defenders, current_attackers_status, value1vs1):
     """
     num_attackers, num_defenders = len(attackers), len(defenders)
     EscapedAttacker1vs1 = [[] for _ in range(num_defenders)]
+    if num_attackers == 0 or num_defenders == 0:
+        return EscapedAttacker1vs1
 
-    for j in range(num_defenders):
-        for i in range(num_attackers):
-            if not current_attackers_status[i]:  # the attcker[i] is free now
-                if not check_1vs1(attackers[i], defenders[j], value1vs1):  # the attacker could escape
-                    EscapedAttacker1vs1[j].append(i)
+    a = po2indices(attackers, value1vs1.shape[0])
+    d = po2indices(defenders, value1vs1.shape[0])
+    escaped = escape_1vs1(value1vs1, a, d) & (np.asarray(current_attackers_status) == 0)[None, :]
+    for j, i in np.argwhere(escaped).tolist():
+        EscapedAttacker1vs1[j].append(i)
 
     return EscapedAttacker1vs1
     
@@ -241,13 +354,15 @@ def judge_2vs1(attackers, defenders, current_attackers_status, value2vs1):
     """
     num_attackers, num_defenders = len(attackers), len(defenders)
     EscapedPairs2vs1 = [[] for _ in range(num_defenders)]
-    for j in range(num_defenders):
-        for i in range(num_attackers):
-            if not current_attackers_status[i]:  # the attcker[i] is free now
-                for k in range(i+1, num_attackers):
-                    if not current_attackers_status[k]:
-                        if not check_2vs1(attackers[i], attackers[k], defenders[j], value2vs1):
-                            EscapedPairs2vs1[j].append([i, k])
+    if num_attackers < 2 or num_defenders == 0:
+        return EscapedPairs2vs1
+
+    a = po2indices(attackers, value2vs1.shape[0])
+    d = po2indices(defenders, value2vs1.shape[0])
+    free = np.asarray(current_attackers_status) == 0
+    pairs = np.triu(free[:, None] & free[None, :], k=1)
+    for j, i, k in np.argwhere(escape_2vs1(value2vs1, a, a, d) & pairs[None, :, :]).tolist():
+        EscapedPairs2vs1[j].append([i, k])
     
     return EscapedPairs2vs1
 
@@ -268,15 +383,18 @@ def judge_1vs2(attackers, defenders, current_attackers_status, value1vs2):
     num_attackers, num_defenders = len(attackers), len(defenders)
     EscapedAttackers1vs2 = [[] for _ in range(num_defenders)]
     EscapedTri1vs2 = [[] for _ in range(num_defenders)]  #
-    for j in range(num_defenders):
-        for k in range(j+1, num_defenders):
-            for i in range(num_attackers):
-                if not current_attackers_status[i]:
-                    if not check_1vs2(attackers[i], defenders[j], defenders[k], value1vs2):
-                        EscapedAttackers1vs2[j].append(i)
-                        EscapedAttackers1vs2[k].append(i)
-                        EscapedTri1vs2[j].append([i, j, k])
-                        EscapedTri1vs2[k].append([i, j, k])
+    if num_attackers == 0 or num_defenders < 2:
+        return EscapedAttackers1vs2, EscapedTri1vs2
+
+    a = po2indices(attackers, value1vs2.shape[0])
+    d = po2indices(defenders, value1vs2.shape[0])
+    free = np.asarray(current_attackers_status) == 0
+    pairs = np.triu(np.ones((num_defenders, num_defenders), dtype=bool), k=1)
+    for j, k, i in np.argwhere(escape_1vs2(value1vs2, a, d, d) & pairs[:, :, None] & free[None, None, :]).tolist():
+        EscapedAttackers1vs2[j].append(i)
+        EscapedAttackers1vs2[k].append(i)
+        EscapedTri1vs2[j].append([i, j, k])
+        EscapedTri1vs2[k].append([i, j, k])
                         
     return EscapedAttackers1vs2, EscapedTri1vs2
 
@@ -291,6 +409,7 @@ def judges(attackers, defenders, current_attackers_status, value1vs1, value2vs1,
         value1vs1 (np.ndarray): the value function for 1 vs 1 game
         value2vs1 (np.ndarray): the value function for 2 vs 1 game
         value1vs2 (np.ndarray): the value function for 1 vs 2 game
+        (each of them may also be its EscapeMap from MRAG.escape_maps.load_escape_maps)
 
     Returns:
         EscapedAttacker1vs1 (a list of lists): the attacker that could escape from the defender in a 1 vs 1 game
@@ -305,6 +424,98 @@ def judges(attackers, defenders, current_attackers_status, value1vs1, value2vs1,
     return EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2
 
 
+class IncrementalJudges:
+    """ Stateful version of judges for the game loop.
+    Each agent's grid index and the result of every pair and triple are kept between steps, only the tuples
+    involving an agent whose grid index changed are gathered again. A change of status only changes which
+    results are reported. The outputs are the same as judges(), the value functions may also be their EscapeMaps.
+
+    Usage:
+        judge = IncrementalJudges(value1vs1, value2vs1, value1vs2)
+        for step in range(total_steps):
+            EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2 = judge(game.attackers.state, game.defenders.state, game.attackers_status[-1])
+    """
+    def __init__(self, value1vs1, value2vs1, value1vs2):
+        self.value1vs1 = value1vs1
+        self.value2vs1 = value2vs1
+        self.value1vs2 = value1vs2
+        self.indices = None
+        self.num_defenders = None
+        self.status = None
+        self.outputs = None
+        self.changed = True  # whether the last call returned different outputs than the previous one
+        self.num_rechecked = 0  # number of tuples gathered in the last call
+
+    def __call__(self, attackers, defenders, current_attackers_status):
+        """ Check the result of 1 vs. 1, 2 vs. 1 and 1 vs. 2 games for those free attackers.
+        The lists returned when nothing changed are the ones of the previous call, they should not be modified.
+
+        Args:
+            attackers (np.ndarray): the attackers' states
+            defenders (np.ndarray): the defenders' states
+            current_attackers_status (np.ndarray): the current moment attackers' status, 0 stands for free, -1 stands for captured, 1 stands for arrived
+
+        Returns:
+            the same EscapedAttacker1vs1, EscapedPairs2vs1, EscapedAttackers1vs2, EscapedTri1vs2 as judges
+        """
+        num_attackers, num_defenders = len(attackers), len(defenders)
+        agents = np.concatenate((np.asarray(attackers, dtype=float)[:, :2], np.asarray(defenders, dtype=float)[:, :2]))
+        # One index per agent and grid size, the three value functions may use different grids
+        sizes = {value.shape[0] for value in (self.value1vs1, self.value2vs1, self.value1vs2)}
+        indices = {size: po2indices(agents, size) for size in sizes}
+        status = np.array(current_attackers_status, copy=True)
+
+        if self.outputs is None or num_attackers != len(self.status) or num_defenders != self.num_defenders:
+            self.num_defenders = num_defenders
+            self._evaluate(indices, np.arange(num_attackers), np.arange(num_defenders), full=True)
+            results_changed = True
+        else:
+            moved = np.any([np.any(indices[size] != self.indices[size], axis=1) for size in sizes], axis=0)
+            moved_attackers, moved_defenders = np.flatnonzero(moved[:num_attackers]), np.flatnonzero(moved[num_attackers:])
+            results_changed = self._evaluate(indices, moved_attackers, moved_defenders)
+        self.indices = indices
+
+        if not results_changed and np.array_equal(status, self.status):
+            self.changed = False
+            return self.outputs
+        self.status = status
+        outputs = escaped_lists(self.escaped1vs1, self.escaped2vs1, self.escaped1vs2, status)
+        self.changed = outputs != self.outputs
+        self.outputs = outputs
+        return outputs
+
+    def _evaluate(self, indices, moved_attackers, moved_defenders, full=False):
+        # Gathers the tuples involving a moved agent, returns whether any result changed
+        num_attackers = len(self.status) if not full else len(moved_attackers)
+        a1, d1 = np.split(indices[self.value1vs1.shape[0]], [num_attackers])
+        a2, d2 = np.split(indices[self.value2vs1.shape[0]], [num_attackers])
+        a12, d12 = np.split(indices[self.value1vs2.shape[0]], [num_attackers])
+        if full:
+            self.escaped1vs1 = escape_1vs1(self.value1vs1, a1, d1)
+            self.escaped2vs1 = escape_2vs1(self.value2vs1, a2, a2, d2)
+            self.escaped1vs2 = escape_1vs2(self.value1vs2, a12, d12, d12)
+            self.num_rechecked = self.escaped1vs1.size + self.escaped2vs1.size + self.escaped1vs2.size
+            return True
+
+        ma, md = moved_attackers, moved_defenders
+        self.num_rechecked = 0
+        if len(ma) == 0 and len(md) == 0:
+            return False
+        updates = [(self.escaped1vs1, (slice(None), ma), escape_1vs1(self.value1vs1, a1[ma], d1)),
+                   (self.escaped1vs1, (md, slice(None)), escape_1vs1(self.value1vs1, a1, d1[md])),
+                   (self.escaped2vs1, (slice(None), ma, slice(None)), escape_2vs1(self.value2vs1, a2[ma], a2, d2)),
+                   (self.escaped2vs1, (slice(None), slice(None), ma), escape_2vs1(self.value2vs1, a2, a2[ma], d2)),
+                   (self.escaped2vs1, (md, slice(None), slice(None)), escape_2vs1(self.value2vs1, a2, a2, d2[md])),
+                   (self.escaped1vs2, (slice(None), slice(None), ma), escape_1vs2(self.value1vs2, a12[ma], d12, d12)),
+                   (self.escaped1vs2, (md, slice(None), slice(None)), escape_1vs2(self.value1vs2, a12, d12[md], d12)),
+                   (self.escaped1vs2, (slice(None), md, slice(None)), escape_1vs2(self.value1vs2, a12, d12, d12[md]))]
+        changed = False
+        for escaped, index, results in updates:
+            changed = changed or bool(np.any(escaped[index] != results))
+            escaped[index] = results
+            self.num_rechecked += results.size
+        return changed
+
 def current_status_check(current_attackers_status, step=None):
     """ Check the current status of the attackers.
 
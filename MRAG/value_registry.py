@@ -0,0 +1,158 @@
+'''Lazy, memory-mapped registry of the HJ value functions.
+
+np.load reads a whole value function into memory, the 2vs1 and 1vs2 ones are several gigabytes. The registry opens
+each file with mmap_mode="r" the first time it is asked for, so only the pages that the controllers and judges touch
+are read, and every game script (or RL worker) in the same process shares the opened arrays.
+Files that are not float32 in C order are converted once, slab by slab, to <name>_f32.npy next to the original.
+A value artifact <name>.value next to the .npy file (see odp.value_storage, python -m MRAG.convert_values) is used
+instead when it exists, its grid then comes from the artifact header.
+When the MRAG_VALUE_SERVER environment variable is set (see MRAG.value_server), the process-wide registry reads the
+shared copies of its ValueServer instead.
+
+Usage:
+    registry = get_value_registry()
+    value2vs1, grid2vs1 = registry.game("sig", "2vs1")
+'''
+import json
+import math
+import os
+import time
+import numpy as np
+
+from odp.Grid import Grid
+from odp.value_storage import is_value_artifact, open_value_artifact
+
+
+# The value function files of each game, see hj_preparations_sig and hj_preparations_dub
+VALUE_FILES = {"sig": {"1vs0": 'MRAG/values/1vs0_SIG_g100_medium_speed1.0.npy',
+                       "1vs1": 'MRAG/values/1vs1_SIG_g45_medium_dspeed1.5.npy',
+                       "2vs1": 'MRAG/values/2vs1AttackDefend_g30_speed1.5.npy',
+                       "1vs2": 'MRAG/values/1vs2_SIG_g32_medium_dspeed1.5.npy'},
+               "dub": {"1vs0": "MRAG/values/DubinCar1vs0_grid100_medium_1.0angularv.npy",
+                       "1vs1": 'MRAG/values/DubinCar1vs1_grid28_medium_1.0angularv.npy'}}
+
+# Environment variable with the directory of a running ValueServer, and the file listing its value functions there
+VALUE_SERVER_ENV = "MRAG_VALUE_SERVER"
+SERVER_VALUE_FILES = "value_files.json"
+
+# Bounds of one agent and its periodic dimensions, the grid repeats them for every agent of the game
+AGENT_BOUNDS = {"sig": ([-1.0, -1.0], [1.0, 1.0], []),
+                "dub": ([-1.0, -1.0, -math.pi], [1.0, 1.0, math.pi], [2])}
+
+
+def artifact_path(value_path):
+    """ Path of the value artifact of a value function file """
+    return os.path.splitext(value_path)[0] + ".value"
+
+
+def float32_path(value_path):
+    """ Path of the float32 copy of a value function that is not stored as float32 in C order """
+    return os.path.splitext(value_path)[0] + "_f32.npy"
+
+
+def open_float32(value_path):
+    """ Opens a value function memory-mapped as float32 in C order, converting it to float32_path(value_path) once.
+
+    Returns:
+        value (np.memmap): the read-only value function
+    """
+    value = np.load(value_path, mmap_mode="r")
+    if value.dtype == np.float32 and value.flags.c_contiguous:
+        return value
+    path = float32_path(value_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(value_path):
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=value.shape)
+        for start in range(value.shape[0]):  # one slab at a time, the original is never in memory as a whole
+            out[start] = value[start]
+        out.flush()
+        del out
+    return np.load(path, mmap_mode="r")
+
+
+def make_grid(dynamics, name, shape):
+    """ The grid of a game from the shape of its value function, e.g. name "2vs1" has 3 agents.
+
+    Args:
+        dynamics (str): "sig" or "dub"
+        name (str): the game, "<attackers>vs<defenders>"
+        shape (tuple): the shape of the value function, extra trailing axes (time slices) are ignored
+
+    Returns:
+        grid (Grid): the grid of the value function
+    """
+    lower, upper, periodic = AGENT_BOUNDS[dynamics]
+    num_agents = sum(int(n) for n in name.split("vs"))
+    dims = len(lower) * num_agents
+    periodic_dims = [len(lower) * agent + dim for agent in range(num_agents) for dim in periodic]
+    return Grid(np.array(lower * num_agents), np.array(upper * num_agents), dims, np.array(shape[:dims]), periodic_dims)
+
+
+class ValueRegistry:
+    """ Opens the value functions of VALUE_FILES on first use and keeps them, with their grids, for the whole process.
+    timings holds the seconds spent opening (and converting) each file.
+    """
+    def __init__(self, value_files=VALUE_FILES, verbose=True):
+        self.value_files = value_files
+        self.verbose = verbose
+        self.timings = {}
+        self._values = {}
+        self._grids = {}
+
+    def value(self, dynamics, name):
+        """ The memory-mapped float32 value function of a game, opened the first time it is asked for """
+        key = (dynamics, name)
+        if key not in self._values:
+            path = self.value_files[dynamics][name]
+            start = time.time()
+            if is_value_artifact(artifact_path(path)):
+                path = artifact_path(path)
+                artifact = open_value_artifact(path)
+                self._values[key], self._grids[key] = artifact.values(), artifact.grid
+            else:
+                self._values[key] = open_float32(path)
+            self.timings[path] = time.time() - start
+            if self.verbose:
+                print(f"============= {path} opened {self._values[key].shape} (Time: {self.timings[path]:.4f} seconds) =============")
+        return self._values[key]
+
+    def grid(self, dynamics, name):
+        """ The grid of a game, built from the shape of its value function """
+        key = (dynamics, name)
+        if key not in self._grids:
+            self._grids[key] = make_grid(dynamics, name, self.value(dynamics, name).shape)
+        return self._grids[key]
+
+    def game(self, dynamics, name):
+        """ The value function and the grid of a game """
+        return self.value(dynamics, name), self.grid(dynamics, name)
+
+    def clear(self):
+        """ Drops the opened value functions, e.g. after rebuilding a file """
+        self._values.clear()
+        self._grids.clear()
+        self.timings.clear()
+
+
+_registry = None
+
+
+def get_value_registry():
+    """ The process-wide ValueRegistry, on the value functions of the ValueServer of MRAG_VALUE_SERVER if it is set """
+    global _registry
+    if _registry is None:
+        address = os.environ.get(VALUE_SERVER_ENV)
+        if address:
+            with open(os.path.join(address, SERVER_VALUE_FILES)) as f:
+                value_files = json.load(f)
+            # games the server does not host are read from their usual files
+            _registry = ValueRegistry({dynamics: dict(files, **value_files.get(dynamics, {}))
+                                       for dynamics, files in VALUE_FILES.items()})
+        else:
+            _registry = ValueRegistry()
+    return _registry
+
+
+def set_value_registry(registry):
+    """ Replaces the process-wide ValueRegistry, None to build it again on the next get_value_registry() """
+    global _registry
+    _registry = registry
@@ -0,0 +1,87 @@
+'''Shared-memory host of the HJ value functions for parallel games and RL workers.
+
+Without it every process of a Monte Carlo evaluation or of the PPO rollouts holds its own copy of the 6D value
+functions. The ValueServer copies them once, as value artifacts (odp.value_storage), to a directory in shared memory
+(/dev/shm where it exists) and points the MRAG_VALUE_SERVER environment variable to it. The value registry of every
+process started afterwards, and therefore hj_preparations_sig / hj_preparations_dub, then memory-maps these copies:
+the workers attach in milliseconds, share the same physical pages and see the usual arrays and Grids.
+The host owns the copies, they are removed by close() (or at the end of the with block).
+
+Usage:
+    with ValueServer():
+        with multiprocessing.Pool(16) as pool:
+            pool.map(play_one_game, seeds)  # play_one_game calls hj_preparations_sig() as usual
+'''
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from odp.value_storage import save_value_artifact
+from MRAG.value_registry import VALUE_FILES, VALUE_SERVER_ENV, SERVER_VALUE_FILES, ValueRegistry, artifact_path, \
+    set_value_registry
+
+
+class ValueServer:
+    """ Hosts the value functions of VALUE_FILES in shared memory for the processes started while it is open """
+    def __init__(self, games=None, directory=None, verbose=True):
+        """
+        Args:
+            games (dict): the games to host for each dynamics, e.g. {"sig": ["1vs1", "2vs1"]}, all of VALUE_FILES by default
+            directory (str): where to create the shared directory, /dev/shm by default
+            verbose (bool): print the time spent copying each value function
+        """
+        self.games = games if games is not None else {dynamics: list(files) for dynamics, files in VALUE_FILES.items()}
+        if directory is None and os.path.isdir("/dev/shm"):
+            directory = "/dev/shm"
+        self.parent_directory = directory
+        self.verbose = verbose
+        self.address = None
+        self.timings = {}
+
+    def start(self):
+        """ Copies the value functions to shared memory and makes this process and its children use them.
+
+        Returns:
+            address (str): the shared directory, the value of MRAG_VALUE_SERVER
+        """
+        self.address = tempfile.mkdtemp(prefix="mrag_values_", dir=self.parent_directory)
+        source = ValueRegistry(verbose=False)
+        value_files = {}
+        for dynamics, names in self.games.items():
+            value_files[dynamics] = {}
+            for name in names:
+                start = time.time()
+                value, grid = source.game(dynamics, name)
+                # the registry finds the artifact next to this (never written) .npy path
+                value_path = os.path.join(self.address, f"{dynamics}_{name}.npy")
+                save_value_artifact(artifact_path(value_path), value, grid, content_hash=False,
+                                    metadata={"dynamics": dynamics, "game": name, "source": VALUE_FILES[dynamics][name]})
+                value_files[dynamics][name] = value_path
+                self.timings[value_path] = time.time() - start
+                if self.verbose:
+                    print(f"============= {dynamics} {name} hosted in {self.address} (Time: {self.timings[value_path]:.4f} seconds) =============")
+        with open(os.path.join(self.address, SERVER_VALUE_FILES), "w") as f:
+            json.dump(value_files, f, indent=2)
+
+        os.environ[VALUE_SERVER_ENV] = self.address
+        set_value_registry(None)  # rebuilt from the server on the next get_value_registry(), also by forked children
+        return self.address
+
+    def close(self):
+        """ Removes the shared copies, the processes still attached keep their mappings until they exit """
+        if self.address is None:
+            return
+        if os.environ.get(VALUE_SERVER_ENV) == self.address:
+            del os.environ[VALUE_SERVER_ENV]
+        set_value_registry(None)
+        shutil.rmtree(self.address, ignore_errors=True)
+        self.address = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
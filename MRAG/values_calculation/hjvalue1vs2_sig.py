@@ -10,12 +10,12 @@ from MRAG.envs.AttackerDefender import AttackerDefender1vs2
 from odp.Plots import PlotOptions
 from odp.Plots.plotting_utilities import plot_isosurface, plot_valuefunction
 from odp.solver import HJSolver
+from odp.computeGraphs.MRAG_6D import graph_6D as MRAG_graph_6D
 from MRAG.plots import animation, plot_scene, plot_value_1vs1_sig, plot_value_3agents
 
 
 """ USER INTERFACES
-- 0. This file needs to be run with the MRAG/values_calculation/MRAG_6D.py file, 
-replace the original odp/computeGraphs/graph_6D.py with the MRAG_6D.py, also change some corresponding variables
+- 0. The value function is computed with the odp/computeGraphs/MRAG_6D.py graph, passed to HJSolver as graph
 - 1. Define grid
 - 2. Instantiate the dynamics of the agent
 - 3. Generate initial values for grid using shape functions
@@ -129,7 +129,8 @@ solve_start_time = time.time()
 # plot_value_3agents(initial_attacker, initial_defender, [0, 1, 2], 0, avoid_set, grids)
 
 accuracy = "medium"
-result = HJSolver(agents_1v2, grids, [reach_set, avoid_set], tau, compMethods, po, saveAllTimeSteps=False, accuracy=accuracy) # original one
+result = HJSolver(agents_1v2, grids, [reach_set, avoid_set], tau, compMethods, po, saveAllTimeSteps=False, accuracy=accuracy,
+                  graph=MRAG_graph_6D) # original one
 process = psutil.Process(os.getpid())
 print(f"The CPU memory used during the calculation of the value function is {process.memory_info().rss/(1024 ** 3): .2f} GB.")  # in bytes
 
@@ -10,10 +10,11 @@ from MRAG.envs.AttackerDefender import AttackerDefender2vs1
 from odp.Plots import PlotOptions
 from odp.Plots.plotting_utilities import plot_isosurface, plot_valuefunction
 from odp.solver import HJSolver
+from odp.computeGraphs.MRAG_6D import graph_6D as MRAG_graph_6D
 
 
 """ USER INTERFACES
-- 0. This file needs to be run with the MRAG/values_calculation/MRAG_6D.py file, replace the original odp/computeGraphs/graph_6D.py with the MRAG_6D.py
+- 0. The value function is computed with the odp/computeGraphs/MRAG_6D.py graph, passed to HJSolver as graph
 - 1. Initialize the grids
 - 2. Initialize the dynamics
 - 3. Instruct the avoid set and reach set
@@ -180,7 +181,8 @@ po = PlotOptions(do_plot=True, plot_type="set", plotDims=[0, 1], slicesCut=[2, 2
 # 5. Call HJSolver function
 compMethods = {"TargetSetMode": "minVWithVTarget", "ObstacleSetMode": "maxVWithObstacle"} # original one
 solve_start_time = time.time()
-result = HJSolver(agents_2v1, grids, [reach_set, avoid_set], tau, compMethods, po, saveAllTimeSteps=False, accuracy="medium") # original one
+result = HJSolver(agents_2v1, grids, [reach_set, avoid_set], tau, compMethods, po, saveAllTimeSteps=False, accuracy="medium",
+                  graph=MRAG_graph_6D) # original one
 
 process = psutil.Process(os.getpid())
 print(f"The CPU memory used during the calculation of the value function is {process.memory_info().rss/(1e9): .2f} GB.")  # in bytes
@@ -1,5 +1,5 @@
+import itertools
 import numpy as np
-import math
 
 
 class Grid:
@@ -50,26 +50,108 @@ class Grid:
             tmp = np.reshape(tmp, tuple(broadcast_map))
             self.vs.append(tmp)
 
+    def get_indices(self, states):
+        """ Returns the closest grid index of each of a batch of states
+
+        Uses the uniform spacing of the grid, round((s - min) / dx), ties are rounded up.
+        Indices wrap around in periodic dimensions and are clipped to the grid otherwise.
+
+        Args:
+            states (np.ndarray): (N, dims) array of states, a single (dims,) state is also accepted
+
+        Returns:
+            np.ndarray: (N, dims) integer array of indices, (dims,) for a single state
+        """
+        states = np.asarray(states, dtype=float)
+        pts_each_dim = np.asarray(self.pts_each_dim)
+        indices = np.floor((states - np.asarray(self.min, dtype=float)) / np.asarray(self.dx, dtype=float) + 0.5)
+        indices = indices.astype(np.int64)
+
+        periodic = np.isin(np.arange(self.dims), self.pDim)
+        return np.where(periodic, np.mod(indices, pts_each_dim), np.clip(indices, 0, pts_each_dim - 1))
+
+    def get_values(self, V, states):
+        """Obtain the approximate values of a batch of states
+
+        Args:
+            V (np.array): value function of solved HJ PDE
+            states (np.ndarray): (N, dims) array of states
+
+        Returns:
+            np.ndarray: (N,) array of V(state)
+        """
+        indices = self.get_indices(states)
+        return V[tuple(np.moveaxis(indices, -1, 0))]
+
+    def _cell_of(self, states):
+        # Lower and upper corner indices of the grid cell containing each state and the position in it
+        pts_each_dim = np.asarray(self.pts_each_dim)
+        position = (states - np.asarray(self.min, dtype=float)) / np.asarray(self.dx, dtype=float)
+        lower = np.floor(position).astype(np.int64)
+
+        periodic = np.isin(np.arange(self.dims), self.pDim)
+        # Outside of a non-periodic dimension the interpolation is clamped to the boundary value
+        clipped = np.clip(lower, 0, pts_each_dim - 2)
+        frac = np.where(periodic, position - lower, np.clip(position - clipped, 0.0, 1.0))
+        lower = np.where(periodic, np.mod(lower, pts_each_dim), clipped)
+        upper = np.where(periodic, np.mod(lower + 1, pts_each_dim), lower + 1)
+        return lower, upper, frac
+
+    def interpolate_value(self, V, states):
+        """Multilinear interpolation of V at a batch of states
+
+        Args:
+            V (np.array): value function of solved HJ PDE
+            states (np.ndarray): (N, dims) array of states, a single (dims,) state is also accepted
+
+        Returns:
+            np.ndarray: (N,) array of interpolated values, a float for a single state
+        """
+        states = np.asarray(states, dtype=float)
+        lower, upper, frac = self._cell_of(np.atleast_2d(states))
+
+        # All 2^dims corners of the cells at once, (N, 2^dims, dims)
+        corners = np.array(list(itertools.product((False, True), repeat=self.dims)))
+        index = np.where(corners, upper[:, None, :], lower[:, None, :])
+        weights = np.prod(np.where(corners, frac[:, None, :], 1.0 - frac[:, None, :]), axis=2)
+        values = np.sum(weights * V[tuple(np.moveaxis(index, -1, 0))], axis=1)
+        return values if states.ndim > 1 else float(values[0])
+
+    def interpolate_gradient(self, V, states):
+        """Spatial gradient of the multilinear interpolation of V at a batch of states
+
+        Args:
+            V (np.array): value function of solved HJ PDE
+            states (np.ndarray): (N, dims) array of states, a single (dims,) state is also accepted
+
+        Returns:
+            np.ndarray: (N, dims) array of gradients, (dims,) for a single state
+        """
+        states = np.asarray(states, dtype=float)
+        lower, upper, frac = self._cell_of(np.atleast_2d(states))
+        dx = np.asarray(self.dx, dtype=float)
+
+        # All 2^dims corners of the cells at once, (N, 2^dims, dims)
+        corners = np.array(list(itertools.product((False, True), repeat=self.dims)))
+        index = np.where(corners, upper[:, None, :], lower[:, None, :])
+        weights = np.where(corners, frac[:, None, :], 1.0 - frac[:, None, :])
+        corner_values = V[tuple(np.moveaxis(index, -1, 0))]
+
+        gradients = np.zeros(frac.shape)
+        for dim in range(self.dims):
+            # d/dx of the weight along dim is +-1/dx, the other weights are unchanged
+            others = np.prod(np.delete(weights, dim, axis=2), axis=2)
+            signs = np.where(corners[:, dim], 1.0, -1.0)
+            gradients[:, dim] = np.sum(signs / dx[dim] * others * corner_values, axis=1)
+        return gradients if states.ndim > 1 else gradients[0]
+
     def get_index(self, state):
         """ Returns a tuple of the closest index of each state in the grid
 
         Args:
             state (tuple): state of dynamic object
         """
-        index = []
-
-        for i, s in enumerate(state):
-            idx = np.searchsorted(self.grid_points[i], s)
-            if idx > 0 and (
-                idx == len(self.grid_points[i])
-                or math.fabs(s - self.grid_points[i][idx - 1])
-                < math.fabs(s - self.grid_points[i][idx])
-            ):
-                index.append(idx - 1)
-            else:
-                index.append(idx)
-
-        return tuple(index)
+        return tuple(int(i) for i in self.get_indices(state))
 
     def get_value(self, V, state):
         """Obtain the approximate value of a state
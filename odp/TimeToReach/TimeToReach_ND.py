@@ -0,0 +1,148 @@
+import heterocl as hcl
+import numpy as np
+from odp.computeGraphs.CustomGraphFunctions import *
+from odp.spatialDerivatives.ENO_ND import spa_deriv_ND
+from odp.schedule import apply_schedule, ttr_schedule
+
+# Dimension-generic counterpart of TimeToReach_1D ... TimeToReach_6D, grid points are index tuples
+
+def _for_dims(phi, loop_dims, body, bounds=None, prefix="i", idx=None):
+    # Nested hcl.for_ loops over loop_dims, the other coordinates of idx are kept fixed
+    if idx is None:
+        idx = [None] * len(phi.shape)
+    if len(loop_dims) == 0:
+        body(tuple(idx))
+        return
+    dim = loop_dims[0]
+    low, high = bounds[dim] if bounds is not None else (0, phi.shape[dim])
+    with hcl.for_(low, high, name="{}{}".format(prefix, dim)) as i:
+        idx[dim] = i
+        _for_dims(phi, loop_dims[1:], body, bounds, prefix, idx)
+
+
+# Update the phi function at the index tuple idx
+def updatePhi_ND(idx, my_object, phi, g, x):
+    dims = len(idx)
+    dV_dx_L = [hcl.scalar(0, "dV_dx{}_L".format(dim + 1)) for dim in range(dims)]
+    dV_dx_R = [hcl.scalar(0, "dV_dx{}_R".format(dim + 1)) for dim in range(dims)]
+    dV_dx = [hcl.scalar(0, "dV_dx{}".format(dim + 1)) for dim in range(dims)]
+    for dim in range(dims):
+        dV_dx_L[dim][0], dV_dx_R[dim][0] = spa_deriv_ND(idx, phi, g, dim)
+        # Calculate average gradient
+        dV_dx[dim][0] = (dV_dx_L[dim][0] + dV_dx_R[dim][0]) / 2
+
+    state = tuple(x[dim][idx[dim]] for dim in range(dims))
+    derivs = tuple(dV_dx[dim][0] for dim in range(dims))
+
+    # Find the optimal control through my_object's API
+    uOpt = my_object.opt_ctrl(0, state, derivs)
+    dOpt = my_object.opt_dstb(0, state, derivs)
+
+    # Calculate dynamical rates of changes
+    dx_dt = my_object.dynamics(0, state, uOpt, dOpt)
+
+    H = hcl.scalar(0, "H")
+    phiNew = hcl.scalar(0, "phiNew")
+
+    # Calculate Hamiltonian terms:
+    H[0] = -(sum(dx_dt[dim] * dV_dx[dim][0] for dim in range(dims)) + 1)
+
+    # Calculate the "dissipation"
+    sigma = [hcl.scalar(0, "sigma{}".format(dim + 1)) for dim in range(dims)]
+    diss = [hcl.scalar(0, "diss{}".format(dim + 1)) for dim in range(dims)]
+    c = hcl.scalar(0, "c")
+    for dim in range(dims):
+        sigma[dim][0] = my_abs(dx_dt[dim])
+    c[0] = sum(sigma[dim][0] / g.dx[dim] for dim in range(dims))
+    for dim in range(dims):
+        diss[dim][0] = sigma[dim][0] * ((dV_dx_R[dim][0] - dV_dx_L[dim][0]) / 2 + phi[idx] / g.dx[dim])
+
+    # New phi
+    phiNew[0] = (-H[0] + sum(diss[dim][0] for dim in range(dims))) / c[0]
+    phi[idx] = my_min(phi[idx], phiNew[0])
+
+
+def EvalBoundary_ND(phi, g):
+    dims = len(phi.shape)
+    for dim in range(dims):
+        if dim in g.pDim:
+            continue
+        n = phi.shape[dim]
+
+        def extrapolate(idx, dim=dim, n=n):
+            def at(index):
+                return phi[idx[:dim] + (index,) + idx[dim + 1:]]
+
+            def set_at(index, value):
+                phi[idx[:dim] + (index,) + idx[dim + 1:]] = value
+
+            tmp1 = hcl.scalar(0, "tmp1")
+            tmp1[0] = 2 * at(1) - at(2)
+            tmp1[0] = my_max(tmp1[0], at(2))
+            set_at(0, my_min(tmp1[0], at(0)))
+
+            tmp2 = hcl.scalar(0, "tmp2")
+            tmp2[0] = 2 * at(n - 2) - at(n - 3)
+            tmp2[0] = my_max(tmp2[0], at(n - 3))
+            set_at(n - 1, my_min(tmp2[0], at(n - 1)))
+
+        # Loops named b0, b1, ... so that the sweep loop i0 stays unique within its stage
+        _for_dims(phi, [d for d in range(dims) if d != dim], extrapolate, prefix="b")
+
+
+# Returns 0 if convergence has been reached
+def evaluateConvergence(newV, oldV, epsilon, reSweep):
+    delta = hcl.scalar(0, "delta")
+    # Calculate the difference, if it's negative, make it positive
+    delta[0] = newV[0] - oldV[0]
+    with hcl.if_(delta[0] < 0):
+        delta[0] = delta[0] * -1
+    with hcl.if_(delta[0] > epsilon[0]):
+        reSweep[0] = 1
+
+######################################### TIME-TO-REACH COMPUTATION ##########################################
+
+def sweep_directions(dims):
+    # Dimensions swept backwards in each of the 2^dims sweeps, sweep k reverses the dimensions of the bits set in k
+    return [tuple(dim for dim in range(dims) if sweep >> dim & 1) for sweep in range(2 ** dims)]
+
+
+def TTR_ND(my_object, g, schedule=None):
+    # schedule (ScheduleOptions) controls the fusion/split/parallelization of the sweep loops, see ttr_schedule
+    dims = g.dims
+    if schedule is None:
+        schedule = ttr_schedule(dims)
+
+    def solve_phiNew(phi, *x):
+        # Non-periodic boundaries are set by EvalBoundary_ND instead of the sweeps
+        bounds = [(0, phi.shape[dim]) if dim in g.pDim else (1, phi.shape[dim] - 1) for dim in range(dims)]
+
+        for sweep, reversed_dims in enumerate(sweep_directions(dims)):
+            def update(idx, reversed_dims=reversed_dims):
+                idx = tuple(phi.shape[dim] - idx[dim] - 1 if dim in reversed_dims else idx[dim]
+                            for dim in range(dims))
+                updatePhi_ND(idx, my_object, phi, g, x)
+
+            # Perform value iteration by sweeping in direction sweep + 1
+            with hcl.Stage("Sweep_{}".format(sweep + 1)):
+                _for_dims(phi, list(range(dims)), update, bounds)
+                EvalBoundary_ND(phi, g)
+
+    ###################################### SETUP PLACEHOLDERS ######################################
+
+    # Initialize the HCL environment
+    hcl.init()
+    hcl.config.init_dtype = hcl.Float()
+
+    # Positions vector
+    xs = [hcl.placeholder((g.pts_each_dim[dim],), name="x{}".format(dim + 1), dtype=hcl.Float()) for dim in range(dims)]
+    phi = hcl.placeholder(tuple(g.pts_each_dim), name="phi", dtype=hcl.Float())
+
+    # Create a static schedule -- graph
+    s = hcl.create_schedule([phi] + xs, solve_phiNew)
+    for sweep in range(2 ** dims):
+        stage = getattr(solve_phiNew, "Sweep_{}".format(sweep + 1))
+        apply_schedule(s, stage, dims, schedule)
+
+    # Build an executable and return
+    return hcl.build(s)
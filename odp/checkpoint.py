@@ -0,0 +1,62 @@
+import os
+import numpy as np
+
+""" Checkpoints of the HJSolver time loop
+
+A checkpoint holds everything needed to continue an interrupted computation: the current value function V_0,
+tNow, the index of the tau interval being integrated, the iteration count and kernel time, the convergence
+state and, when the time slices are kept in memory, the slices computed so far.
+"""
+
+
+def save_checkpoint(path, V, tNow, tau_index, tau, iteration, execution_time, converged=False, valfuncs=None):
+    """Atomically writes a checkpoint, a crash during the write leaves the previous checkpoint intact
+
+    Args:
+        path (str): path of the checkpoint (.npz) file
+        V (np.ndarray): current value function V_0
+        tNow (float): time reached inside the current tau interval
+        tau_index (int): index i of the interval [tau[i-1], tau[i]] being integrated
+        tau (np.ndarray): time horizon of the computation
+        iteration (int): number of kernel calls so far
+        execution_time (float): kernel time so far
+        converged (bool, optional): whether untilConvergent already terminated. Defaults to False.
+        valfuncs (np.ndarray, optional): in-memory time slices computed so far. Defaults to None.
+    """
+    state = {"V": np.asarray(V, dtype=np.float32), "tNow": np.float64(tNow), "tau_index": np.int64(tau_index),
+             "tau": np.asarray(tau), "iteration": np.int64(iteration),
+             "execution_time": np.float64(execution_time), "converged": np.bool_(converged)}
+    if valfuncs is not None:
+        state["valfuncs"] = valfuncs
+
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **state)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, grid, tau):
+    """Loads a checkpoint and checks that it belongs to the same computation
+
+    Args:
+        path (str): path of the checkpoint (.npz) file
+        grid (Grid): grid of the computation being resumed
+        tau (np.ndarray): time horizon of the computation being resumed
+
+    Returns:
+        dict: the fields written by save_checkpoint
+    """
+    with np.load(path) as data:
+        checkpoint = {key: data[key] for key in data.files}
+
+    assert checkpoint["V"].shape == tuple(grid.pts_each_dim), \
+        "Checkpoint value function shape {} does not match the grid".format(checkpoint["V"].shape)
+    assert len(checkpoint["tau"]) == len(tau) and np.allclose(checkpoint["tau"], tau), \
+        "Checkpoint was written for a different tau"
+
+    for key in ["tNow", "execution_time"]:
+        checkpoint[key] = float(checkpoint[key])
+    for key in ["tau_index", "iteration"]:
+        checkpoint[key] = int(checkpoint[key])
+    checkpoint["converged"] = bool(checkpoint["converged"])
+    return checkpoint
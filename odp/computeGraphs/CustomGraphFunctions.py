@@ -55,6 +55,24 @@ def my_sign(x):
         sign[0] = -1
     return sign[0]
 
+# Apply the obstacle to V_new and reduce max |V_new - V_init| into max_diff[0] in one pass over the grid,
+# so that HJSolver only reads back a scalar per time step. Works for any number of dimensions.
+def obstacle_convergence(V_new, V_init, obstacle, max_diff, obstacleMode):
+    def update(*x):
+        if obstacleMode == "maxVWithObstacle":
+            with hcl.if_(V_new[x] < obstacle[x]):
+                V_new[x] = obstacle[x]
+        if obstacleMode == "minVWithObstacle":
+            with hcl.if_(V_new[x] > obstacle[x]):
+                V_new[x] = obstacle[x]
+        diff = hcl.scalar(0, "diff")
+        diff[0] = my_abs(V_new[x] - V_init[x])
+        with hcl.if_(diff[0] > max_diff[0]):
+            max_diff[0] = diff[0]
+
+    hcl.update(max_diff, lambda x: 0, "reset_max_diff")
+    hcl.mutate(V_new.shape, update, "obstacle_convergence")
+
 # ########################## 3D SPATIAL DERIVATIVE FUNCTION #################################
 #
 # def spa_derivX(i, j, k, V, g):
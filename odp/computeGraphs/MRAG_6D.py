@@ -1,20 +1,17 @@
 import heterocl as hcl
 from odp.computeGraphs.CustomGraphFunctions import *
-<<<<<<< HEAD
-from odp.spatialDerivatives.first_orderENO6D import *
-from odp.spatialDerivatives.second_orderENO6D import *
-=======
 from odp.spatialDerivatives.firstOrderENO.first_orderENO6D import *
 from odp.spatialDerivatives.secondOrderENO.second_orderENO6D import *
->>>>>>> dev_hhy
 
 ########################## 6D graph definition ########################
 
 # Note that t has 2 elements t1, t2
-def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1):
+def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1, obstacleMode=None):
     V_f = hcl.placeholder(tuple(g.pts_each_dim), name="V_f", dtype=hcl.Float())
     V_init = hcl.placeholder(tuple(g.pts_each_dim), name="V_init", dtype=hcl.Float())
     l0 = hcl.placeholder(tuple(g.pts_each_dim), name="l0", dtype=hcl.Float())
+    obstacle = hcl.placeholder(tuple(g.pts_each_dim), name="obstacle", dtype=hcl.Float())
+    max_diff = hcl.placeholder((1,), name="max_diff", dtype=hcl.Float())
     t = hcl.placeholder((2,), name="t", dtype=hcl.Float())
 
     # Positions vector
@@ -25,7 +22,7 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
     x5 = hcl.placeholder((g.pts_each_dim[4],), name="x5", dtype=hcl.Float())
     x6 = hcl.placeholder((g.pts_each_dim[5],), name="x6", dtype=hcl.Float())
 
-    def graph_create(V_new, V_init, x1, x2, x3, x4, x5, x6, t, l0):
+    def graph_create(V_new, V_init, x1, x2, x3, x4, x5, x6, t, l0, obstacle, max_diff):
         # Specify intermediate tensors
         # deriv_diff1 = hcl.compute(V_init.shape, lambda *x: 0, "deriv_diff1")
         # deriv_diff2 = hcl.compute(V_init.shape, lambda *x: 0, "deriv_diff2")
@@ -35,16 +32,6 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
         # deriv_diff6 = hcl.compute(V_init.shape, lambda *x: 0, "deriv_diff6")
 
         # These variables are used to dissipation calculation
-<<<<<<< HEAD
-        max_alpha1 = hcl.scalar(my_object.speed_a, "max_alpha1")
-        max_alpha2 = hcl.scalar(my_object.speed_a, "max_alpha2")
-        max_alpha3 = hcl.scalar(my_object.speed_d, "max_alpha3")  #Hanyang: modify this to be consistent with dynamics 
-        max_alpha4 = hcl.scalar(my_object.speed_d, "max_alpha4")
-        # max_alpha3 = hcl.scalar(my_object.speed_a, "max_alpha3")  
-        # max_alpha4 = hcl.scalar(my_object.speed_a, "max_alpha4")
-        max_alpha5 = hcl.scalar(my_object.speed_d, "max_alpha5")
-        max_alpha6 = hcl.scalar(my_object.speed_d, "max_alpha6")
-=======
         max_alpha1 = hcl.scalar(my_object.attackers.speed, "max_alpha1")
         max_alpha2 = hcl.scalar(my_object.attackers.speed, "max_alpha2")
         max_alpha3 = hcl.scalar(my_object.defenders.speed, "max_alpha3")  #Hanyang: modify this to be consistent with dynamics 
@@ -53,7 +40,6 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
         # max_alpha4 = hcl.scalar(my_object.attackers.speed, "max_alpha4")
         max_alpha5 = hcl.scalar(my_object.defenders.speed, "max_alpha5")
         max_alpha6 = hcl.scalar(my_object.defenders.speed, "max_alpha6")
->>>>>>> dev_hhy
 
         def step_bound():  # Function to calculate time step
             stepBoundInv = hcl.scalar(0, "stepBoundInv")
@@ -134,15 +120,6 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                                         dV_dx4_L[0], dV_dx4_R[0] = spa_derivX4_6d(i, j, k, l, m, n, V_init, g)
                                         dV_dx5_L[0], dV_dx5_R[0] = spa_derivX5_6d(i, j, k, l, m, n, V_init, g)
                                         dV_dx6_L[0], dV_dx6_R[0] = spa_derivX6_6d(i, j, k, l, m, n, V_init, g)
-<<<<<<< HEAD
-                                    if accuracy == "high":
-                                        dV_dx1_L[0], dV_dx1_R[0] = secondOrderX1_6d(i, j, k, l, m, n, V_init, g)
-                                        dV_dx2_L[0], dV_dx2_R[0] = secondOrderX2_6d(i, j, k, l, m, n, V_init, g)
-                                        dV_dx3_L[0], dV_dx3_R[0] = secondOrderX3_6d(i, j, k, l, m, n, V_init, g)
-                                        dV_dx4_L[0], dV_dx4_R[0] = secondOrderX4_6d(i, j, k, l, m, n, V_init, g)
-                                        dV_dx5_L[0], dV_dx5_R[0] = secondOrderX5_6d(i, j, k, l, m, n, V_init, g)
-                                        dV_dx6_L[0], dV_dx6_R[0] = secondOrderX6_6d(i, j, k, l, m, n, V_init, g)
-=======
                                     if accuracy == "medium":
                                         dV_dx1_L[0], dV_dx1_R[0] = secondOrder_ENO6D_X0(i, j, k, l, m, n, V_init, g)
                                         dV_dx2_L[0], dV_dx2_R[0] = secondOrder_ENO6D_X1(i, j, k, l, m, n, V_init, g)
@@ -151,7 +128,6 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                                         dV_dx5_L[0], dV_dx5_R[0] = secondOrder_ENO6D_X4(i, j, k, l, m, n, V_init, g)
                                         dV_dx6_L[0], dV_dx6_R[0] = secondOrder_ENO6D_X5(i, j, k, l, m, n, V_init, g)
 
->>>>>>> dev_hhy
 
                                     # Saves spatial derivative diff into tables
                                     deriv_diff1[0] = dV_dx1_R[0] - dV_dx1_L[0]
@@ -186,16 +162,6 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                                                 dV_dx4[0] + dx5_dt * dV_dx5[0] + dx6_dt * dV_dx6[0])
 
                                     # Directly add the dissipation here
-<<<<<<< HEAD
-                                    alpha1 = hcl.scalar(my_object.speed_a, "alpha1")
-                                    alpha2 = hcl.scalar(my_object.speed_a, "alpha2")  
-                                    alpha3 = hcl.scalar(my_object.speed_d, "alpha3")  # Hanyang: modify this to be consistent with dynamics
-                                    alpha4 = hcl.scalar(my_object.speed_d, "alpha4")
-                                    # alpha3 = hcl.scalar(my_object.speed_a, "alpha3")
-                                    # alpha4 = hcl.scalar(my_object.speed_a, "alpha4")
-                                    alpha5 = hcl.scalar(my_object.speed_d, "alpha5")
-                                    alpha6 = hcl.scalar(my_object.speed_d, "alpha6")
-=======
                                     alpha1 = hcl.scalar(my_object.attackers.speed, "alpha1")
                                     alpha2 = hcl.scalar(my_object.attackers.speed, "alpha2")  
                                     alpha3 = hcl.scalar(my_object.defenders.speed, "alpha3")  # Hanyang: modify this to be consistent with dynamics
@@ -204,7 +170,6 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                                     # alpha4 = hcl.scalar(my_object.attackers.speed, "alpha4")
                                     alpha5 = hcl.scalar(my_object.defenders.speed, "alpha5")
                                     alpha6 = hcl.scalar(my_object.defenders.speed, "alpha6")
->>>>>>> dev_hhy
 
                                     diss = hcl.scalar(0, "diss")
                                     diss[0] = 0.5 * (deriv_diff1[0] * alpha1[0] + deriv_diff2[0] * alpha2[0] \
@@ -412,6 +377,9 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
             result = hcl.update(V_new, lambda i, j, k, l, m, n: maxVWithVInit(i, j, k, l, m, n))
         if compMethod == 'minVWithVInit':
             result = hcl.update(V_new, lambda i, j, k, l, m, n: minVWithVInit(i, j, k, l, m, n))
+        # Apply the obstacle and measure the change of V in the same pass
+        obstacle_convergence(V_new, V_init, obstacle, max_diff, obstacleMode)
+
         # Copy V_new to V_init
         hcl.update(V_init, lambda i, j, k, l, m, n: V_new[i, j, k, l, m, n])
         return result
@@ -441,19 +409,6 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                                             dV_dx_L[0], dV_dx_R[0] = spa_derivX6_6d(i, j, k, l, m, n, V_init, g)
                                     if accuracy == "medium":
                                         if deriv_dim == 1:
-<<<<<<< HEAD
-                                            dV_dx_L[0], dV_dx_R[0] = secondOrderX1_6d(i, j, k, l, m, n, V_init, g)
-                                        if deriv_dim == 2:
-                                            dV_dx_L[0], dV_dx_R[0] = secondOrderX2_6d(i, j, k, l, m, n, V_init, g)
-                                        if deriv_dim == 3:
-                                            dV_dx_L[0], dV_dx_R[0] = secondOrderX3_6d(i, j, k, l, m, n, V_init, g)
-                                        if deriv_dim == 4:
-                                            dV_dx_L[0], dV_dx_R[0] = secondOrderX4_6d(i, j, k, l, m, n, V_init, g)
-                                        if deriv_dim == 5:
-                                            dV_dx_L[0], dV_dx_R[0] = secondOrderX5_6d(i, j, k, l, m, n, V_init, g)
-                                        if deriv_dim == 6:
-                                            dV_dx_L[0], dV_dx_R[0] = secondOrderX6_6d(i, j, k, l, m, n, V_init, g)
-=======
                                             dV_dx_L[0], dV_dx_R[0] = secondOrder_ENO6D_X0(i, j, k, l, m, n, V_init, g)
                                         if deriv_dim == 2:
                                             dV_dx_L[0], dV_dx_R[0] = secondOrder_ENO6D_X1(i, j, k, l, m, n, V_init, g)
@@ -465,12 +420,11 @@ def graph_6D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                                             dV_dx_L[0], dV_dx_R[0] = secondOrder_ENO6D_X4(i, j, k, l, m, n, V_init, g)
                                         if deriv_dim == 6:
                                             dV_dx_L[0], dV_dx_R[0] = secondOrder_ENO6D_X5(i, j, k, l, m, n, V_init, g)
->>>>>>> dev_hhy
 
                                     Deriv_array[i, j, k, l, m, n] = (dV_dx_L[0] + dV_dx_R[0]) / 2
 
     if generate_SpatDeriv == False:
-        s = hcl.create_schedule([V_f, V_init, x1, x2, x3, x4, x5, x6, t, l0], graph_create)
+        s = hcl.create_schedule([V_f, V_init, x1, x2, x3, x4, x5, x6, t, l0, obstacle, max_diff], graph_create)
         ##################### CODE OPTIMIZATION HERE ###########################
         print("Optimizing\n")
 
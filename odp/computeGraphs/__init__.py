@@ -1,16 +1,10 @@
-<<<<<<< HEAD
-=======
 from odp.computeGraphs.graph_1D import graph_1D
->>>>>>> dev_hhy
 from odp.computeGraphs.graph_2D import graph_2D
 from odp.computeGraphs.graph_3D import graph_3D
 from odp.computeGraphs.graph_4D import graph_4D
 from odp.computeGraphs.graph_5D import graph_5D
-<<<<<<< HEAD
-from odp.computeGraphs.MRAG_6D import graph_6D
-from odp.computeGraphs.graph_7D_test import graph_7D
-from odp.computeGraphs.graph_8D_test import graph_8D
-=======
 from odp.computeGraphs.graph_6D import graph_6D  # Hanyang: for DubunCar dynamics
 # from odp.computeGraphs.MRAG_6D import graph_6D  # Hanyang: for Single Integrator dynamics
->>>>>>> dev_hhy
+from odp.computeGraphs.graph_7D_test import graph_7D
+from odp.computeGraphs.graph_8D_test import graph_8D
+from odp.computeGraphs.graph_ND import graph_ND
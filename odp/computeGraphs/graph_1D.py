@@ -6,17 +6,19 @@ from odp.spatialDerivatives.secondOrderENO.second_orderENO1D import *
 
 #from user_definer import *
 #def graph_1D(dynamics_obj, grid):
-def graph_1D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1):
+def graph_1D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1, obstacleMode=None):
     V_f = hcl.placeholder(tuple(g.pts_each_dim), name="V_f", dtype=hcl.Float())
     V_init = hcl.placeholder(tuple(g.pts_each_dim), name="V_init", dtype=hcl.Float())
     l0 = hcl.placeholder(tuple(g.pts_each_dim), name="l0", dtype=hcl.Float())
+    obstacle = hcl.placeholder(tuple(g.pts_each_dim), name="obstacle", dtype=hcl.Float())
+    max_diff = hcl.placeholder((1,), name="max_diff", dtype=hcl.Float())
     t = hcl.placeholder((2,), name="t", dtype=hcl.Float())
     # probe = hcl.placeholder(tuple(g.pts_each_dim), name="probe", dtype=hcl.Float())
 
     # Positions vector
     x1 = hcl.placeholder((g.pts_each_dim[0],), name="x1", dtype=hcl.Float())
 
-    def graph_create(V_new, V_init, x1, t, l0):
+    def graph_create(V_new, V_init, x1, t, l0, obstacle, max_diff):
         # Specify intermediate tensors
         deriv_diff1 = hcl.compute(V_init.shape, lambda *x: 0, "deriv_diff1")
 
@@ -196,6 +198,9 @@ def graph_1D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
         if compMethod == 'maxVWithVInit':
             result = hcl.update(V_new, lambda i: maxVWithVInit(i))
 
+        # Apply the obstacle and measure the change of V in the same pass
+        obstacle_convergence(V_new, V_init, obstacle, max_diff, obstacleMode)
+
         # Copy V_new to V_init
         hcl.update(V_init, lambda i: V_new[i])
         return result
@@ -215,7 +220,7 @@ def graph_1D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                 Deriv_array[i] = (dV_dx_L[0] + dV_dx_R[0]) / 2
 
     if generate_SpatDeriv == False:
-        s = hcl.create_schedule([V_f, V_init, x1, t, l0], graph_create)
+        s = hcl.create_schedule([V_f, V_init, x1, t, l0, obstacle, max_diff], graph_create)
         ##################### CODE OPTIMIZATION HERE ###########################
         print("Optimizing\n")
 
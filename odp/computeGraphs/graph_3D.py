@@ -6,10 +6,12 @@ from odp.spatialDerivatives.secondOrderENO.second_orderENO3D import *
 
 #from user_definer import *
 #def graph_3D(dynamics_obj, grid):
-def graph_3D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1):
+def graph_3D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1, obstacleMode=None):
     V_f = hcl.placeholder(tuple(g.pts_each_dim), name="V_f", dtype=hcl.Float())
     V_init = hcl.placeholder(tuple(g.pts_each_dim), name="V_init", dtype=hcl.Float())
     l0 = hcl.placeholder(tuple(g.pts_each_dim), name="l0", dtype=hcl.Float())
+    obstacle = hcl.placeholder(tuple(g.pts_each_dim), name="obstacle", dtype=hcl.Float())
+    max_diff = hcl.placeholder((1,), name="max_diff", dtype=hcl.Float())
     t = hcl.placeholder((2,), name="t", dtype=hcl.Float())
     probe = hcl.placeholder(tuple(g.pts_each_dim), name="probe", dtype=hcl.Float())
 
@@ -17,7 +19,7 @@ def graph_3D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
     x1 = hcl.placeholder((g.pts_each_dim[0],), name="x1", dtype=hcl.Float())
     x2 = hcl.placeholder((g.pts_each_dim[1],), name="x2", dtype=hcl.Float())
     x3 = hcl.placeholder((g.pts_each_dim[2],), name="x3", dtype=hcl.Float())
-    def graph_create(V_new, V_init, x1, x2, x3, t, l0):
+    def graph_create(V_new, V_init, x1, x2, x3, t, l0, obstacle, max_diff):
         # Specify intermediate tensors
         deriv_diff1 = hcl.compute(V_init.shape, lambda *x: 0, "deriv_diff1")
         deriv_diff2 = hcl.compute(V_init.shape, lambda *x: 0, "deriv_diff2")
@@ -280,6 +282,9 @@ def graph_3D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
         if compMethod == 'maxVWithVInit':
             result = hcl.update(V_new, lambda i, j, k: maxVWithVInit(i, j, k))
 
+        # Apply the obstacle and measure the change of V in the same pass
+        obstacle_convergence(V_new, V_init, obstacle, max_diff, obstacleMode)
+
         # Copy V_new to V_init
         hcl.update(V_init, lambda i, j, k: V_new[i, j, k])
         return result
@@ -309,7 +314,7 @@ def graph_3D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                         Deriv_array[i, j, k] = (dV_dx_L[0] + dV_dx_R[0]) / 2
 
     if generate_SpatDeriv == False:
-        s = hcl.create_schedule([V_f, V_init, x1, x2, x3, t, l0], graph_create)
+        s = hcl.create_schedule([V_f, V_init, x1, x2, x3, t, l0, obstacle, max_diff], graph_create)
         ##################### CODE OPTIMIZATION HERE ###########################
         print("Optimizing\n")
 
@@ -5,10 +5,12 @@ from odp.spatialDerivatives.firstOrderENO.first_orderENO4D import *
 from odp.spatialDerivatives.secondOrderENO.second_orderENO4D import *
 
 ########################## 4D Graph definition #################################
-def graph_4D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1):
+def graph_4D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1, obstacleMode=None):
     V_f = hcl.placeholder(tuple(g.pts_each_dim), name="V_f", dtype=hcl.Float())
     V_init = hcl.placeholder(tuple(g.pts_each_dim), name="V_init", dtype=hcl.Float())
     l0 = hcl.placeholder(tuple(g.pts_each_dim), name="l0", dtype=hcl.Float())
+    obstacle = hcl.placeholder(tuple(g.pts_each_dim), name="obstacle", dtype=hcl.Float())
+    max_diff = hcl.placeholder((1,), name="max_diff", dtype=hcl.Float())
     t = hcl.placeholder((2,), name="t", dtype=hcl.Float())
     probe = hcl.placeholder(tuple(g.pts_each_dim), name="probe", dtype=hcl.Float())
 
@@ -18,7 +20,7 @@ def graph_4D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
     x3 = hcl.placeholder((g.pts_each_dim[2],), name="x3", dtype=hcl.Float())
     x4 = hcl.placeholder((g.pts_each_dim[3],), name="x4", dtype=hcl.Float())
 
-    def graph_create(V_new, V_init, x1, x2, x3, x4, t, l0, probe):
+    def graph_create(V_new, V_init, x1, x2, x3, x4, t, l0, probe, obstacle, max_diff):
         # Specify intermediate tensors
         deriv_diff1 = hcl.compute(V_init.shape, lambda *x:0, "deriv_diff1")
         deriv_diff2 = hcl.compute(V_init.shape, lambda *x:0, "deriv_diff2")
@@ -352,6 +354,9 @@ def graph_4D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
         if compMethod == 'maxVWithVInit':
             result = hcl.update(V_new, lambda i, j, k, l: maxVWithVInit(i, j, k, l))
 
+        # Apply the obstacle and measure the change of V in the same pass
+        obstacle_convergence(V_new, V_init, obstacle, max_diff, obstacleMode)
+
         # Copy V_new to V_init
         hcl.update(V_init, lambda i, j, k, l: V_new[i, j, k, l])
         return result
@@ -386,7 +391,7 @@ def graph_4D(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv
                             Deriv_array[i, j, k, l] = (dV_dx_L[0] + dV_dx_R[0]) / 2
 
     if generate_SpatDeriv == False:
-        s = hcl.create_schedule([V_f, V_init, x1, x2, x3, x4, t, l0, probe], graph_create)
+        s = hcl.create_schedule([V_f, V_init, x1, x2, x3, x4, t, l0, probe, obstacle, max_diff], graph_create)
 
         ##################### CODE OPTIMIZATION HERE ###########################
         print("Optimizing\n")
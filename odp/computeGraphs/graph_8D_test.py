@@ -4,10 +4,12 @@ from odp.computeGraphs.CustomGraphFunctions import *
 from odp.spatialDerivatives.first_orderENO8D_test import *
 
 ########################## 8D graph definition ######################## 
-def graph_8D(my_object, g, compMethod, accuracy):
+def graph_8D(my_object, g, compMethod, accuracy, obstacleMode=None):
 	V_f = hcl.placeholder(tuple(g.pts_each_dim), name="V_f", dtype=hcl.Float())
 	V_init = hcl.placeholder(tuple(g.pts_each_dim), name="V_init", dtype=hcl.Float())
 	l0 = hcl.placeholder(tuple(g.pts_each_dim), name="l0", dtype=hcl.Float())
+	obstacle = hcl.placeholder(tuple(g.pts_each_dim), name="obstacle", dtype=hcl.Float())
+	max_diff = hcl.placeholder((1,), name="max_diff", dtype=hcl.Float())
 	t = hcl.placeholder((2,), name="t", dtype=hcl.Float())
 
 	x0 = hcl.placeholder((g.pts_each_dim[0],), name="x0", dtype=hcl.Float())
@@ -19,7 +21,7 @@ def graph_8D(my_object, g, compMethod, accuracy):
 	x6 = hcl.placeholder((g.pts_each_dim[6],), name="x6", dtype=hcl.Float())
 	x7 = hcl.placeholder((g.pts_each_dim[7],), name="x7", dtype=hcl.Float())
 
-	def graph_create(V_new, V_init, x0, x1, x2, x3, x4, x5, x6, x7, t, l0):
+	def graph_create(V_new, V_init, x0, x1, x2, x3, x4, x5, x6, x7, t, l0, obstacle, max_diff):
 		# Specify intermediate tensors
 		# deriv_diff0 = hcl.compute(V_init.shape, lambda *x: 0, "deriv_diff0")
 		# deriv_diff1 = hcl.compute(V_init.shape, lambda *x: 0, "deriv_diff1")
@@ -458,9 +460,12 @@ def graph_8D(my_object, g, compMethod, accuracy):
 			result = hcl.update(V_new, lambda i0, i1, i2, i3, i4, i5, i6, i7:  maxVWithVInit(i0, i1, i2, i3, i4, i5, i6, i7))
 		if compMethod == 'minVWithVInit' :
 			result = hcl.update(V_new, lambda i0, i1, i2, i3, i4, i5, i6, i7:  minVWithVInit(i0, i1, i2, i3, i4, i5, i6, i7))
+		# Apply the obstacle and measure the change of V in the same pass
+		obstacle_convergence(V_new, V_init, obstacle, max_diff, obstacleMode)
+
 		hcl.update(V_init, lambda i0, i1, i2, i3, i4, i5, i6, i7:  V_new[i0, i1, i2, i3, i4, i5, i6, i7])
 		return result
-	s = hcl.create_schedule([V_f, V_init, x0, x1, x2, x3, x4, x5, x6, x7, t, l0], graph_create)
+	s = hcl.create_schedule([V_f, V_init, x0, x1, x2, x3, x4, x5, x6, x7, t, l0, obstacle, max_diff], graph_create)
 	#Optimizing
 
 	s_H = graph_create.Hamiltonian
@@ -0,0 +1,341 @@
+import heterocl as hcl
+from odp.computeGraphs.CustomGraphFunctions import *
+from odp.spatialDerivatives.ENO_ND import spa_deriv_ND, secondOrder_ENO_ND
+from odp.numpyGraphs.frozen_cells import STENCIL_WIDTH
+from odp.schedule import apply_schedule
+
+########################## Dimension-generic graph definition #################################
+# One generator for the Hamiltonian, dissipation and step bound stages of any number of dimensions.
+# The loops over the grid are nested recursively and grid points are passed around as index tuples,
+# so the executable has the same arguments as graph_1D ... graph_8D: (V_new, V_init, x0, ..., x{N-1},
+# t, l0, obstacle, max_diff).
+
+def _for_all(shape, body, idx=()):
+    # Nested hcl.for_ loops named i0, i1, ... over shape, calls body with the index tuple
+    dim = len(idx)
+    if dim == len(shape):
+        body(idx)
+        return
+    with hcl.for_(0, shape[dim], name="i{}".format(dim)) as i:
+        _for_all(shape, body, idx + (i,))
+
+
+def _spatial_deriv(idx, V, g, dim, accuracy):
+    if accuracy == "low":
+        return spa_deriv_ND(idx, V, g, dim)
+    if accuracy == "medium":
+        return secondOrder_ENO_ND(idx, V, g, dim)
+    raise ValueError("Unsupported accuracy {}".format(accuracy))
+
+
+def _neighbour_index(i, offset, n, periodic):
+    # i + offset, wrapped around periodic dimensions and clamped to the grid otherwise
+    j = i + offset
+    if periodic:
+        return hcl.select(j < 0, j + n, hcl.select(j > n - 1, j - n, j))
+    return hcl.select(j < 0, 0, hcl.select(j > n - 1, n - 1, j))
+
+
+def _store(values, name):
+    # Keeps the entries of an opt_ctrl/opt_dstb/dynamics result in scalars named name1, name2, ...
+    scalars = []
+    for k, value in enumerate(values):
+        scalar = hcl.scalar(0, "{}{}".format(name, k + 1))
+        scalar[0] = value
+        scalars.append(scalar)
+    return scalars
+
+
+def graph_ND(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1, obstacleMode=None,
+             schedule=None, low_memory=False, narrowBand=False, freezeCells=False, constant_alpha=None):
+    """Builds the HeteroCL executable of one Lax-Friedrichs time step for a grid of any dimension
+
+    Args:
+        my_object: dynamics object providing opt_ctrl, opt_dstb and dynamics
+        g (Grid): the grid of the value function
+        compMethod (str): TargetSetMode of the computation
+        accuracy (str): "low" (first order ENO) or "medium" (second order ENO)
+        generate_SpatDeriv (bool, optional): build the spatial derivative executable instead. Defaults to False.
+        deriv_dim (int, optional): 1-indexed dimension used when generate_SpatDeriv is True. Defaults to 1.
+        obstacleMode (str, optional): ObstacleSetMode applied with the obstacle argument. Defaults to None.
+        schedule (ScheduleOptions, optional): loop fusion/split/parallel options of the Hamiltonian and
+            Dissipation stages. Defaults to None, parallelizing the outermost axis only.
+        low_memory (bool, optional): recompute the one-sided derivatives in the Dissipation stage instead of
+            keeping dims grid-sized deriv_diff tensors between the two stages. Defaults to False.
+        narrowBand (bool, optional): the executable takes the extra band, band_border and band_exit arguments
+            after max_diff (see odp.narrow_band). Only the cells where band is positive are updated, and
+            band_exit[0] is set to 1 when a cell where band_border is positive changes sign. Defaults to False.
+        freezeCells (bool, optional): the executable takes the extra counts and freeze = [steps, tolerance]
+            arguments after the band arguments (see odp.numpyGraphs.frozen_cells). The cells stationary for
+            freeze[0] steps whose stencil is stationary too are skipped, and counts is updated. Defaults to False.
+        constant_alpha (list, optional): fixed dissipation coefficient of every dimension, used instead of
+            evaluating the dynamics at the derivative bounds, also for the step bound. This is the dissipation of
+            the MRAG_6D variant the SIG 6D values were computed with. Defaults to None.
+
+    Returns:
+        the executable built by hcl.build
+    """
+    dims = g.dims
+    V_f = hcl.placeholder(tuple(g.pts_each_dim), name="V_f", dtype=hcl.Float())
+    V_init = hcl.placeholder(tuple(g.pts_each_dim), name="V_init", dtype=hcl.Float())
+    l0 = hcl.placeholder(tuple(g.pts_each_dim), name="l0", dtype=hcl.Float())
+    obstacle = hcl.placeholder(tuple(g.pts_each_dim), name="obstacle", dtype=hcl.Float())
+    max_diff = hcl.placeholder((1,), name="max_diff", dtype=hcl.Float())
+    band = hcl.placeholder(tuple(g.pts_each_dim), name="band", dtype=hcl.Float())
+    band_border = hcl.placeholder(tuple(g.pts_each_dim), name="band_border", dtype=hcl.Float())
+    band_exit = hcl.placeholder((1,), name="band_exit", dtype=hcl.Float())
+    band_args = [band, band_border, band_exit] if narrowBand else []
+    counts = hcl.placeholder(tuple(g.pts_each_dim), name="counts", dtype=hcl.Float())
+    freeze = hcl.placeholder((2,), name="freeze", dtype=hcl.Float())
+    freeze_args = [counts, freeze] if freezeCells else []
+    t = hcl.placeholder((2,), name="t", dtype=hcl.Float())
+
+    # Positions vector
+    xs = [hcl.placeholder((g.pts_each_dim[dim],), name="x{}".format(dim), dtype=hcl.Float()) for dim in range(dims)]
+
+    def graph_create(V_new, V_init, *args):
+        x = args[:dims]
+        t, l0, obstacle, max_diff = args[dims:dims + 4]
+        if narrowBand:
+            band, band_border, band_exit = args[dims + 4:dims + 7]
+        if freezeCells:
+            counts, freeze = args[dims + 7 if narrowBand else dims + 4:]
+
+        # Specify intermediate tensors, V_init is only overwritten after the Dissipation stage so that the
+        # low-memory mode can recompute R - L from it
+        if not low_memory:
+            deriv_diff = [hcl.compute(V_init.shape, lambda *idx: 0, "deriv_diff{}".format(dim + 1)) for dim in range(dims)]
+
+        def derivative_diff(idx, dim):
+            if not low_memory:
+                return deriv_diff[dim][idx]
+            dV_dx_L = hcl.scalar(0, "dV_dx{}_L".format(dim + 1))
+            dV_dx_R = hcl.scalar(0, "dV_dx{}_R".format(dim + 1))
+            dV_dx_L[0], dV_dx_R[0] = _spatial_deriv(idx, V_init, g, dim, accuracy)
+            return dV_dx_R[0] - dV_dx_L[0]
+
+        # Maximum and minimum derivative for each dim
+        max_deriv = [hcl.scalar(-1e9, "max_deriv{}".format(dim + 1)) for dim in range(dims)]
+        min_deriv = [hcl.scalar(1e9, "min_deriv{}".format(dim + 1)) for dim in range(dims)]
+
+        # These variables are used to dissipation calculation
+        max_alpha = [hcl.scalar(-1e9 if constant_alpha is None else constant_alpha[dim], "max_alpha{}".format(dim + 1))
+                     for dim in range(dims)]
+
+        def step_bound():  # Function to calculate time step
+            stepBoundInv = hcl.scalar(0, "stepBoundInv")
+            stepBound = hcl.scalar(0, "stepBound")
+            stepBoundInv[0] = sum(max_alpha[dim][0] / g.dx[dim] for dim in range(dims))
+            stepBound[0] = 0.8 / stepBoundInv[0]
+            with hcl.if_(stepBound > t[1] - t[0]):
+                stepBound[0] = t[1] - t[0]
+            t[0] = t[0] + stepBound[0]
+            return stepBound[0]
+
+        def state(idx):
+            return tuple(x[dim][idx[dim]] for dim in range(dims))
+
+        # Min with V_before
+        def minVWithVInit(*idx):
+            with hcl.if_(V_new[idx] > V_init[idx]):
+                V_new[idx] = V_init[idx]
+
+        def maxVWithVInit(*idx):
+            with hcl.if_(V_new[idx] < V_init[idx]):
+                V_new[idx] = V_init[idx]
+
+        def maxVWithV0(*idx):  # Take the max
+            with hcl.if_(V_new[idx] < l0[idx]):
+                V_new[idx] = l0[idx]
+
+        def minVWithV0(*idx):
+            with hcl.if_(V_new[idx] > l0[idx]):
+                V_new[idx] = l0[idx]
+
+        def hamiltonian(idx):
+            dV_dx = []
+            for dim in range(dims):
+                dV_dx_L = hcl.scalar(0, "dV_dx{}_L".format(dim + 1))
+                dV_dx_R = hcl.scalar(0, "dV_dx{}_R".format(dim + 1))
+                dV_dx_L[0], dV_dx_R[0] = _spatial_deriv(idx, V_init, g, dim, accuracy)
+
+                # Saves spatial derivative diff into tables
+                if not low_memory:
+                    deriv_diff[dim][idx] = dV_dx_R[0] - dV_dx_L[0]
+
+                # Calculate average gradient
+                dV_dx_C = hcl.scalar(0, "dV_dx{}".format(dim + 1))
+                dV_dx_C[0] = (dV_dx_L[0] + dV_dx_R[0]) / 2
+                dV_dx.append(dV_dx_C[0])
+
+                # Get derivMin and derivMax
+                with hcl.if_(dV_dx_L[0] < min_deriv[dim][0]):
+                    min_deriv[dim][0] = dV_dx_L[0]
+                with hcl.if_(dV_dx_R[0] < min_deriv[dim][0]):
+                    min_deriv[dim][0] = dV_dx_R[0]
+                with hcl.if_(dV_dx_L[0] > max_deriv[dim][0]):
+                    max_deriv[dim][0] = dV_dx_L[0]
+                with hcl.if_(dV_dx_R[0] > max_deriv[dim][0]):
+                    max_deriv[dim][0] = dV_dx_R[0]
+
+            uOpt = my_object.opt_ctrl(t, state(idx), tuple(dV_dx))
+            dOpt = my_object.opt_dstb(t, state(idx), tuple(dV_dx))
+
+            # Calculate dynamical rates of changes
+            dx_dt = my_object.dynamics(t, state(idx), uOpt, dOpt)
+
+            # Calculate Hamiltonian terms:
+            V_new[idx] = -sum(dx_dt[dim] * dV_dx[dim] for dim in range(dims))
+
+        def constant_dissipation(idx):
+            diss = hcl.scalar(0, "diss")
+            diss[0] = 0.5 * sum(derivative_diff(idx, dim) * constant_alpha[dim] for dim in range(dims))
+            V_new[idx] = -(V_new[idx] - diss[0])
+
+        def dissipation(idx):
+            min_derivs = tuple(min_deriv[dim][0] for dim in range(dims))
+            max_derivs = tuple(max_deriv[dim][0] for dim in range(dims))
+
+            # Find LOWER and UPPER BOUND optimal disturbance and control
+            dOptL = _store(my_object.opt_dstb(t, state(idx), min_derivs), "dOptL")
+            dOptU = _store(my_object.opt_dstb(t, state(idx), max_derivs), "dOptU")
+            uOptL = _store(my_object.opt_ctrl(t, state(idx), min_derivs), "uOptL")
+            uOptU = _store(my_object.opt_ctrl(t, state(idx), max_derivs), "uOptU")
+
+            # Find magnitude of rates of changes, alpha is the max over the four combinations
+            alpha = [hcl.scalar(0, "alpha{}".format(dim + 1)) for dim in range(dims)]
+            for name, uOpt, dOpt in (("LL", uOptL, dOptL), ("LU", uOptL, dOptU),
+                                     ("UL", uOptU, dOptL), ("UU", uOptU, dOptU)):
+                dx = _store(my_object.dynamics(t, state(idx), tuple(u[0] for u in uOpt),
+                                               tuple(d[0] for d in dOpt)), "dx_" + name)
+                for dim in range(dims):
+                    alpha[dim][0] = my_max(alpha[dim][0], my_abs(dx[dim][0]))
+
+            diss = hcl.scalar(0, "diss")
+            diss[0] = 0.5 * sum(derivative_diff(idx, dim) * alpha[dim][0] for dim in range(dims))
+
+            # Finally
+            V_new[idx] = -(V_new[idx] - diss[0])
+
+            # Calculate alphas
+            for dim in range(dims):
+                with hcl.if_(alpha[dim][0] > max_alpha[dim][0]):
+                    max_alpha[dim][0] = alpha[dim][0]
+
+        def freeze_cell(idx):
+            # A cell stationary for freeze[0] steps is frozen unless a cell of its stencil changed in the last step
+            with hcl.if_(counts[idx] >= freeze[0]):
+                stencil_stationary = hcl.scalar(1, "stencil_stationary")
+                for dim in range(dims):
+                    n = g.pts_each_dim[dim]
+                    for offset in range(1, STENCIL_WIDTH + 1):
+                        for neighbour in (_neighbour_index(idx[dim], offset, n, dim in g.pDim),
+                                          _neighbour_index(idx[dim], -offset, n, dim in g.pDim)):
+                            with hcl.if_(counts[idx[:dim] + (neighbour,) + idx[dim + 1:]] == 0):
+                                stencil_stationary[0] = 0
+                with hcl.if_(stencil_stationary[0] == 1):
+                    not_frozen[idx] = 0
+
+        def count_stationary(*idx):
+            with hcl.if_(my_abs(V_new[idx] - V_init[idx]) < freeze[1]):
+                counts[idx] = counts[idx] + 1
+            with hcl.else_():
+                counts[idx] = 0
+
+        def updated(idx):
+            conditions = ([band[idx] > 0] if narrowBand else []) + ([not_frozen[idx] > 0] if freezeCells else [])
+            return conditions[0] if len(conditions) == 1 else hcl.and_(*conditions)
+
+        def only_updated(update):
+            # Cells outside of the band and frozen cells get a zero rate of change, so that V_new = V_init
+            if not narrowBand and not freezeCells:
+                return update
+
+            def masked_update(idx):
+                with hcl.if_(updated(idx)):
+                    update(idx)
+                with hcl.else_():
+                    V_new[idx] = 0
+            return masked_update
+
+        # Find the frozen cells
+        if freezeCells:
+            not_frozen = hcl.compute(V_init.shape, lambda *idx: 1, "not_frozen")
+            with hcl.Stage("Freeze"):
+                _for_all(V_init.shape, freeze_cell)
+
+        # Calculate Hamiltonian for every grid point in V_init
+        with hcl.Stage("Hamiltonian"):
+            _for_all(V_init.shape, only_updated(hamiltonian))
+
+        # Calculate the dissipation
+        with hcl.Stage("Dissipation"):
+            _for_all(V_init.shape, only_updated(dissipation if constant_alpha is None else constant_dissipation))
+
+        # Determine time step
+        delta_t = hcl.compute((1,), lambda x: step_bound(), name="delta_t")
+        # Integrate
+        result = hcl.update(V_new, lambda *idx: V_init[idx] + V_new[idx] * delta_t[0])
+
+        # Different computation method check
+        if compMethod == 'maxVWithV0' or compMethod == 'maxVWithVTarget':
+            result = hcl.update(V_new, lambda *idx: maxVWithV0(*idx))
+        if compMethod == 'minVWithV0' or compMethod == 'minVWithVTarget':
+            result = hcl.update(V_new, lambda *idx: minVWithV0(*idx))
+        if compMethod == 'minVWithVInit':
+            result = hcl.update(V_new, lambda *idx: minVWithVInit(*idx))
+        if compMethod == 'maxVWithVInit':
+            result = hcl.update(V_new, lambda *idx: maxVWithVInit(*idx))
+
+        # Apply the obstacle and measure the change of V in the same pass
+        obstacle_convergence(V_new, V_init, obstacle, max_diff, obstacleMode)
+
+        # Count the steps each cell has been stationary for
+        if freezeCells:
+            hcl.mutate(V_new.shape, count_stationary, "count_stationary")
+
+        # Flag a sign change on the border of the band
+        if narrowBand:
+            def border_sign_change(*idx):
+                with hcl.if_(band_border[idx] > 0):
+                    with hcl.if_(hcl.or_(hcl.and_(V_new[idx] > 0, V_init[idx] <= 0),
+                                         hcl.and_(V_new[idx] <= 0, V_init[idx] > 0))):
+                        band_exit[0] = 1
+
+            hcl.update(band_exit, lambda x: 0, "reset_band_exit")
+            hcl.mutate(V_new.shape, border_sign_change, "band_exit_check")
+
+        # Copy V_new to V_init
+        hcl.update(V_init, lambda *idx: V_new[idx])
+        return result
+
+    def returnDerivative(V_array, Deriv_array):
+        def deriv(idx):
+            dV_dx_L = hcl.scalar(0, "dV_dx_L")
+            dV_dx_R = hcl.scalar(0, "dV_dx_R")
+            dV_dx_L[0], dV_dx_R[0] = _spatial_deriv(idx, V_array, g, deriv_dim - 1, accuracy)
+            Deriv_array[idx] = (dV_dx_L[0] + dV_dx_R[0]) / 2
+
+        with hcl.Stage("ComputeDeriv"):
+            _for_all(V_array.shape, deriv)
+
+    if generate_SpatDeriv == False:
+        s = hcl.create_schedule([V_f, V_init] + xs + [t, l0, obstacle, max_diff] + band_args + freeze_args,
+                                graph_create)
+        ##################### CODE OPTIMIZATION HERE ###########################
+        print("Optimizing\n")
+
+        # Accessing the hamiltonian and dissipation stage
+        s_H = graph_create.Hamiltonian
+        s_D = graph_create.Dissipation
+
+        # Thread parallelize hamiltonian and dissipation computation
+        apply_schedule(s, s_H, dims, schedule)
+        apply_schedule(s, s_D, dims, schedule)
+        if freezeCells:
+            apply_schedule(s, graph_create.Freeze, dims, schedule)
+    else:
+        s = hcl.create_schedule([V_init, V_f], returnDerivative)
+
+    # Return executable
+    return (hcl.build(s))
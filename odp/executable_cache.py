@@ -0,0 +1,197 @@
+import ast
+import glob
+import hashlib
+import inspect
+import json
+import numbers
+import os
+
+import numpy as np
+
+""" Persistent cache of compiled HeteroCL executables
+
+Building a graph_ND schedule with hcl.build can take minutes for 6D problems, although the executable only
+depends on the dynamics, the grid, the accuracy and the TargetSetMode. Executables are kept in memory for
+the lifetime of the process and exported as shared libraries to ODP_CACHE_DIR (default ~/.cache/odp/executables)
+so that later processes can skip the rebuild.
+"""
+
+CACHE_DIR = os.environ.get("ODP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "odp", "executables"))
+
+# Hits and misses of the current process, reported in the solver timing output
+cache_stats = {"hits": 0, "misses": 0}
+
+_memory_cache = {}
+_source_digest = None
+
+# Graph generating code, any change to it or to an odp module it imports invalidates the cached executables
+_GRAPH_SOURCE_DIRS = ["computeGraphs", "spatialDerivatives", "TimeToReach"]
+
+
+def _odp_imports(path, odp_dir):
+    # Files of the odp modules imported by the module at path, e.g. odp/schedule.py for "from odp.schedule import"
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module is not None:
+            names.append(node.module)
+            names.extend(node.module + "." + alias.name for alias in node.names)
+    files = []
+    for name in names:
+        parts = name.split(".")
+        if parts[0] != "odp":
+            continue
+        module_path = os.path.join(odp_dir, *parts[1:])
+        for candidate in [module_path + ".py", os.path.join(module_path, "__init__.py")]:
+            if os.path.isfile(candidate):
+                files.append(candidate)
+    return files
+
+
+def _graph_sources():
+    """Returns the source files of the graph generators and of every odp module they import, transitively"""
+    odp_dir = os.path.dirname(os.path.abspath(__file__))
+    pending = []
+    for sub_dir in _GRAPH_SOURCE_DIRS:
+        pending.extend(glob.glob(os.path.join(odp_dir, sub_dir, "**", "*.py"), recursive=True))
+    sources = set()
+    while pending:
+        path = os.path.normpath(pending.pop())
+        if path not in sources:
+            sources.add(path)
+            pending.extend(_odp_imports(path, odp_dir))
+    return sorted(sources)
+
+
+def _graph_source_digest():
+    global _source_digest
+    if _source_digest is None:
+        digest = hashlib.sha1()
+        odp_dir = os.path.dirname(os.path.abspath(__file__))
+        for path in _graph_sources():
+            digest.update(os.path.relpath(path, odp_dir).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        _source_digest = digest.hexdigest()
+    return _source_digest
+
+
+def _parameters(obj, depth=1):
+    # Scalar attributes of the dynamics object (speeds, uMax, uMode, ...), one level into sub-objects
+    # such as attackers/defenders. Arrays (agent states) do not change the compiled graph.
+    params = {}
+    for name, value in sorted(vars(obj).items()):
+        if isinstance(value, (bool, str, numbers.Number, np.generic)):
+            params[name] = repr(value)
+        elif depth > 0 and hasattr(value, "__dict__") and not inspect.isroutine(value):
+            params[name] = _parameters(value, depth - 1)
+    return params
+
+
+def executable_fingerprint(kind, dynamics_obj, grid, accuracy, comp_method=None, **options):
+    """Returns the cache key of a HeteroCL executable
+
+    Args:
+        kind (str): graph type, e.g. "HJ", "TTR" or "SpatDeriv"
+        dynamics_obj: dynamics object the graph is built for (None for spatial derivatives)
+        grid (Grid): grid of the value function
+        accuracy (str): accuracy of the spatial derivatives
+        comp_method (str, optional): TargetSetMode of the computation. Defaults to None.
+        **options: any other argument of the graph builder, e.g. deriv_dim
+
+    Returns:
+        str: hex digest identifying the executable
+    """
+    try:
+        import heterocl as hcl
+        hcl_version = getattr(hcl, "__version__", "unknown")
+    except ImportError:
+        hcl_version = None
+
+    description = {
+        "kind": kind,
+        "accuracy": accuracy,
+        "comp_method": comp_method,
+        "options": {key: repr(value) for key, value in sorted(options.items())},
+        "grid": {"min": np.asarray(grid.min, dtype=float).tolist(),
+                 "max": np.asarray(grid.max, dtype=float).tolist(),
+                 "pts_each_dim": np.asarray(grid.pts_each_dim).tolist(),
+                 "pDim": list(grid.pDim)},
+        "heterocl": hcl_version,
+        "graph_source": _graph_source_digest(),
+    }
+    if dynamics_obj is not None:
+        dynamics_cls = type(dynamics_obj)
+        try:
+            class_source = inspect.getsource(dynamics_cls)
+        except (OSError, TypeError):
+            class_source = ""
+        description["dynamics"] = {
+            "class": dynamics_cls.__module__ + "." + dynamics_cls.__qualname__,
+            "source": hashlib.sha1(class_source.encode()).hexdigest(),
+            "parameters": _parameters(dynamics_obj),
+        }
+    return hashlib.sha1(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def _library_path(key):
+    return os.path.join(CACHE_DIR, key + ".so")
+
+
+def load_executable(key):
+    """Returns the cached executable for key, or None (and counts a miss) if it has to be built"""
+    if key in _memory_cache:
+        cache_stats["hits"] += 1
+        return _memory_cache[key]
+
+    path = _library_path(key)
+    if os.path.exists(path):
+        try:
+            from heterocl.tvm import module as tvm_module
+            executable = tvm_module.load(path)
+        except Exception as e:
+            print("Could not load cached executable {}: {}".format(path, e))
+        else:
+            _memory_cache[key] = executable
+            cache_stats["hits"] += 1
+            return executable
+
+    cache_stats["misses"] += 1
+    return None
+
+
+def save_executable(key, executable):
+    """Keeps a freshly built executable in memory and exports it to the on-disk cache"""
+    _memory_cache[key] = executable
+    path = _library_path(key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = "{}.{}.tmp.so".format(path[:-3], os.getpid())
+        executable.export_library(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print("Could not export executable to {}: {}".format(path, e))
+    return executable
+
+
+def cached_executable(key, build):
+    """Returns the executable for key, calling build() only on a cache miss"""
+    executable = load_executable(key)
+    if executable is None:
+        executable = save_executable(key, build())
+    return executable
+
+
+def cache_report():
+    return "Executable cache: {} hits, {} misses".format(cache_stats["hits"], cache_stats["misses"])
+
+
+def clear_executable_cache(disk=True):
+    """Drops the in-memory executables and, if disk is True, the exported libraries"""
+    _memory_cache.clear()
+    if disk:
+        for path in glob.glob(os.path.join(CACHE_DIR, "*.so")):
+            os.remove(path)
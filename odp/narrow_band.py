@@ -0,0 +1,85 @@
+import numpy as np
+
+""" Narrow-band (localized) level-set updates
+
+Reach-avoid games only use the sign of the value function, so HJSolver(..., narrow_band=k) only updates the
+cells within k grid cells of the zero level set. The band is a float32 mask that stays on the device between
+rebuilds, cells outside of it keep their value, clamped to +-band_value. The executable raises a one-element
+band_exit flag when a cell of the band border (its two outermost layers) changes sign, i.e. when the front gets
+within one cell of the edge of the band; only then is V copied back to rebuild the band.
+"""
+
+
+def _shift(mask, dim, offset, periodic):
+    # mask shifted by offset cells along dim, non-periodic borders are padded with False
+    if periodic:
+        return np.roll(mask, offset, axis=dim)
+    shifted = np.zeros_like(mask)
+    src = [slice(None)] * mask.ndim
+    dst = [slice(None)] * mask.ndim
+    if offset > 0:
+        src[dim], dst[dim] = slice(None, -offset), slice(offset, None)
+    else:
+        src[dim], dst[dim] = slice(-offset, None), slice(None, offset)
+    shifted[tuple(dst)] = mask[tuple(src)]
+    return shifted
+
+
+def zero_crossing(V, grid):
+    """Cells of V that have a neighbour of different sign along some axis"""
+    positive = V > 0
+    crossing = np.zeros(V.shape, dtype=bool)
+    for dim in range(V.ndim):
+        for offset in (-1, 1):
+            neighbour = _shift(positive, dim, offset, dim in grid.pDim)
+            exists = _shift(np.ones(V.shape, dtype=bool), dim, offset, dim in grid.pDim)
+            crossing |= (positive != neighbour) & exists
+    return crossing
+
+
+def dilate(mask, width, grid):
+    """Grows mask by width cells along every axis (city-block distance)"""
+    for _ in range(width):
+        grown = mask.copy()
+        for dim in range(mask.ndim):
+            for offset in (-1, 1):
+                grown |= _shift(mask, dim, offset, dim in grid.pDim)
+        mask = grown
+    return mask
+
+
+def erode(mask, grid):
+    """Removes the cells of mask that have a neighbour outside of it"""
+    eroded = mask.copy()
+    for dim in range(mask.ndim):
+        for offset in (-1, 1):
+            neighbour = _shift(mask, dim, offset, dim in grid.pDim)
+            exists = _shift(np.ones(mask.shape, dtype=bool), dim, offset, dim in grid.pDim)
+            eroded &= neighbour | ~exists
+    return eroded
+
+
+def build_band(V, grid, width):
+    """Returns the float32 masks (1 = in the mask) of the band and of its border
+
+    The band holds the cells within width cells of the zero level set of V, its border the two outermost layers
+    of the band: a sign change there means the front is within one cell of the edge and the band has to be rebuilt.
+    Without a zero level set every cell is active and every cell is border, since a front can then appear anywhere.
+    """
+    crossing = zero_crossing(V, grid)
+    if not crossing.any():
+        return np.ones(V.shape, dtype=np.float32), np.ones(V.shape, dtype=np.float32)
+    band = dilate(crossing, width, grid)
+    border = band & ~erode(erode(band, grid), grid)
+    return band.astype(np.float32), border.astype(np.float32)
+
+
+def band_value(grid, width):
+    """Magnitude the value function is clamped to outside of a band of the given width"""
+    return (width + 1) * float(np.max(grid.dx))
+
+
+def clamp_outside_band(V, band, value):
+    """Clamps V in place to [-value, value] outside of the band"""
+    outside = band == 0
+    V[outside] = np.clip(V[outside], -value, value)
@@ -0,0 +1,2 @@
+from odp.numpyGraphs.graph_numpy import graph_numpy
+from odp.numpyGraphs.spatial_derivatives import first_order_ENO, second_order_ENO, spatial_deriv
@@ -0,0 +1,51 @@
+import numpy as np
+from odp.numpyGraphs.spatial_derivatives import active_points, neighbour_at
+
+""" Per-cell convergence freezing
+
+With HJSolver(..., freeze_steps=N) a cell whose value changed by less than freeze_tolerance in each of the
+last N steps is frozen: the executable skips it in the Hamiltonian and Dissipation stages. A frozen cell is
+revisited as soon as a cell its ENO stencil reads (2 cells along every axis) changes again.
+
+The state lives on the device next to V: a float counts array with the number of consecutive stationary steps of
+every cell, and freeze = [N, freeze_tolerance]. The executable (graph_ND / graph_numpy with freezeCells) decides
+which cells are frozen from counts before the Hamiltonian, and updates counts after the obstacle, so nothing is
+copied back to the host between steps. The solver resets counts when it rebuilds a narrow band.
+"""
+
+# Cells whose derivatives depend on a changed cell, second order ENO reads 2 neighbours per axis
+STENCIL_WIDTH = 2
+
+
+def frozen_mask(counts, stationary_steps, grid):
+    """Cells skipped in the next step, only the cells stationary for stationary_steps steps are looked at
+
+    Args:
+        counts (np.ndarray): consecutive stationary steps of every cell, 0 for the cells that changed last step
+        stationary_steps (int): number of consecutive stationary steps before a cell is frozen
+        grid (Grid): the grid of the value function
+
+    Returns:
+        np.ndarray: boolean mask of the frozen cells, None when no cell is frozen
+    """
+    candidates = active_points(counts >= stationary_steps)
+    if len(candidates[0]) == 0:
+        return None
+    # A candidate stays frozen only if no cell of its stencil changed in the last step
+    frozen = np.ones(len(candidates[0]), dtype=bool)
+    for dim in range(counts.ndim):
+        for offset in range(1, STENCIL_WIDTH + 1):
+            frozen &= neighbour_at(counts, grid, dim, candidates, offset) > 0
+            frozen &= neighbour_at(counts, grid, dim, candidates, -offset) > 0
+    if not frozen.any():
+        return None
+    mask = np.zeros(counts.shape, dtype=bool)
+    mask.reshape(-1)[candidates[0][frozen]] = True
+    return mask
+
+
+def count_stationary(counts, V_new, V_old, tolerance):
+    """Updates counts in place after a step from V_old to V_new"""
+    stationary = np.abs(V_new - V_old) < tolerance
+    counts += 1
+    counts[~stationary] = 0
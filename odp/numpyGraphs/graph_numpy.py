@@ -0,0 +1,204 @@
+import numpy as np
+from odp.numpyGraphs.spatial_derivatives import spatial_deriv, spatial_deriv_at, active_points
+from odp.numpyGraphs.frozen_cells import frozen_mask, count_stationary
+
+########################## Dimension-generic NumPy graph definition #################################
+# Above this fraction of active cells the masked whole-array update is faster than gathering the active cells
+GATHER_FRACTION = 0.5
+
+
+def graph_numpy(my_object, g, compMethod, accuracy, generate_SpatDeriv=False, deriv_dim=1, obstacleMode=None,
+                low_memory=False, narrowBand=False, freezeCells=False, constant_alpha=None):
+    """Builds a whole-array NumPy counterpart of the graph_ND HeteroCL executables
+
+    The dynamics object must provide vectorized opt_ctrl_numpy, opt_dstb_numpy and dynamics_numpy
+    methods with the same signatures as their HeteroCL counterparts; state and spat_deriv entries
+    are arrays broadcastable to the grid shape instead of scalars.
+
+    Args:
+        my_object: dynamics object
+        g (Grid): the grid of the value function
+        compMethod (str): TargetSetMode of the computation
+        accuracy (str): "low" (first order ENO) or "medium" (second order ENO)
+        generate_SpatDeriv (bool, optional): return the spatial derivative function instead. Defaults to False.
+        deriv_dim (int, optional): 1-indexed dimension used when generate_SpatDeriv is True. Defaults to 1.
+        obstacleMode (str, optional): ObstacleSetMode applied with the obstacle argument. Defaults to None.
+        low_memory (bool, optional): recompute the derivative differences for the dissipation instead of
+            keeping one grid-sized array per dimension. Defaults to False.
+        narrowBand (bool, optional): solve_pde takes the extra band, band_border and band_exit arguments of
+            graph_ND and only updates the cells where band is positive, see odp.narrow_band. A small band is
+            gathered and only its cells are computed; band and band_border must not be modified in place
+            between calls. Defaults to False.
+        freezeCells (bool, optional): solve_pde takes the extra counts and freeze arguments of graph_ND (after the
+            band arguments) and skips the frozen cells, see odp.numpyGraphs.frozen_cells. Defaults to False.
+        constant_alpha (list, optional): fixed dissipation coefficient of every dimension, as in graph_ND.
+            Defaults to None.
+
+    Returns:
+        callable: solve_pde(V_new, V_init, t, l0, obstacle, max_diff[, band, band_border, band_exit][, counts, freeze])
+        updating its arguments in place like the HeteroCL executable, or compute_SpatDeriv(V, Deriv) when
+        generate_SpatDeriv is True
+    """
+    dims = g.dims
+
+    def returnDerivative(V_array, Deriv_array):
+        dV_dx_L, dV_dx_R = spatial_deriv(V_array, g, deriv_dim - 1, accuracy)
+        Deriv_array[...] = (dV_dx_L + dV_dx_R) / 2
+
+    if generate_SpatDeriv:
+        return returnDerivative
+
+    for method in ("opt_ctrl_numpy", "opt_dstb_numpy", "dynamics_numpy"):
+        if not hasattr(my_object, method):
+            raise AttributeError("{} has no vectorized {} method required by the numpy backend"
+                                 .format(type(my_object).__name__, method))
+
+    # The active cells of the last band, rebuilt when the solver passes a new band
+    band_cache = {"band": None}
+
+    def band_cells(band, band_border):
+        if band_cache["band"] is not band:
+            mask = band > 0
+            fraction = float(np.mean(mask))
+            band_cache.update(band=band, fraction=fraction, mask=mask, border=np.flatnonzero(band_border),
+                              points=active_points(mask) if fraction <= GATHER_FRACTION else None)
+        return band_cache
+
+    def graph_create(V_new, V_init, t, l0, obstacle, max_diff, *extra):
+        if narrowBand:
+            band, band_border, band_exit = extra[:3]
+        if freezeCells:
+            counts, freeze = extra[3 if narrowBand else 0:]
+
+        # Inactive cells keep their value and do not enter the derivative and alpha bounds. Only the active cells
+        # are computed when they are few (points), otherwise the whole array is computed and masked (active)
+        points, active = None, None
+        if narrowBand:
+            cells = band_cells(band, band_border)
+            if cells["points"] is not None:
+                points = cells["points"]
+            elif cells["fraction"] < 1:
+                active = cells["mask"]
+        if freezeCells:
+            frozen = frozen_mask(counts, freeze[0], g)
+            if frozen is not None:
+                active = ~frozen if not narrowBand else cells["mask"] & ~frozen
+                points = active_points(active) if np.mean(active) <= GATHER_FRACTION else None
+                if points is not None:
+                    active = None
+
+        if points is None:
+            state = tuple(g.vs)
+            shape = V_init.shape
+        else:
+            state = tuple(g.vs[dim].reshape(-1)[points[1][dim]] for dim in range(dims))
+            shape = points[0].shape
+        where = True if active is None else active
+
+        def derivative(dim):
+            if points is None:
+                return spatial_deriv(V_init, g, dim, accuracy)
+            return spatial_deriv_at(V_init, g, dim, points, accuracy)
+
+        # Calculate Hamiltonian for every grid point in V_init
+        dV_dx = []
+        deriv_diff = []
+        min_deriv = []
+        max_deriv = []
+        for dim in range(dims):
+            dV_dx_L, dV_dx_R = derivative(dim)
+            # Saves spatial derivative diff into tables
+            if not low_memory:
+                deriv_diff.append(dV_dx_R - dV_dx_L)
+            min_deriv.append(min(dV_dx_L.min(where=where, initial=np.inf),
+                                 dV_dx_R.min(where=where, initial=np.inf)))
+            max_deriv.append(max(dV_dx_L.max(where=where, initial=-np.inf),
+                                 dV_dx_R.max(where=where, initial=-np.inf)))
+            # Calculate average gradient
+            dV_dx.append((dV_dx_L + dV_dx_R) / 2)
+            del dV_dx_L, dV_dx_R
+
+        uOpt = my_object.opt_ctrl_numpy(t, state, tuple(dV_dx))
+        dOpt = my_object.opt_dstb_numpy(t, state, tuple(dV_dx))
+        dx_dt = my_object.dynamics_numpy(t, state, uOpt, dOpt)
+
+        hamiltonian = np.zeros(shape)
+        for dim in range(dims):
+            hamiltonian -= dx_dt[dim] * dV_dx[dim]
+        del dV_dx, uOpt, dOpt, dx_dt
+
+        # Calculate dissipation amount
+        if constant_alpha is not None:
+            alpha = list(constant_alpha)
+        else:
+            dOptL = my_object.opt_dstb_numpy(t, state, tuple(min_deriv))
+            dOptU = my_object.opt_dstb_numpy(t, state, tuple(max_deriv))
+            uOptL = my_object.opt_ctrl_numpy(t, state, tuple(min_deriv))
+            uOptU = my_object.opt_ctrl_numpy(t, state, tuple(max_deriv))
+
+            alpha = [0.0] * dims
+            for uOpt, dOpt in ((uOptL, dOptL), (uOptL, dOptU), (uOptU, dOptL), (uOptU, dOptU)):
+                dx_dt = my_object.dynamics_numpy(t, state, uOpt, dOpt)
+                for dim in range(dims):
+                    alpha[dim] = np.maximum(alpha[dim], np.abs(dx_dt[dim]))
+
+        diss = np.zeros(shape)
+        max_alpha = []
+        for dim in range(dims):
+            if low_memory:
+                dV_dx_L, dV_dx_R = derivative(dim)
+                dV_dx_R -= dV_dx_L
+                del dV_dx_L
+                diss += dV_dx_R * alpha[dim]
+                del dV_dx_R
+            else:
+                diss += deriv_diff[dim] * alpha[dim]
+            max_alpha.append(np.max(np.broadcast_to(alpha[dim], shape), where=where, initial=0.0))
+        diss *= 0.5
+        if active is not None:
+            hamiltonian[~active] = 0
+            diss[~active] = 0
+
+        # Determine time step
+        stepBoundInv = sum(max_alpha[dim] / g.dx[dim] for dim in range(dims))
+        stepBound = t[1] - t[0]
+        if stepBoundInv > 0:
+            stepBound = min(0.8 / stepBoundInv, stepBound)
+        # Update the lower time ranges
+        t[0] = t[0] + stepBound
+
+        # Integrate
+        if points is None:
+            V_new[...] = V_init - (hamiltonian - diss) * stepBound
+        else:
+            V_new[...] = V_init
+            V_new.reshape(-1)[points[0]] -= (hamiltonian - diss) * stepBound
+        # Different computation method check
+        if compMethod == 'maxVWithV0' or compMethod == 'maxVWithVTarget':
+            np.maximum(V_new, l0, out=V_new)
+        if compMethod == 'minVWithV0' or compMethod == 'minVWithVTarget':
+            np.minimum(V_new, l0, out=V_new)
+        if compMethod == 'minVWithVInit':
+            np.minimum(V_new, V_init, out=V_new)
+        if compMethod == 'maxVWithVInit':
+            np.maximum(V_new, V_init, out=V_new)
+
+        # Apply the obstacle and measure the change of V
+        if obstacleMode == "maxVWithObstacle":
+            np.maximum(V_new, obstacle, out=V_new)
+        if obstacleMode == "minVWithObstacle":
+            np.minimum(V_new, obstacle, out=V_new)
+        max_diff[0] = np.max(np.abs(V_new - V_init))
+
+        if freezeCells:
+            count_stationary(counts, V_new, V_init, freeze[1])
+
+        # Flag a sign change on the border of the band
+        if narrowBand:
+            border = band_cache["border"]
+            band_exit[0] = np.any((V_new.reshape(-1)[border] > 0) != (V_init.reshape(-1)[border] > 0))
+
+        # Copy V_new to V_init
+        V_init[...] = V_new
+
+    return graph_create
@@ -0,0 +1,170 @@
+import numpy as np
+
+########################## Vectorized spatial derivatives #################################
+# Whole-array counterparts of odp/spatialDerivatives/firstOrderENO and secondOrderENO.
+# Boundary handling follows the HeteroCL kernels exactly: periodic dimensions wrap around,
+# non-periodic dimensions extrapolate with V + |dV| * sign(V).
+
+def _take(V, dim, index):
+    # Slice V along one axis, keeping the axis so results broadcast against V
+    sl = [slice(None)] * V.ndim
+    sl[dim] = index
+    return V[tuple(sl)]
+
+
+def _shift(V, dim, offset, periodic):
+    # S[i] = V[i + offset] along dim; non-periodic out-of-range entries are patched by the caller
+    if periodic:
+        return np.roll(V, -offset, axis=dim)
+    n = V.shape[dim]
+    idx = np.clip(np.arange(n) + offset, 0, n - 1)
+    return np.take(V, idx, axis=dim)
+
+
+def first_order_ENO(V, g, dim):
+    """Computes the left and right first order spatial derivatives of V along one dimension
+
+    Args:
+        V (np.ndarray): value function on the grid
+        g (Grid): the grid V is defined on
+        dim (int): the dimension (0-indexed) to differentiate along
+
+    Returns:
+        tuple: (left_deriv, right_deriv), both with the same shape as V
+    """
+    periodic = dim in g.pDim
+    V_minus_1 = _shift(V, dim, -1, periodic)
+    V_plus_1 = _shift(V, dim, 1, periodic)
+    if not periodic:
+        first = slice(0, 1)
+        last = slice(V.shape[dim] - 1, V.shape[dim])
+        V0 = _take(V, dim, first)
+        Vn = _take(V, dim, last)
+        _take(V_minus_1, dim, first)[...] = V0 + np.abs(_take(V, dim, slice(1, 2)) - V0) * np.sign(V0)
+        _take(V_plus_1, dim, last)[...] = Vn + np.abs(Vn - _take(V, dim, slice(-2, -1))) * np.sign(Vn)
+
+    return _first_order(V, V_minus_1, V_plus_1, g.dx[dim])
+
+
+def _first_order(V, V_minus_1, V_plus_1, axis_step):
+    left_deriv = (V - V_minus_1) / axis_step
+    right_deriv = (V_plus_1 - V) / axis_step
+    return left_deriv, right_deriv
+
+
+def second_order_ENO(V, g, dim):
+    """Computes the left and right second order ENO spatial derivatives of V along one dimension
+
+    Args:
+        V (np.ndarray): value function on the grid
+        g (Grid): the grid V is defined on
+        dim (int): the dimension (0-indexed) to differentiate along
+
+    Returns:
+        tuple: (left_deriv, right_deriv), both with the same shape as V
+    """
+    periodic = dim in g.pDim
+    axis_step = g.dx[dim]
+    V_minus_2 = _shift(V, dim, -2, periodic)
+    V_minus_1 = _shift(V, dim, -1, periodic)
+    V_plus_1 = _shift(V, dim, 1, periodic)
+    V_plus_2 = _shift(V, dim, 2, periodic)
+    if not periodic:
+        n = V.shape[dim]
+        V0, V1 = _take(V, dim, slice(0, 1)), _take(V, dim, slice(1, 2))
+        Vn1, Vn2 = _take(V, dim, slice(n - 1, n)), _take(V, dim, slice(n - 2, n - 1))
+        # i == 0
+        _take(V_minus_1, dim, slice(0, 1))[...] = V0 + np.abs(V1 - V0) * np.sign(V0)
+        _take(V_minus_2, dim, slice(0, 1))[...] = V0 + 2 * np.abs(V1 - V0) * np.sign(V0)
+        # i == 1
+        _take(V_minus_2, dim, slice(1, 2))[...] = V1 + np.abs(V1 - V0) * np.sign(V1)
+        # i == n - 1
+        _take(V_plus_1, dim, slice(n - 1, n))[...] = Vn1 + np.abs(Vn1 - Vn2) * np.sign(Vn1)
+        _take(V_plus_2, dim, slice(n - 1, n))[...] = Vn1 + 2 * np.abs(Vn1 - Vn2) * np.sign(Vn1)
+        # i == n - 2
+        _take(V_plus_2, dim, slice(n - 2, n - 1))[...] = Vn2 + np.abs(Vn1 - Vn2) * np.sign(Vn2)
+    return _second_order(V, V_minus_2, V_minus_1, V_plus_1, V_plus_2, axis_step)
+
+
+def _second_order(V, V_minus_2, V_minus_1, V_plus_1, V_plus_2, axis_step):
+    D1_minus_2_plus_half = (V_minus_1 - V_minus_2) / axis_step
+    D1_minus_1_plus_half = (V - V_minus_1) / axis_step
+    D1_0_plus_half = (V_plus_1 - V) / axis_step
+    D1_plus_1_plus_half = (V_plus_2 - V_plus_1) / axis_step
+    del V_minus_2, V_minus_1, V_plus_1, V_plus_2
+
+    D2_minus_1 = (D1_minus_1_plus_half - D1_minus_2_plus_half) / (2 * axis_step)
+    D2_0 = (D1_0_plus_half - D1_minus_1_plus_half) / (2 * axis_step)
+    D2_plus_1 = (D1_plus_1_plus_half - D1_0_plus_half) / (2 * axis_step)
+
+    left_deriv = D1_minus_1_plus_half + np.where(np.abs(D2_minus_1) <= np.abs(D2_0), D2_minus_1, D2_0) * axis_step
+    right_deriv = D1_0_plus_half - np.where(np.abs(D2_0) <= np.abs(D2_plus_1), D2_0, D2_plus_1) * axis_step
+    return left_deriv, right_deriv
+
+
+def spatial_deriv(V, g, dim, accuracy="low"):
+    """Dispatches to the ENO scheme matching the HJSolver accuracy setting"""
+    if accuracy == "low":
+        return first_order_ENO(V, g, dim)
+    if accuracy == "medium":
+        return second_order_ENO(V, g, dim)
+    raise ValueError("Unsupported accuracy for the numpy backend: {}".format(accuracy))
+
+
+########################## Derivatives at a subset of the grid points #################################
+# Same schemes evaluated only at the points of active_points (e.g. a narrow band), the neighbours are gathered
+# from the flattened V instead of shifting the whole array.
+
+def active_points(mask):
+    """Returns (flat, coords): the flat indices of the cells where mask is true and their index along every axis"""
+    flat = np.flatnonzero(mask)
+    return flat, np.unravel_index(flat, mask.shape)
+
+
+def neighbour_at(V, g, dim, points, offset):
+    """V[i + offset] along dim at the points, wrapped around periodic dimensions and clamped to the grid otherwise"""
+    flat, coords = points
+    n = V.shape[dim]
+    target = coords[dim] + offset
+    target = target % n if dim in g.pDim else np.clip(target, 0, n - 1)
+    stride = int(np.prod(V.shape[dim + 1:], dtype=np.int64))
+    return V.reshape(-1)[flat + (target - coords[dim]) * stride]
+
+
+def spatial_deriv_at(V, g, dim, points, accuracy="low"):
+    """Left and right spatial derivatives of V along one dimension at the points of active_points
+
+    Args:
+        V (np.ndarray): value function on the grid, C-contiguous
+        g (Grid): the grid V is defined on
+        dim (int): the dimension (0-indexed) to differentiate along
+        points (tuple): (flat, coords) from active_points
+        accuracy (str, optional): "low" or "medium" as in spatial_deriv. Defaults to "low".
+
+    Returns:
+        tuple: (left_deriv, right_deriv), one entry per point
+    """
+    periodic = dim in g.pDim
+    n = V.shape[dim]
+    i = points[1][dim]
+    V_i = V.reshape(-1)[points[0]]
+    V_minus_1 = neighbour_at(V, g, dim, points, -1)
+    V_plus_1 = neighbour_at(V, g, dim, points, 1)
+    if accuracy == "low":
+        if not periodic:
+            V_minus_1, V_plus_1 = (np.where(i == 0, V_i + np.abs(V_plus_1 - V_i) * np.sign(V_i), V_minus_1),
+                                   np.where(i == n - 1, V_i + np.abs(V_i - V_minus_1) * np.sign(V_i), V_plus_1))
+        return _first_order(V_i, V_minus_1, V_plus_1, g.dx[dim])
+    if accuracy != "medium":
+        raise ValueError("Unsupported accuracy for the numpy backend: {}".format(accuracy))
+
+    V_minus_2 = neighbour_at(V, g, dim, points, -2)
+    V_plus_2 = neighbour_at(V, g, dim, points, 2)
+    if not periodic:
+        # Boundary rules of second_order_ENO, evaluated from the genuine neighbours before any of them is patched
+        left_step = np.abs(V_plus_1 - V_i) * np.sign(V_i)
+        right_step = np.abs(V_i - V_minus_1) * np.sign(V_i)
+        V_minus_2 = np.where(i == 0, V_i + 2 * left_step, np.where(i == 1, V_i + right_step, V_minus_2))
+        V_plus_2 = np.where(i == n - 1, V_i + 2 * right_step, np.where(i == n - 2, V_i + left_step, V_plus_2))
+        V_minus_1, V_plus_1 = np.where(i == 0, V_i + left_step, V_minus_1), np.where(i == n - 1, V_i + right_step, V_plus_1)
+    return _second_order(V_i, V_minus_2, V_minus_1, V_plus_1, V_plus_2, g.dx[dim])
@@ -0,0 +1,47 @@
+import numpy as np
+
+""" Earliest-reach time index maps
+
+The controllers look for the first time slice t of a value function with all time slices where the agent's cell
+goes from the reach-avoid set to outside of it, values[..., t] <= 0 < values[..., t + 1] (neg2pos[0] of the
+find_sign_change functions), and do it again for every agent at every step. earliest_reach_map computes that index
+once for every grid cell; the controllers then only read one integer. Cells that never change get -1.
+Only the first transition is kept. find_sign_change returns every neg-to-pos slice, and the baseline controllers
+index value1vs0[..., neg2pos] with all of them, so the two only agree for the cells whose sign changes at most once
+from negative to positive over the horizon.
+"""
+
+
+def earliest_reach_map(values, dtype=np.int16):
+    """Computes the first neg-to-pos time slice of every grid cell, one slab along the first axis at a time
+
+    Args:
+        values (np.ndarray): the value function with the time slices on the last axis, e.g. a memmap
+        dtype (np.dtype, optional): integer type of the map, large enough for len(tau). Defaults to np.int16.
+
+    Returns:
+        np.ndarray: the map of shape values.shape[:-1], -1 where the sign never changes from negative to positive
+    """
+    assert values.shape[-1] <= np.iinfo(dtype).max, "{} cannot hold {} time slices".format(np.dtype(dtype), values.shape[-1])
+    reach_map = np.empty(values.shape[:-1], dtype=dtype)
+    for start in range(values.shape[0]):
+        negative = np.asarray(values[start]) <= 0
+        neg2pos = negative[..., :-1] & ~negative[..., 1:]
+        reach_map[start] = np.where(neg2pos.any(axis=-1), neg2pos.argmax(axis=-1), -1)
+    return reach_map
+
+
+def reach_neg2pos(reach_map, index):
+    """Looks up a grid index in the map, in the form of the neg2pos of the find_sign_change functions
+
+    Args:
+        reach_map (np.ndarray): the map from earliest_reach_map
+        index (tuple): the grid index of the state
+
+    Returns:
+        np.ndarray: [t] with the first neg-to-pos time slice, empty if there is none. Unlike the neg2pos of
+            find_sign_change, the later neg-to-pos slices of a cell whose sign changes several times are dropped
+    """
+    t = int(reach_map[tuple(index)])
+    return np.array([t]) if t >= 0 else np.array([], dtype=np.int64)
+
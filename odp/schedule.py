@@ -0,0 +1,77 @@
+import os
+
+""" Loop scheduling of the HeteroCL executables
+
+By default only the outermost grid axis of the Hamiltonian/Dissipation stages (and of the TTR sweeps of 1D to
+3D grids, see ttr_schedule) is parallelized, which caps the number of useful threads at the number of grid
+points of dimension 0. With ScheduleOptions the leading axes can be fused before they are parallelized, the
+(fused) axis can be split into chunks of split_factor iterations, and the size of the runtime thread pool
+can be fixed.
+"""
+
+
+class ScheduleOptions:
+    def __init__(self, fuse_axes=1, split_factor=None, num_threads=None, parallel=True):
+        """
+        Args:
+            fuse_axes (int, optional): number of leading grid axes fused into one parallel axis. Defaults to 1.
+            split_factor (int, optional): iterations of the fused axis per parallel task, None keeps one
+                task per iteration. Defaults to None.
+            num_threads (int, optional): size of the thread pool, None uses all cores. Defaults to None.
+            parallel (bool, optional): parallelize the stages at all. Defaults to True.
+        """
+        if fuse_axes < 1:
+            raise ValueError("fuse_axes has to be at least 1, got {}".format(fuse_axes))
+        if split_factor is not None and split_factor < 1:
+            raise ValueError("split_factor has to be at least 1, got {}".format(split_factor))
+        if num_threads is not None and num_threads < 1:
+            raise ValueError("num_threads has to be at least 1, got {}".format(num_threads))
+
+        self.fuse_axes = fuse_axes
+        self.split_factor = split_factor
+        self.num_threads = num_threads
+        self.parallel = parallel
+
+    def fingerprint(self):
+        # Options that change the compiled executable, the thread count only matters at run time
+        return {"fuse_axes": self.fuse_axes, "split_factor": self.split_factor, "parallel": self.parallel}
+
+    def set_num_threads(self):
+        """Fixes the size of the HeteroCL (TVM) thread pool
+
+        The pool is created by the first parallel kernel call of the process, so this has to run before it.
+        """
+        if self.num_threads is not None:
+            os.environ["TVM_NUM_THREADS"] = str(self.num_threads)
+            os.environ["OMP_NUM_THREADS"] = str(self.num_threads)
+
+
+def ttr_schedule(dims):
+    """Default schedule of the TTR sweeps of a grid with dims dimensions
+
+    The sweeps update phi in place in sweep order (Gauss-Seidel), a parallel loop makes the result depend on the
+    thread timing. TimeToReach_1D ... 3D parallelized their outermost loop anyway, TimeToReach_4D ... 6D did not.
+    """
+    return ScheduleOptions(parallel=dims <= 3)
+
+
+def apply_schedule(s, stage, dims, options=None):
+    """Parallelizes the grid loops i0, i1, ... of stage according to options
+
+    Args:
+        s: schedule created by hcl.create_schedule
+        stage: stage whose outermost loops are the grid axes named i0, i1, ...
+        dims (int): number of grid axes of the stage
+        options (ScheduleOptions, optional): Defaults to ScheduleOptions(), i.e. s[stage].parallel(stage.i0).
+    """
+    if options is None:
+        options = ScheduleOptions()
+    if not options.parallel:
+        return
+
+    axis = stage.i0
+    for dim in range(1, min(options.fuse_axes, dims)):
+        axis = s[stage].fuse(axis, getattr(stage, "i{}".format(dim)))
+    if options.split_factor is not None:
+        axis, _ = s[stage].split(axis, factor=options.split_factor)
+    s[stage].parallel(axis)
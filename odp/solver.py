@@ -1,20 +1,34 @@
-import heterocl as hcl
 import numpy as np
 import time
 
-from odp.Plots import plot_isosurface, plot_valuefunction
-
-# Backward reachable set computation library
-<<<<<<< HEAD
-from odp.computeGraphs import graph_2D, graph_3D, graph_4D, graph_5D, graph_6D, graph_7D, graph_8D
-from odp.TimeToReach import TTR_3D, TTR_4D, TTR_5D 
-=======
-from odp.computeGraphs import graph_1D, graph_2D, graph_3D, graph_4D, graph_5D, graph_6D
-from odp.TimeToReach import TTR_2D, TTR_3D, TTR_4D, TTR_5D 
->>>>>>> dev_hhy
-
-# Value Iteration library
-from odp.valueIteration import value_iteration_3D, value_iteration_4D, value_iteration_5D, value_iteration_6D
+from odp.numpyGraphs import graph_numpy
+from odp.executable_cache import executable_fingerprint, load_executable, save_executable, cache_report
+from odp.value_storage import open_valfuncs_memmap, load_valfuncs, create_value_artifact, finalize_value_artifact, \
+    save_value_artifact, dynamics_metadata
+from odp.checkpoint import save_checkpoint, load_checkpoint
+from odp.schedule import ScheduleOptions, ttr_schedule
+from odp.narrow_band import build_band, band_value, clamp_outside_band
+
+try:
+    import heterocl as hcl
+
+    # Backward reachable set computation library
+    from odp.computeGraphs import graph_1D, graph_2D, graph_3D, graph_4D, graph_5D, graph_6D, graph_7D, graph_8D
+    from odp.computeGraphs.graph_ND import graph_ND  # Any number of dimensions
+    from odp.TimeToReach import TTR_2D, TTR_3D, TTR_4D, TTR_5D
+    from odp.TimeToReach.TimeToReach_ND import TTR_ND
+
+    # Per-dimension executables, the default ones. graph_ND and TTR_ND are only used when passed as graph or for the
+    # options only they implement, until MRAG/benchmarks/compare_nd_graphs.py validates them against these
+    graph_by_dims = {1: graph_1D, 2: graph_2D, 3: graph_3D, 4: graph_4D, 5: graph_5D, 6: graph_6D, 7: graph_7D,
+                     8: graph_8D}
+    TTR_by_dims = {2: TTR_2D, 3: TTR_3D, 4: TTR_4D, 5: TTR_5D}
+
+    # Value Iteration library
+    from odp.valueIteration import value_iteration_3D, value_iteration_4D, value_iteration_5D, value_iteration_6D
+except ImportError:
+    # HeteroCL toolchain unavailable, only HJSolver(..., backend="numpy") can be used
+    hcl = None
 import os, psutil
 
 def solveValueIteration(MDP_obj):
@@ -93,7 +107,36 @@ def solveValueIteration(MDP_obj):
 
 def HJSolver(dynamics_obj, grid, multiple_value, tau, compMethod,
              plot_option, saveAllTimeSteps=False,
-             accuracy="low", untilConvergent=False, epsilon=2e-3):
+             accuracy="low", untilConvergent=False, epsilon=2e-3,
+             backend="heterocl", valfuncs_path=None,
+             checkpoint_path=None, checkpoint_interval=600.0, resume=False,
+             schedule=None, low_memory=False, narrow_band=None,
+             freeze_steps=None, freeze_tolerance=None, artifact_path=None, artifact_metadata=None,
+             constant_alpha=None, graph=None):
+    """ backend="numpy" runs the whole-array NumPy kernels of odp.numpyGraphs instead of the HeteroCL graphs.
+    The dynamics object then has to provide opt_ctrl_numpy, opt_dstb_numpy and dynamics_numpy.
+    With saveAllTimeSteps=True and valfuncs_path set, every time slice is streamed to a float32 .npy file
+    (see odp.value_storage) and a lazily loaded view of it is returned.
+    With checkpoint_path set, the state of the time loop is saved there every checkpoint_interval seconds
+    (see odp.checkpoint); resume=True continues from that checkpoint, see resumeHJSolver.
+    schedule (odp.schedule.ScheduleOptions) sets the loop fusion, split factor and thread count of the
+    HeteroCL executable, by default only the outermost grid axis is parallelized.
+    low_memory=True recomputes the one-sided derivatives in the dissipation pass instead of storing one
+    grid-sized deriv_diff array per dimension, which keeps peak memory at about 3 grid arrays.
+    narrow_band=k only updates the cells within k grid cells of the zero level set (see odp.narrow_band), the band
+    stays on the device and is only rebuilt when the executable flags a sign change on its border.
+    freeze_steps=N skips the cells whose value changed by less than freeze_tolerance (default epsilon) in each
+    of the last N steps until a neighbour changes again (see odp.numpyGraphs.frozen_cells), the stationary step
+    counts are kept on the device by the executable.
+    With artifact_path set, the result is written as a value artifact (see odp.value_storage) with the grid, tau,
+    the scalar parameters of dynamics_obj and artifact_metadata in its header; with saveAllTimeSteps=True the time
+    slices are streamed into it like valfuncs_path, and a lazily loaded view of it is returned.
+    constant_alpha (one dissipation coefficient per dimension) replaces the alpha evaluated from the dynamics, as the
+    MRAG_6D graph the SIG 6D values were computed with did.
+    graph is the HeteroCL graph generator, by default the per-dimension graph_1D ... graph_8D of odp.computeGraphs.
+    Pass graph_ND for the dimension-generic one, or e.g. odp.computeGraphs.MRAG_6D.graph_6D for the SIG 6D games.
+    schedule, low_memory, narrow_band, freeze_steps and constant_alpha are only implemented by graph_ND and select
+    it by default. """
 
     # print("Welcome to optimized_dp \n")
     if type(multiple_value) == list:
@@ -103,9 +146,27 @@ def HJSolver(dynamics_obj, grid, multiple_value, tau, compMethod,
     else:
         target = multiple_value
         constraint = None
-    
-    hcl.init()
-    hcl.config.init_dtype = hcl.Float(32)
+
+    if backend == "numpy":
+        asarray = lambda a: np.array(a, dtype=np.float32)
+        asnumpy = lambda a: np.array(a)
+    elif backend == "heterocl":
+        assert hcl is not None, "HeteroCL is not installed, use backend=\"numpy\""
+        nd_options = schedule is not None or low_memory or narrow_band is not None or freeze_steps is not None \
+            or constant_alpha is not None
+        if graph is None:
+            graph = graph_ND if nd_options or grid.dims not in graph_by_dims else graph_by_dims[grid.dims]
+        if graph is not graph_ND and nd_options:
+            raise ValueError("schedule, low_memory, narrow_band, freeze_steps and constant_alpha need graph_ND")
+        if schedule is None:
+            schedule = ScheduleOptions()
+        schedule.set_num_threads()
+        hcl.init()
+        hcl.config.init_dtype = hcl.Float(32)
+        asarray = hcl.asarray
+        asnumpy = lambda a: a.asnumpy()
+    else:
+        raise ValueError("Unknown HJSolver backend: {}".format(backend))
 
     ################# INITIALIZE DATA TO BE INPUT INTO EXECUTABLE ##########################
 
@@ -132,101 +193,85 @@ def HJSolver(dynamics_obj, grid, multiple_value, tau, compMethod,
     # print("Gigabytes consumed {}".format(process.memory_info().rss/1e9))  # in bytes
 
     # Tensors input to our computation graph
-    V_0 = hcl.asarray(init_value)
-    V_1 = hcl.asarray(np.zeros(tuple(grid.pts_each_dim)))
+    V_0 = asarray(init_value)
+    V_1 = asarray(np.zeros(tuple(grid.pts_each_dim)))
 
     process = psutil.Process(os.getpid())
     # print("Gigabytes consumed {}".format(process.memory_info().rss/1e9))  # in bytes
 
     # Check which target set or initial value set
     if compMethod["TargetSetMode"] != "minVWithVTarget" and compMethod["TargetSetMode"] != "maxVWithVTarget":
-        l0 = hcl.asarray(init_value)
+        l0 = asarray(init_value)
     else:
-        l0 = hcl.asarray(target)
+        l0 = asarray(target)
 
     del init_value
-    # For debugging purposes
-    if grid.dims == 4:
-        probe = hcl.asarray(np.zeros(tuple(grid.pts_each_dim)))
 
     process = psutil.Process(os.getpid())
     # print("Gigabytes consumed {}".format(process.memory_info().rss/1e9))  # in bytes
 
-    # Array for each state values
-    list_x1 = np.reshape(grid.vs[0], grid.pts_each_dim[0])
-<<<<<<< HEAD
-    list_x2 = np.reshape(grid.vs[1], grid.pts_each_dim[1])
-=======
-    if grid.dims >= 2:
-        list_x2 = np.reshape(grid.vs[1], grid.pts_each_dim[1])
->>>>>>> dev_hhy
-    if grid.dims >= 3:
-        list_x3 = np.reshape(grid.vs[2], grid.pts_each_dim[2])
-    if grid.dims >= 4:
-        list_x4 = np.reshape(grid.vs[3], grid.pts_each_dim[3])
-    if grid.dims >= 5:
-        list_x5 = np.reshape(grid.vs[4], grid.pts_each_dim[4])
-    if grid.dims >= 6:
-        list_x6 = np.reshape(grid.vs[5], grid.pts_each_dim[5])
-    if grid.dims >= 7:
-        list_x7 = np.reshape(grid.vs[6], grid.pts_each_dim[6])
-    if grid.dims >= 8:
-        list_x8 = np.reshape(grid.vs[7], grid.pts_each_dim[7])
-
-    # Convert state arrays to hcl array type
-    list_x1 = hcl.asarray(list_x1)
-<<<<<<< HEAD
-    list_x2 = hcl.asarray(list_x2)
-=======
-    if grid.dims >= 2:
-        list_x2 = hcl.asarray(list_x2)
->>>>>>> dev_hhy
-    if grid.dims >= 3:
-        list_x3 = hcl.asarray(list_x3)
-    if grid.dims >= 4:
-        list_x4 = hcl.asarray(list_x4)
-    if grid.dims >= 5:
-        list_x5 = hcl.asarray(list_x5)
-    if grid.dims >= 6:
-        list_x6 = hcl.asarray(list_x6)
-    if grid.dims >= 7:
-        list_x7 = hcl.asarray(list_x7)
-    if grid.dims >= 8:
-        list_x8 = hcl.asarray(list_x8)
+    # Array for each state values, converted to the backend array type
+    list_x = [asarray(np.reshape(grid.vs[dim], grid.pts_each_dim[dim])) for dim in range(grid.dims)]
 
-    # Get executable, obstacle check intial value function
-<<<<<<< HEAD
-=======
-    if grid.dims == 1:
-        solve_pde = graph_1D(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy)
-
->>>>>>> dev_hhy
-    if grid.dims == 2:
-        solve_pde = graph_2D(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy)
-
-    if grid.dims == 3:
-        solve_pde = graph_3D(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy)
-
-    if grid.dims == 4:
-        solve_pde = graph_4D(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy)
-
-    if grid.dims == 5:
-        solve_pde = graph_5D(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy)
+    # Obstacle applied inside the executable, -constraint as in the initial value
+    obstacle_mode = compMethod.get("ObstacleSetMode") if constraint is not None else None
+    if obstacle_mode is not None:
+        obstacle = asarray(-constraint_i)
+    else:
+        # Unused by the executable
+        obstacle = l0
+    # Max |V_new - V_old| of the last time step, written by the executable
+    max_diff = asarray(np.zeros(1))
+    # Whether the executable takes the band, band_border and band_exit arguments, and the counts and freeze ones
+    use_band = narrow_band is not None
+    use_freeze = freeze_steps is not None
+    # graph_4D also writes a probe array
+    probe_x = [asarray(np.zeros(tuple(grid.pts_each_dim)))] if backend == "heterocl" and graph is not graph_ND \
+        and grid.dims == 4 else []
 
-    if grid.dims == 6:
-        solve_pde = graph_6D(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy)
-    
-    if grid.dims == 7:
-        solve_pde = graph_7D(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy)
-    
-    if grid.dims == 8:
-        solve_pde = graph_8D(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy)
+    # Get executable, obstacle check intial value function
+    if backend == "numpy":
+        solve_pde = graph_numpy(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy,
+                                obstacleMode=obstacle_mode, low_memory=low_memory,
+                                narrowBand=use_band, freezeCells=use_freeze, constant_alpha=constant_alpha)
+    elif graph is graph_ND:
+        graph_key = executable_fingerprint("HJ", dynamics_obj, grid, accuracy, compMethod["TargetSetMode"],
+                                           graph=graph.__module__, obstacleMode=obstacle_mode,
+                                           schedule=schedule.fingerprint(), low_memory=low_memory,
+                                           narrowBand=use_band, freezeCells=use_freeze, constant_alpha=constant_alpha)
+        solve_pde = load_executable(graph_key)
+        if solve_pde is None:
+            # One generator for every number of dimensions
+            solve_pde = graph_ND(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy,
+                                 obstacleMode=obstacle_mode, schedule=schedule, low_memory=low_memory,
+                                 narrowBand=use_band, freezeCells=use_freeze, constant_alpha=constant_alpha)
+            save_executable(graph_key, solve_pde)
+    else:
+        graph_key = executable_fingerprint("HJ", dynamics_obj, grid, accuracy, compMethod["TargetSetMode"],
+                                           graph=graph.__module__, obstacleMode=obstacle_mode)
+        solve_pde = load_executable(graph_key)
+        if solve_pde is None:
+            solve_pde = graph(dynamics_obj, grid, compMethod["TargetSetMode"], accuracy, obstacleMode=obstacle_mode)
+            save_executable(graph_key, solve_pde)
 
     """ Be careful, for high-dimensional array (5D or higher), saving value arrays at all the time steps may 
-    cause your computer to run out of memory """
+    cause your computer to run out of memory, pass valfuncs_path to stream them to disk instead """
+    valfuncs_file = None
+    if artifact_path is not None:
+        artifact_metadata = dict(dynamics_metadata(dynamics_obj), compMethod=compMethod, accuracy=accuracy,
+                                 **(artifact_metadata or {}))
     if saveAllTimeSteps is True:
-        valfuncs = np.zeros(np.insert(tuple(grid.pts_each_dim), grid.dims, len(tau)))
-        valfuncs[..., -1 ] = V_0.asnumpy()
+        if artifact_path is not None:
+            # Only the slice being written stays in memory
+            valfuncs_file, valfuncs = create_value_artifact(artifact_path, grid, tau, len(tau), artifact_metadata,
+                                                            mode="r+" if resume is True else "w+")
+        elif valfuncs_path is None:
+            valfuncs = np.zeros(np.insert(tuple(grid.pts_each_dim), grid.dims, len(tau)))
+        else:
+            # Only the slice being written stays in memory
+            valfuncs_file, valfuncs = open_valfuncs_memmap(valfuncs_path, grid.pts_each_dim, len(tau),
+                                                           mode="r+" if resume is True else "w+")
+        valfuncs[..., -1 ] = asnumpy(V_0)
         print(valfuncs.shape)
 
 
@@ -235,6 +280,42 @@ def HJSolver(dynamics_obj, grid, multiple_value, tau, compMethod,
     execution_time = 0
     iter = 0
     tNow = tau[0]
+    start_index = 1
+
+    if resume is True:
+        assert checkpoint_path is not None, "resume=True needs the checkpoint_path to continue from"
+        checkpoint = load_checkpoint(checkpoint_path, grid, tau)
+        V_0 = asarray(checkpoint["V"])
+        V_1 = asarray(checkpoint["V"])
+        tNow = checkpoint["tNow"]
+        start_index = len(tau) if checkpoint["converged"] else checkpoint["tau_index"]
+        iter = checkpoint["iteration"]
+        execution_time = checkpoint["execution_time"]
+        if saveAllTimeSteps is True and valfuncs_file is None and "valfuncs" in checkpoint:
+            valfuncs[...] = checkpoint["valfuncs"]
+        del checkpoint
+        print("Resuming at t = {:.5f} (tau index {})\n".format(tNow, start_index))
+
+    # The narrow band (values outside of it are clamped) and the stationary step counts of the frozen cells stay
+    # on the device, the executable flags when the band has to be rebuilt
+    band_x = []
+    band_fractions = []
+    band_rebuilds = 0
+    freeze_x = []
+    if use_band:
+        V = asnumpy(V_0)
+        band, border = build_band(V, grid, narrow_band)
+        clamp_outside_band(V, band, band_value(grid, narrow_band))
+        V_0 = asarray(V)
+        V_1 = asarray(V)
+        band_exit = asarray(np.zeros(1))
+        band_x = [asarray(band), asarray(border), band_exit]
+        band_fraction = float(np.mean(band))
+    if use_freeze:
+        freeze_x = [asarray(np.zeros(tuple(grid.pts_each_dim))),
+                    asarray(np.array([freeze_steps, epsilon if freeze_tolerance is None else freeze_tolerance]))]
+
+    last_checkpoint = time.time()
     print("Started running\n")
 
     process = psutil.Process(os.getpid())
@@ -242,109 +323,144 @@ def HJSolver(dynamics_obj, grid, multiple_value, tau, compMethod,
 
     # Backward reachable set/tube will be computed over the specified time horizon
     # Or until convergent ( which ever happens first )
-    for i in range (1, len(tau)):
+    for i in range (start_index, len(tau)):
         #tNow = tau[i-1]
-        t_minh= hcl.asarray(np.array((tNow, tau[i])))
+        t_minh= asarray(np.array((tNow, tau[i])))
         
         # taking obstacle at each timestep
-        if "ObstacleSetMode" in compMethod and constraint_dim > grid.dims:
-            constraint_i = constraint[...,i]
+        if obstacle_mode is not None and constraint_dim > grid.dims:
+            obstacle = asarray(-constraint[...,i])
 
         while tNow <= tau[i] - 1e-4:
-            prev_arr = V_0.asnumpy()
             # Start timing
             iter += 1
             start = time.time()
 
             # Run the execution and pass input into graph
-<<<<<<< HEAD
-=======
-            if grid.dims == 1:
-                solve_pde(V_1, V_0, list_x1, t_minh, l0)
->>>>>>> dev_hhy
-            if grid.dims == 2:
-                solve_pde(V_1, V_0, list_x1, list_x2, t_minh, l0)
-            if grid.dims == 3:
-                solve_pde(V_1, V_0, list_x1, list_x2, list_x3, t_minh, l0)
-            if grid.dims == 4:
-                solve_pde(V_1, V_0, list_x1, list_x2, list_x3, list_x4, t_minh, l0, probe)
-            if grid.dims == 5:
-                solve_pde(V_1, V_0, list_x1, list_x2, list_x3, list_x4, list_x5 ,t_minh, l0)
-            if grid.dims == 6:
-                solve_pde(V_1, V_0, list_x1, list_x2, list_x3, list_x4, list_x5, list_x6, t_minh, l0)
-            if grid.dims == 7:
-                solve_pde(V_1, V_0, list_x1, list_x2, list_x3, list_x4, list_x5, list_x6, list_x7, t_minh, l0)
-            if grid.dims == 8:
-                solve_pde(V_1, V_0, list_x1, list_x2, list_x3, list_x4, list_x5, list_x6, list_x7, list_x8, t_minh, l0)
-
-            tNow = t_minh.asnumpy()[0]
+            if backend == "numpy":
+                solve_pde(V_1, V_0, t_minh, l0, obstacle, max_diff, *band_x, *freeze_x)
+            else:
+                solve_pde(V_1, V_0, *list_x, t_minh, l0, *probe_x, obstacle, max_diff, *band_x, *freeze_x)
+
+            tNow = asnumpy(t_minh)[0]
             process = psutil.Process(os.getpid())
             # print("Gigabytes consumed {}".format(process.memory_info().rss/1e9))  # in bytes
 
             # Calculate computation time
             execution_time += time.time() - start
 
-            # If ObstacleSetMode is specified by user
-            if "ObstacleSetMode" in compMethod:
-                if compMethod["ObstacleSetMode"] == "maxVWithObstacle":
-                    tmp_val = np.maximum(V_0.asnumpy(), -constraint_i)
-                elif compMethod["ObstacleSetMode"] == "minVWithObstacle":
-                    tmp_val = np.minimum(V_0.asnumpy(), -constraint_i)
-
-                # Update final result
-                V_1 = hcl.asarray(tmp_val)
-                # Update input for next iteration
-                V_0 = hcl.asarray(tmp_val)
-
             # Some information printin
             print(t_minh)
             print("Computational time to integrate (s): {:.5f}".format(time.time() - start))
+
+            if use_band:
+                band_fractions.append(band_fraction)
+                # Rebuild the band once the executable saw the front reach its border cells
+                if asnumpy(band_exit)[0] > 0:
+                    V = asnumpy(V_0)
+                    band, border = build_band(V, grid, narrow_band)
+                    clamp_outside_band(V, band, band_value(grid, narrow_band))
+                    V_0 = asarray(V)
+                    V_1 = asarray(V)
+                    band_x = [asarray(band), asarray(border), band_exit]
+                    band_fraction = float(np.mean(band))
+                    band_rebuilds += 1
+                    print("Rebuilt the narrow band, active cells: {:.2%}".format(band_fraction))
+                    # The clamped values outside of the new band count as changed
+                    if use_freeze:
+                        freeze_x[0] = asarray(np.zeros(tuple(grid.pts_each_dim)))
             process = psutil.Process(os.getpid())
             # print("Gigabytes consumed {}".format(process.memory_info().rss/1e9))  # in bytes
 
             if untilConvergent is True:
-                # Compare difference between V_{t-1} and V_{t} and choose the max changes
-                diff = np.amax(np.abs(V_1.asnumpy() - prev_arr))
+                # Max changes between V_{t-1} and V_{t}, reduced inside the executable
+                diff = asnumpy(max_diff)[0]
                 print("Max difference between V_old and V_new : {:.5f}".format(diff))
                 if diff < epsilon:
                     print("Result converged ! Exiting the compute loop. Have a good day.")
+                    if checkpoint_path is not None:
+                        save_checkpoint(checkpoint_path, asnumpy(V_0), tNow, i, tau, iter, execution_time,
+                                        converged=True,
+                                        valfuncs=valfuncs if saveAllTimeSteps is True and valfuncs_file is None else None)
                     break
+
+            # Periodically save the state of the time loop
+            if checkpoint_path is not None and time.time() - last_checkpoint >= checkpoint_interval:
+                if valfuncs_file is not None:
+                    valfuncs_file.flush()
+                save_checkpoint(checkpoint_path, asnumpy(V_0), tNow, i, tau, iter, execution_time,
+                                valfuncs=valfuncs if saveAllTimeSteps is True and valfuncs_file is None else None)
+                last_checkpoint = time.time()
         else: # if it didn't break because of convergent condition
             if saveAllTimeSteps is True:
-                valfuncs[..., -1-i] = V_1.asnumpy()
+                valfuncs[..., -1-i] = asnumpy(V_1)
+                if valfuncs_file is not None:
+                    valfuncs_file.flush()
             continue
         break # only if convergent condition is achieved
 
 
     # Time info printing
     print("Total kernel time (s): {:.5f}".format(execution_time))
+    if band_fractions:
+        print("Mean active cell fraction: {:.2%}".format(np.mean(band_fractions)))
+    if use_band:
+        print("Narrow band rebuilds: {}".format(band_rebuilds))
+    if use_freeze:
+        print("Stationary cell fraction at the end: {:.2%}".format(np.mean(asnumpy(freeze_x[0]) >= freeze_steps)))
+    if backend == "heterocl":
+        print(cache_report())
     print("Finished solving\n")
 
     ##################### PLOTTING #####################
     if plot_option.do_plot :
+        # Plotting needs plotly and matplotlib, only import them when a plot is asked for
+        from odp.Plots import plot_isosurface, plot_valuefunction
         # Only plots last value array for now
         if plot_option.plot_type == "set":
             if saveAllTimeSteps is True:
                 plot_isosurface(grid, valfuncs, plot_option)
             else:
-                plot_isosurface(grid, V_1.asnumpy(), plot_option)
+                plot_isosurface(grid, asnumpy(V_1), plot_option)
         elif plot_option.plot_type == "value":
             if saveAllTimeSteps is True:
                 plot_valuefunction(grid, valfuncs, plot_option)
             else:
-                plot_valuefunction(grid, V_1.asnumpy(), plot_option)
+                plot_valuefunction(grid, asnumpy(V_1), plot_option)
 
     if saveAllTimeSteps is True:
-        valfuncs[..., 0] = V_1.asnumpy()
+        valfuncs[..., 0] = asnumpy(V_1)
+        if valfuncs_file is not None:
+            valfuncs_file.flush()
+            del valfuncs_file, valfuncs
+            if artifact_path is not None:
+                return finalize_value_artifact(artifact_path).values()
+            return load_valfuncs(valfuncs_path)
         return valfuncs
 
-    return V_1.asnumpy()
+    if artifact_path is not None:
+        return save_value_artifact(artifact_path, asnumpy(V_1), grid, tau, artifact_metadata).values()
+    return asnumpy(V_1)
 
-def TTRSolver(dynamics_obj, grid, init_value, epsilon, plot_option):
+def resumeHJSolver(dynamics_obj, grid, multiple_value, tau, compMethod, plot_option, checkpoint_path, **kwargs):
+    """ Continues an HJSolver computation from the latest checkpoint in checkpoint_path.
+    The arguments have to be the same as the ones of the interrupted HJSolver call. """
+    return HJSolver(dynamics_obj, grid, multiple_value, tau, compMethod, plot_option,
+                    checkpoint_path=checkpoint_path, resume=True, **kwargs)
+
+def TTRSolver(dynamics_obj, grid, init_value, epsilon, plot_option, schedule=None, graph=None):
+    """ graph is the HeteroCL graph generator, by default the per-dimension TTR_2D ... TTR_5D. Pass TTR_ND for the
+    dimension-generic one (2^dims sweep directions), a schedule is only implemented by TTR_ND and selects it. """
     print("Welcome to optimized_dp \n")
     ################# INITIALIZE DATA TO BE INPUT INTO EXECUTABLE ##########################
 
     print("Initializing\n")
+    if graph is None:
+        graph = TTR_ND if schedule is not None or grid.dims not in TTR_by_dims else TTR_by_dims[grid.dims]
+    # Loop fusion, split factor and thread count of the sweeps, see odp.schedule
+    if schedule is None:
+        schedule = ttr_schedule(grid.dims)
+    schedule.set_num_threads()
     hcl.init()
     hcl.config.init_dtype = hcl.Float(32)
 
@@ -354,45 +470,23 @@ def TTRSolver(dynamics_obj, grid, init_value, epsilon, plot_option):
     V_0 = hcl.asarray(init_value)
     prev_val = np.zeros(init_value.shape)
 
-    # Re-shape states vector
-    list_x1 = np.reshape(grid.vs[0], grid.pts_each_dim[0])
-    if grid.dims >= 2:
-        list_x2 = np.reshape(grid.vs[1], grid.pts_each_dim[1])
-    if grid.dims >= 3:
-        list_x3 = np.reshape(grid.vs[2], grid.pts_each_dim[2])
-    if grid.dims >= 4:
-        list_x4 = np.reshape(grid.vs[3], grid.pts_each_dim[3])
-    if grid.dims >= 5:
-        list_x5 = np.reshape(grid.vs[4], grid.pts_each_dim[4])
-    if grid.dims >= 6:
-        list_x6 = np.reshape(grid.vs[5], grid.pts_each_dim[5])
-
-    # Convert states vector to hcl array type
-    list_x1 = hcl.asarray(list_x1)
-    if grid.dims >= 2:
-        list_x2 = hcl.asarray(list_x2)
-    if grid.dims >= 3:
-        list_x3 = hcl.asarray(list_x3)
-    if grid.dims >= 4:
-        list_x4 = hcl.asarray(list_x4)
-    if grid.dims >= 5:
-        list_x5 = hcl.asarray(list_x5)
-    if grid.dims >= 6:
-        list_x6 = hcl.asarray(list_x6)
+    # Array for each state values, converted to hcl array type
+    list_x = [hcl.asarray(np.reshape(grid.vs[dim], grid.pts_each_dim[dim])) for dim in range(grid.dims)]
 
     # Get executable
-    # if grid.dims == 1:
-    #     solve_TTR = TTR_1D(dynamics_obj, grid)
-    if grid.dims == 2:
-        solve_TTR = TTR_2D(dynamics_obj, grid)
-    if grid.dims == 3:
-        solve_TTR = TTR_3D(dynamics_obj, grid)
-    if grid.dims == 4:
-        solve_TTR = TTR_4D(dynamics_obj, grid)
-    if grid.dims == 5:
-        solve_TTR = TTR_5D(dynamics_obj, grid)
-    if grid.dims == 6:
-        solve_TTR = TTR_6D(dynamics_obj, grid)
+    if graph is TTR_ND:
+        graph_key = executable_fingerprint("TTR", dynamics_obj, grid, None, graph=graph.__module__,
+                                           schedule=schedule.fingerprint())
+    else:
+        graph_key = executable_fingerprint("TTR", dynamics_obj, grid, None, graph=graph.__module__)
+    solve_TTR = load_executable(graph_key)
+    if solve_TTR is None:
+        if graph is TTR_ND:
+            # One generator for every number of dimensions
+            solve_TTR = TTR_ND(dynamics_obj, grid, schedule=schedule)
+        else:
+            solve_TTR = graph(dynamics_obj, grid)
+        save_executable(graph_key, solve_TTR)
     print("Got Executable\n")
 
     # Print out code for different backend
@@ -405,26 +499,18 @@ def TTRSolver(dynamics_obj, grid, init_value, epsilon, plot_option):
     while error > epsilon:
         print("Iteration: {} Error: {}".format(count, error))
         count += 1
-        if grid.dims == 1:
-            solve_TTR(V_0, list_x1)
-        if grid.dims == 2:
-            solve_TTR(V_0, list_x1, list_x2)
-        if grid.dims == 3:
-            solve_TTR(V_0, list_x1, list_x2, list_x3)
-        if grid.dims == 4:
-            solve_TTR(V_0, list_x1, list_x2, list_x3, list_x4)
-        if grid.dims == 5:
-            solve_TTR(V_0, list_x1, list_x2, list_x3, list_x4, list_x5)
-        if grid.dims == 6:
-            solve_TTR(V_0, list_x1, list_x2, list_x3, list_x4, list_x5, list_x6 )
+        solve_TTR(V_0, *list_x)
 
         error = np.max(np.abs(prev_val - V_0.asnumpy()))
         prev_val = V_0.asnumpy()
     print("Total TTR computation time (s): {:.5f}".format(time.time() - start))
+    print(cache_report())
     print("Finished solving\n")
 
     ##################### PLOTTING #####################
     if plot_option.do_plot :
+        # Plotting needs plotly and matplotlib, only import them when a plot is asked for
+        from odp.Plots import plot_isosurface, plot_valuefunction
         # Only plots last value array for now
         if plot_option.plot_type == "set":
             plot_isosurface(grid, V_0.asnumpy(), plot_option)
@@ -433,8 +519,11 @@ def TTRSolver(dynamics_obj, grid, init_value, epsilon, plot_option):
 
     return V_0.asnumpy()
 
-def computeSpatDerivArray(grid, V, deriv_dim, accuracy="low"):
+def computeSpatDerivArray(grid, V, deriv_dim, accuracy="low", graph=None):
     # Return a tensor same size as V that contains spatial derivatives at every state in V
+    # graph_7D and graph_8D do not generate derivatives, graph_ND does for any number of dimensions
+    if graph is None:
+        graph = graph_by_dims[grid.dims] if grid.dims <= 6 else graph_ND
     hcl.init()
     hcl.config.init_dtype = hcl.Float(32)
 
@@ -445,30 +534,11 @@ def computeSpatDerivArray(grid, V, deriv_dim, accuracy="low"):
     spatial_deriv = hcl.asarray(np.zeros(tuple(grid.pts_each_dim)))
 
     # Get executable, obstacle check intial value function
-<<<<<<< HEAD
-=======
-    if grid.dims == 1:
-        compute_SpatDeriv = graph_1D(None, grid, "None", accuracy,
-                                     generate_SpatDeriv=True, deriv_dim=deriv_dim)
->>>>>>> dev_hhy
-    if grid.dims == 2:
-        compute_SpatDeriv = graph_2D(None, grid, "None", accuracy,
-                                     generate_SpatDeriv=True, deriv_dim=deriv_dim)
-    if grid.dims == 3:
-        compute_SpatDeriv = graph_3D(None, grid, "None", accuracy,
-                                     generate_SpatDeriv=True, deriv_dim=deriv_dim)
-    if grid.dims == 4:
-        compute_SpatDeriv = graph_4D(None, grid, "None", accuracy,
-                                     generate_SpatDeriv=True, deriv_dim=deriv_dim)
-    if grid.dims == 5:
-        compute_SpatDeriv = graph_5D(None, grid, "None", accuracy,
-                                     generate_SpatDeriv=True, deriv_dim=deriv_dim)
-    if grid.dims == 6:
-        compute_SpatDeriv = graph_6D(None, grid, "None", accuracy,
-                                     generate_SpatDeriv=True, deriv_dim=deriv_dim)
-    if grid.dims == 8:
-        compute_SpatDeriv = graph_8D(None, grid, "None", accuracy,
-                                     generate_SpatDeriv=True, deriv_dim=deriv_dim)
+    graph_key = executable_fingerprint("SpatDeriv", None, grid, accuracy, graph=graph.__module__, deriv_dim=deriv_dim)
+    compute_SpatDeriv = load_executable(graph_key)
+    if compute_SpatDeriv is None:
+        compute_SpatDeriv = graph(None, grid, "None", accuracy, generate_SpatDeriv=True, deriv_dim=deriv_dim)
+        save_executable(graph_key, compute_SpatDeriv)
 
     compute_SpatDeriv(V_0, spatial_deriv)
     return spatial_deriv.asnumpy()
@@ -0,0 +1,136 @@
+import heterocl as hcl
+from odp.computeGraphs.CustomGraphFunctions import *
+
+################## N-D SPATIAL DERIVATIVE FUNCTIONS #################
+# Same boundary handling as first_orderENO{1..6}D / second_orderENO{1..6}D, the grid point is given as an
+# index tuple so that one function serves every dimension of V.
+
+def _neighbour(V, idx, dim, index):
+    # V at idx with the coordinate of dim replaced by index
+    return V[idx[:dim] + (index,) + idx[dim + 1:]]
+
+
+def spa_deriv_ND(idx, V, g, dim):
+    """First order ENO left and right derivatives of V along dim (0-indexed) at the index tuple idx"""
+    left_deriv = hcl.scalar(0, "left_deriv")
+    right_deriv = hcl.scalar(0, "right_deriv")
+    i = idx[dim]
+    V_i = V[idx]
+    if dim not in g.pDim:
+        with hcl.if_(i == 0):
+            left_boundary = hcl.scalar(0, "left_boundary")
+            left_boundary[0] = V_i + my_abs(_neighbour(V, idx, dim, i + 1) - V_i) * my_sign(V_i)
+            left_deriv[0] = (V_i - left_boundary[0]) / g.dx[dim]
+            right_deriv[0] = (_neighbour(V, idx, dim, i + 1) - V_i) / g.dx[dim]
+        with hcl.elif_(i == V.shape[dim] - 1):
+            right_boundary = hcl.scalar(0, "right_boundary")
+            right_boundary[0] = V_i + my_abs(V_i - _neighbour(V, idx, dim, i - 1)) * my_sign(V_i)
+            left_deriv[0] = (V_i - _neighbour(V, idx, dim, i - 1)) / g.dx[dim]
+            right_deriv[0] = (right_boundary[0] - V_i) / g.dx[dim]
+        with hcl.else_():
+            left_deriv[0] = (V_i - _neighbour(V, idx, dim, i - 1)) / g.dx[dim]
+            right_deriv[0] = (_neighbour(V, idx, dim, i + 1) - V_i) / g.dx[dim]
+    else:
+        with hcl.if_(i == 0):
+            left_boundary = hcl.scalar(0, "left_boundary")
+            left_boundary[0] = _neighbour(V, idx, dim, V.shape[dim] - 1)
+            left_deriv[0] = (V_i - left_boundary[0]) / g.dx[dim]
+            right_deriv[0] = (_neighbour(V, idx, dim, i + 1) - V_i) / g.dx[dim]
+        with hcl.elif_(i == V.shape[dim] - 1):
+            right_boundary = hcl.scalar(0, "right_boundary")
+            right_boundary[0] = _neighbour(V, idx, dim, 0)
+            left_deriv[0] = (V_i - _neighbour(V, idx, dim, i - 1)) / g.dx[dim]
+            right_deriv[0] = (right_boundary[0] - V_i) / g.dx[dim]
+        with hcl.else_():
+            left_deriv[0] = (V_i - _neighbour(V, idx, dim, i - 1)) / g.dx[dim]
+            right_deriv[0] = (_neighbour(V, idx, dim, i + 1) - V_i) / g.dx[dim]
+    return left_deriv[0], right_deriv[0]
+
+
+def secondOrder_ENO_ND(idx, V, g, dim):
+    """Second order ENO left and right derivatives of V along dim (0-indexed) at the index tuple idx"""
+    left_deriv = hcl.scalar(0, "left_deriv")
+    right_deriv = hcl.scalar(0, "right_deriv")
+    axis_step = g.dx[dim]
+    V_i_plus_1 = hcl.scalar(0, "V_i_plus_1")
+    V_i_minus_1 = hcl.scalar(0, "V_i_minus_1")
+    V_i_plus_2 = hcl.scalar(0, "V_i_plus_2")
+    V_i_minus_2 = hcl.scalar(0, "V_i_minus_2")
+    i = idx[dim]
+    n = V.shape[dim]
+    V_i = V[idx]
+
+    def at(index):
+        return _neighbour(V, idx, dim, index)
+
+    if dim not in g.pDim:
+        with hcl.if_(i == 0):
+            V_i_minus_1[0] = V_i + my_abs(at(i + 1) - V_i) * my_sign(V_i)
+            V_i_minus_2[0] = V_i + 2 * my_abs(at(i + 1) - V_i) * my_sign(V_i)
+            V_i_plus_1[0] = at(i + 1)
+            V_i_plus_2[0] = at(i + 2)
+        with hcl.elif_(i == 1):
+            V_i_minus_1[0] = at(i - 1)
+            V_i_minus_2[0] = V_i + my_abs(V_i - at(i - 1)) * my_sign(V_i)
+            V_i_plus_1[0] = at(i + 1)
+            V_i_plus_2[0] = at(i + 2)
+        with hcl.elif_(i == n - 1):
+            V_i_minus_1[0] = at(i - 1)
+            V_i_minus_2[0] = at(i - 2)
+            V_i_plus_1[0] = V_i + my_abs(V_i - at(i - 1)) * my_sign(V_i)
+            V_i_plus_2[0] = V_i + 2 * my_abs(V_i - at(i - 1)) * my_sign(V_i)
+        with hcl.elif_(i == n - 2):
+            V_i_minus_1[0] = at(i - 1)
+            V_i_minus_2[0] = at(i - 2)
+            V_i_plus_1[0] = at(i + 1)
+            V_i_plus_2[0] = V_i + my_abs(at(i + 1) - V_i) * my_sign(V_i)
+        with hcl.else_():
+            V_i_minus_1[0] = at(i - 1)
+            V_i_minus_2[0] = at(i - 2)
+            V_i_plus_1[0] = at(i + 1)
+            V_i_plus_2[0] = at(i + 2)
+    else:
+        with hcl.if_(i == 0):
+            V_i_minus_1[0] = at(n - 1)
+            V_i_minus_2[0] = at(n - 2)
+            V_i_plus_1[0] = at(i + 1)
+            V_i_plus_2[0] = at(i + 2)
+        with hcl.elif_(i == 1):
+            V_i_minus_1[0] = at(i - 1)
+            V_i_minus_2[0] = at(n - 1)
+            V_i_plus_1[0] = at(i + 1)
+            V_i_plus_2[0] = at(i + 2)
+        with hcl.elif_(i == n - 1):
+            V_i_minus_1[0] = at(i - 1)
+            V_i_minus_2[0] = at(i - 2)
+            V_i_plus_1[0] = at(0)
+            V_i_plus_2[0] = at(1)
+        with hcl.elif_(i == n - 2):
+            V_i_minus_1[0] = at(i - 1)
+            V_i_minus_2[0] = at(i - 2)
+            V_i_plus_1[0] = at(i + 1)
+            V_i_plus_2[0] = at(0)
+        with hcl.else_():
+            V_i_minus_1[0] = at(i - 1)
+            V_i_minus_2[0] = at(i - 2)
+            V_i_plus_1[0] = at(i + 1)
+            V_i_plus_2[0] = at(i + 2)
+    D1_minus_2_plus_half = (V_i_minus_1[0] - V_i_minus_2[0]) / axis_step
+    D1_minus_1_plus_half = (V_i - V_i_minus_1[0]) / axis_step
+    D1_0_plus_half = (V_i_plus_1[0] - V_i) / axis_step
+    D1_plus_1_plus_half = (V_i_plus_2[0] - V_i_plus_1[0]) / axis_step
+
+    D2_minus_1 = (D1_minus_1_plus_half - D1_minus_2_plus_half) / (2 * axis_step)
+    D2_0 = (D1_0_plus_half - D1_minus_1_plus_half) / (2 * axis_step)
+    D2_plus_1 = (D1_plus_1_plus_half - D1_0_plus_half) / (2 * axis_step)
+
+    with hcl.if_(my_abs(D2_minus_1) <= my_abs(D2_0)):
+        left_deriv[0] = D1_minus_1_plus_half + D2_minus_1 * axis_step
+    with hcl.else_():
+        left_deriv[0] = D1_minus_1_plus_half + D2_0 * axis_step
+
+    with hcl.if_(my_abs(D2_0) <= my_abs(D2_plus_1)):
+        right_deriv[0] = D1_0_plus_half - D2_0 * axis_step
+    with hcl.else_():
+        right_deriv[0] = D1_0_plus_half - D2_plus_1 * axis_step
+    return left_deriv[0], right_deriv[0]
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+from odp.Grid import Grid
+
+""" On-disk storage of value functions over time
+
+HJSolver(..., saveAllTimeSteps=True, valfuncs_path=...) streams every completed time slice into a float32 .npy
+file instead of keeping grid x len(tau) values in RAM. The file stores time as its LEADING axis so that each
+slice is one contiguous block; load_valfuncs returns the usual time-last view of it (valfuncs[..., -1] is the
+initial value function, valfuncs[..., 0] the final one) without reading the data.
+
+A value artifact is a directory (by convention <name>.value) that describes itself:
+    header.json  format version, grid (bounds, pts_each_dim, periodic dims), tau, dtype, shape, the sha256 of the
+                 data and free metadata (dynamics class, speeds, modes, ...)
+    values.npy   little-endian float32 values, time first like open_valfuncs_memmap when there are time slices
+open_value_artifact rebuilds the Grid from the header and reads single time slices without loading the others.
+"""
+
+ARTIFACT_FORMAT = "odp-value"
+ARTIFACT_VERSION = 1
+ARTIFACT_HEADER = "header.json"
+ARTIFACT_VALUES = "values.npy"
+
+
+def open_valfuncs_memmap(path, pts_each_dim, num_slices, mode="w+"):
+    """Creates a float32 .npy file holding num_slices value functions
+
+    Args:
+        path (str): path of the .npy file
+        pts_each_dim (np.ndarray): number of grid points in each dimension
+        num_slices (int): number of time slices, usually len(tau)
+        mode (str, optional): "w+" creates the file, "r+" reopens it when resuming a computation. Defaults to "w+".
+
+    Returns:
+        tuple: (memmap, valfuncs), the writable memmap with time first and its time-last view
+    """
+    shape = (int(num_slices),) + tuple(int(n) for n in pts_each_dim)
+    if mode == "r+":
+        memmap = np.load(path, mmap_mode="r+")
+        assert memmap.shape == shape, "{} holds value functions of shape {}, expected {}".format(path, memmap.shape, shape)
+    else:
+        memmap = np.lib.format.open_memmap(path, mode=mode, dtype=np.float32, shape=shape)
+    return memmap, np.moveaxis(memmap, 0, -1)
+
+
+def load_valfuncs(path, mmap_mode="r"):
+    """Lazily loads value functions written by open_valfuncs_memmap
+
+    Args:
+        path (str): path of the .npy file
+        mmap_mode (str, optional): memory-map mode passed to np.load. Defaults to "r".
+
+    Returns:
+        np.ndarray: time-last view of the value functions, slices are only read when indexed
+    """
+    return np.moveaxis(np.load(path, mmap_mode=mmap_mode), 0, -1)
+
+
+def _grid_header(grid):
+    # constructor arguments of the grid, Grid excludes the upper bound of periodic dimensions from self.max
+    maxBounds = np.array(grid.max, dtype=np.float64)
+    for dim in grid.pDim:
+        n = grid.pts_each_dim[dim]
+        maxBounds[dim] = grid.min[dim] + (grid.max[dim] - grid.min[dim]) * n / (n - 1)
+    return {"min": [float(v) for v in grid.min], "max": maxBounds.tolist(),
+            "pts_each_dim": [int(n) for n in grid.pts_each_dim], "periodic_dims": [int(d) for d in grid.pDim]}
+
+
+def _jsonable(metadata):
+    # numpy scalars and arrays in the metadata are written as plain numbers and lists
+    return json.loads(json.dumps(metadata, default=lambda v: v.tolist() if hasattr(v, "tolist") else str(v)))
+
+
+def _content_hash(values):
+    # sha256 of the raw little-endian data, one leading index at a time so a memmap is never read as a whole
+    sha = hashlib.sha256()
+    for i in range(values.shape[0]):
+        sha.update(np.ascontiguousarray(values[i], dtype="<f4").tobytes())
+    return sha.hexdigest()
+
+
+def _write_header(path, header):
+    tmp_path = os.path.join(path, "{}.{}.tmp".format(ARTIFACT_HEADER, os.getpid()))
+    with open(tmp_path, "w") as f:
+        json.dump(header, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, ARTIFACT_HEADER))
+
+
+def dynamics_metadata(dynamics_obj):
+    """Class name and scalar parameters (speeds, modes, ...) of a dynamics object, recorded in artifact headers"""
+    metadata = {"dynamics": type(dynamics_obj).__name__}
+    for key, value in vars(dynamics_obj).items():
+        if isinstance(value, (bool, int, float, str, np.generic)):
+            metadata[key] = value.item() if isinstance(value, np.generic) else value
+    return metadata
+
+
+def create_value_artifact(path, grid, tau=None, num_slices=None, metadata=None, mode="w+"):
+    """Creates a value artifact whose values are written afterwards, e.g. one time slice at a time by HJSolver
+
+    Args:
+        path (str): directory of the artifact
+        grid (Grid): grid of the value function
+        tau (np.ndarray, optional): time horizon of the computation. Defaults to None.
+        num_slices (int, optional): number of time slices, None for a single value function. Defaults to None.
+        metadata (dict, optional): dynamics parameters and anything else describing the values. Defaults to None.
+        mode (str, optional): "w+" creates the artifact, "r+" reopens it when resuming a computation. Defaults to "w+".
+
+    Returns:
+        tuple: (memmap, values), the writable memmap and its time-last view (the memmap itself without time slices)
+    """
+    pts_each_dim = tuple(int(n) for n in grid.pts_each_dim)
+    shape = pts_each_dim if num_slices is None else (int(num_slices),) + pts_each_dim
+    values_path = os.path.join(path, ARTIFACT_VALUES)
+    if mode == "r+":
+        memmap = np.load(values_path, mmap_mode="r+")
+        assert memmap.shape == shape, "{} holds values of shape {}, expected {}".format(path, memmap.shape, shape)
+    else:
+        os.makedirs(path, exist_ok=True)
+        memmap = np.lib.format.open_memmap(values_path, mode=mode, dtype=np.dtype("<f4"), shape=shape)
+        header = {"format": ARTIFACT_FORMAT, "version": ARTIFACT_VERSION, "grid": _grid_header(grid),
+                  "tau": None if tau is None else np.asarray(tau, dtype=np.float64).tolist(),
+                  "time_slices": None if num_slices is None else int(num_slices),
+                  "dtype": "<f4", "shape": list(shape), "parts": [ARTIFACT_VALUES], "sha256": None,
+                  "metadata": _jsonable(metadata or {})}
+        _write_header(path, header)
+    if num_slices is None:
+        return memmap, memmap
+    return memmap, np.moveaxis(memmap, 0, -1)
+
+
+def finalize_value_artifact(path, content_hash=True):
+    """Writes the content hash of an artifact created by create_value_artifact once all values are written
+
+    Args:
+        path (str): directory of the artifact
+        content_hash (bool, optional): False leaves the hash empty, e.g. for short-lived copies. Defaults to True.
+
+    Returns:
+        ValueArtifact: the artifact, opened read-only
+    """
+    if content_hash:
+        with open(os.path.join(path, ARTIFACT_HEADER)) as f:
+            header = json.load(f)
+        header["sha256"] = _content_hash(np.load(os.path.join(path, ARTIFACT_VALUES), mmap_mode="r"))
+        _write_header(path, header)
+    return ValueArtifact(path)
+
+
+def save_value_artifact(path, values, grid, tau=None, metadata=None, content_hash=True):
+    """Saves a value function as a value artifact
+
+    Args:
+        path (str): directory of the artifact
+        values (np.ndarray): the value function on grid, optionally with the time slices on the last axis
+        grid (Grid): grid of the value function
+        tau (np.ndarray, optional): time horizon of the computation. Defaults to None.
+        metadata (dict, optional): dynamics parameters and anything else describing the values. Defaults to None.
+        content_hash (bool, optional): whether to compute the sha256 of the data. Defaults to True.
+
+    Returns:
+        ValueArtifact: the saved artifact, opened read-only
+    """
+    assert values.shape[:grid.dims] == tuple(grid.pts_each_dim) and values.ndim in (grid.dims, grid.dims + 1), \
+        "Values of shape {} do not match the grid {}".format(values.shape, tuple(grid.pts_each_dim))
+    num_slices = values.shape[-1] if values.ndim == grid.dims + 1 else None
+    memmap, view = create_value_artifact(path, grid, tau, num_slices, metadata)
+    if num_slices is None:
+        view[...] = values
+    else:
+        for i in range(num_slices):
+            memmap[i] = values[..., i]
+    memmap.flush()
+    del memmap, view
+    return finalize_value_artifact(path, content_hash)
+
+
+def is_value_artifact(path):
+    """Whether path is a value artifact directory"""
+    return os.path.isfile(os.path.join(path, ARTIFACT_HEADER))
+
+
+def open_value_artifact(path):
+    """Opens a value artifact, see ValueArtifact"""
+    return ValueArtifact(path)
+
+
+class ValueArtifact:
+    """A value artifact opened read-only
+
+    Attributes:
+        header (dict): the content of header.json
+        grid (Grid): the grid rebuilt from the header
+        tau (np.ndarray): the time horizon, None if it was not recorded
+        metadata (dict): the metadata given when saving
+        num_slices (int): the number of time slices, None for a single value function
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, ARTIFACT_HEADER)) as f:
+            self.header = json.load(f)
+        assert self.header.get("format") == ARTIFACT_FORMAT, "{} is not a value artifact".format(path)
+        assert self.header["version"] <= ARTIFACT_VERSION, \
+            "{} has format version {}, this version of odp reads up to {}".format(path, self.header["version"], ARTIFACT_VERSION)
+        self.tau = None if self.header["tau"] is None else np.array(self.header["tau"])
+        self.metadata = self.header["metadata"]
+        self.num_slices = self.header["time_slices"]
+        self._grid = None
+        self._memmap = None
+
+    @property
+    def grid(self):
+        """The Grid of the values, built on first access"""
+        if self._grid is None:
+            grid = self.header["grid"]
+            self._grid = Grid(np.array(grid["min"]), np.array(grid["max"]), len(grid["pts_each_dim"]),
+                              np.array(grid["pts_each_dim"]), list(grid["periodic_dims"]))
+        return self._grid
+
+    def _values(self):
+        if self._memmap is None:
+            self._memmap = np.load(os.path.join(self.path, ARTIFACT_VALUES), mmap_mode="r")
+            assert list(self._memmap.shape) == self.header["shape"], \
+                "{} holds values of shape {}, the header says {}".format(self.path, self._memmap.shape, self.header["shape"])
+        return self._memmap
+
+    def values(self):
+        """Memory-mapped values, time-last like HJSolver(saveAllTimeSteps=True) when there are time slices"""
+        if self.num_slices is None:
+            return self._values()
+        return np.moveaxis(self._values(), 0, -1)
+
+    def read_slice(self, index):
+        """Memory-mapped time slice values()[..., index], a single contiguous block of the file"""
+        assert self.num_slices is not None, "{} has no time slices".format(self.path)
+        return self._values()[index]
+
+    def iter_slices(self, chunk=1):
+        """Yields (start, values) with chunk time slices at a time, values is time-last with shape grid + (<= chunk,)"""
+        assert self.num_slices is not None, "{} has no time slices".format(self.path)
+        for start in range(0, self.num_slices, chunk):
+            yield start, np.moveaxis(np.asarray(self._values()[start:start + chunk]), 0, -1)
+
+    def verify(self):
+        """Whether the data still matches the content hash of the header"""
+        return self.header["sha256"] is not None and _content_hash(self._values()) == self.header["sha256"]
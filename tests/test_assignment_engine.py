@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("mip")
+
+from MRAG.solvers import mip_solver, AssignmentEngine
+from MRAG.benchmarks.benchmark_assignment import random_escapes, random_steps, size, num_attackers, num_defenders
+
+
+def random_instance(rng):
+    status = np.zeros(num_attackers, dtype=int)
+    captured = rng.choice(num_attackers, size=rng.integers(3), replace=False)
+    status[captured] = -1
+    escapes = [random_escapes(rng, status, j) for j in range(num_defenders)]
+    EscapedAttacker1vs1, EscapedPairs2vs1, _ = (list(lists) for lists in zip(*escapes))
+    return status, EscapedAttacker1vs1, EscapedPairs2vs1
+
+
+def assert_feasible(assignments, status, EscapedAttacker1vs1, EscapedPairs2vs1):
+    assigned = [attacker for attackers in assignments for attacker in attackers]
+    assert len(assigned) == len(set(assigned))
+    for j, attackers in enumerate(assignments):
+        assert len(attackers) <= 2
+        assert all(status[attacker] == 0 for attacker in attackers)
+        assert not set(attackers) & set(EscapedAttacker1vs1[j])
+        assert sorted(attackers) not in [sorted(pair) for pair in EscapedPairs2vs1[j]]
+
+
+def test_engine_matches_mip_solver_on_random_instances():
+    # The optimum is often not unique, the two solvers can pick different assignments of the same size
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        status, EscapedAttacker1vs1, EscapedPairs2vs1 = random_instance(rng)
+        reference = mip_solver(num_defenders, status, EscapedAttacker1vs1, EscapedPairs2vs1)
+        # A new engine per instance: the aggregated pair constraints are built from scratch
+        assignments = AssignmentEngine(num_attackers, num_defenders)(status, EscapedAttacker1vs1, EscapedPairs2vs1)
+        assert_feasible(assignments, status, EscapedAttacker1vs1, EscapedPairs2vs1)
+        assert size(assignments) == size(reference)
+
+
+def test_persistent_engine_matches_mip_solver():
+    # One engine over a game sequence: the pair constraints of a defender are replaced when its escapes change
+    rng = np.random.default_rng(1)
+    engine = AssignmentEngine(num_attackers, num_defenders)
+    for status, EscapedAttacker1vs1, EscapedPairs2vs1, _, _ in random_steps(rng, change_rate=0.5):
+        reference = mip_solver(num_defenders, status, EscapedAttacker1vs1, EscapedPairs2vs1)
+        assignments = engine(status, EscapedAttacker1vs1, EscapedPairs2vs1)
+        assert_feasible(assignments, status, EscapedAttacker1vs1, EscapedPairs2vs1)
+        assert size(assignments) == size(reference)
+    assert engine.num_skips > 0
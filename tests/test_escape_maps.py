@@ -0,0 +1,22 @@
+import numpy as np
+
+from MRAG.escape_maps import build_escape_map, load_escape_map
+
+
+def test_non_cubic_map_is_reloaded_with_its_shape(tmp_path):
+    # 5 points on the last axis are padded to one byte, the first axis has 3
+    value_path = str(tmp_path / "value.npy")
+    rng = np.random.default_rng(0)
+    value = rng.standard_normal((3, 4, 5)).astype(np.float32)
+    np.save(value_path, value)
+
+    build_escape_map(value_path, threshold=0.1)
+    escape_map = load_escape_map(value_path, threshold=0.1)
+    assert escape_map.shape == value.shape
+
+    indices = np.indices(value.shape)
+    np.testing.assert_array_equal(escape_map.escaped(*indices), value <= 0.1)
+
+
+def test_missing_map_is_none(tmp_path):
+    assert load_escape_map(str(tmp_path / "value.npy")) is None
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from odp import executable_cache
+from odp.executable_cache import _graph_sources, load_executable, save_executable, clear_executable_cache, cache_stats
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(executable_cache, "CACHE_DIR", str(tmp_path))
+    clear_executable_cache(disk=False)
+    yield tmp_path
+    clear_executable_cache(disk=False)
+
+
+def test_graph_sources_include_imported_modules():
+    odp_dir = os.path.dirname(os.path.abspath(executable_cache.__file__))
+    sources = [os.path.relpath(path, odp_dir) for path in _graph_sources()]
+    # graph_ND imports both, a change to them has to invalidate the cached executables
+    assert "schedule.py" in sources
+    assert os.path.join("numpyGraphs", "frozen_cells.py") in sources
+    assert os.path.join("computeGraphs", "graph_ND.py") in sources
+
+
+def test_unloadable_library_is_a_miss(cache_dir):
+    (cache_dir / "broken.so").write_bytes(b"not a shared library")
+    misses = cache_stats["misses"]
+    assert load_executable("broken") is None
+    assert cache_stats["misses"] == misses + 1
+
+
+def test_exported_executable_is_reloaded(cache_dir):
+    hcl = pytest.importorskip("heterocl")
+    hcl.init()
+    hcl.config.init_dtype = hcl.Float(32)
+    A = hcl.placeholder((4,), name="A", dtype=hcl.Float())
+    B = hcl.placeholder((4,), name="B", dtype=hcl.Float())
+
+    def add_one(A, B):
+        hcl.update(B, lambda i: A[i] + 1, "add_one")
+
+    built = save_executable("add_one", hcl.build(hcl.create_schedule([A, B], add_one)))
+    assert (cache_dir / "add_one.so").exists()
+
+    # A new process only has the exported library, heterocl.tvm.module.load has to bring it back
+    clear_executable_cache(disk=False)
+    hits = cache_stats["hits"]
+    reloaded = load_executable("add_one")
+    assert reloaded is not None and reloaded is not built
+    assert cache_stats["hits"] == hits + 1
+
+    values = np.arange(4, dtype=np.float32)
+    result = hcl.asarray(np.zeros(4, dtype=np.float32))
+    reloaded(hcl.asarray(values), result)
+    np.testing.assert_allclose(result.asnumpy(), values + 1)